@@ -0,0 +1,125 @@
+"""
+Benchmark: recall@k x memória x latência com dimensão reduzida e quantização int8
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_compact_vectors --index .chroma                  # índice real
+    python -m benchmarks.bench_compact_vectors --index .chroma --questions perguntas.txt
+    python -m benchmarks.bench_compact_vectors --dims 1536,512,256 --rescore 2,4,8
+
+Os embeddings text-embedding-3 encurtados pela API (EMBEDDING_DIMENSIONS)
+equivalem aos primeiros N valores do vetor completo, renormalizados; cada
+dimensão é simulada assim a partir do índice existente, sem reindexar.
+
+Com --questions (uma pergunta por linha, exige OPENAI_API_KEY) as
+consultas são as nossas perguntas; sem ele, vetores do índice com ruído.
+O recall@k é medido contra a busca exata em float64 na dimensão completa
+do índice: mede o que se perde ao encurtar e quantizar. A memória é a da
+matriz percorrida em cada busca; no int8, a matriz float32 da reavaliação
+fica no disco e só as linhas dos candidatos são lidas.
+
+Sem --index, usa vetores sintéticos (sem a propriedade de encurtamento
+dos embeddings reais: o recall das dimensões menores não é representativo).
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from langchain_chroma import Chroma
+
+from benchmarks.bench_vector_backends import exact_top, percentiles, recall, synthetic_collection
+from src.juridic_bot.rag.vector_index import NumpyVectorStore, export_vectors, quantize_int8
+
+
+def embed_questions(path: Path) -> np.ndarray:
+    """Embeddings das perguntas de path na dimensão completa do modelo"""
+    from openai import OpenAI
+
+    from src.juridic_bot.config import Config
+
+    questions = [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    response = OpenAI(api_key=Config.OPENAI_API_KEY).embeddings.create(model=Config.EMBEDDING_MODEL, input=questions)
+    return np.asarray([item.embedding for item in response.data], dtype=np.float64)
+
+
+def shorten(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    """Primeiras dimensões, renormalizadas (como o parâmetro dimensions da API)"""
+    vectors = np.asarray(vectors[:, :dimensions], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def measure(store: NumpyVectorStore, queries: np.ndarray, exact, k: int):
+    found, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        found.append([doc.id for doc, _ in store.similarity_search_by_vector_with_relevance_scores(query, k=k)])
+        latencies.append(time.perf_counter() - started)
+    return recall(found, exact), latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de dimensão reduzida e quantização int8")
+    parser.add_argument("--index", type=Path, help="Diretório de um índice existente (com chroma.sqlite3)")
+    parser.add_argument("--questions", type=Path, help="Arquivo com uma pergunta por linha")
+    parser.add_argument("--vectors", type=int, default=20000, help="Vetores sintéticos (sem --index)")
+    parser.add_argument("--dims", default="1536,1024,512,256", help="Dimensões avaliadas (até a do índice)")
+    parser.add_argument("--dtypes", default="float32,float16,int8", help="Tipos da matriz avaliados")
+    parser.add_argument("--rescore", default="0,4", help="Candidatos por resultado reavaliados no int8")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas sintéticas (sem --questions)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        if args.index:
+            collection = chromadb.PersistentClient(path=str(args.index)).get_collection(
+                Chroma._LANGCHAIN_DEFAULT_COLLECTION_NAME
+            )
+        else:
+            collection = synthetic_collection(workdir / "chroma", args.vectors, 1536, args.seed)
+        export_vectors(collection, workdir, dtype="float32")
+        full = NumpyVectorStore.load(workdir)
+        matrix = np.asarray(full.matrix, dtype=np.float64)
+        ids, documents, metadatas = full.ids, full.documents, full.metadatas
+
+    dimensions = matrix.shape[1]
+    if args.questions:
+        queries = shorten(embed_questions(args.questions), dimensions).astype(np.float64)
+    else:
+        rng = np.random.default_rng(args.seed + 1)
+        queries = matrix[rng.integers(len(matrix), size=args.queries)]
+        queries = queries + 0.5 * rng.normal(size=queries.shape) / np.sqrt(dimensions)
+    exact = exact_top(queries, matrix, ids, args.k)
+    baseline = matrix.shape[0] * dimensions * 4
+    print(f"{len(matrix)} vetores de {dimensions} dimensões, {len(queries)} consultas, k={args.k}")
+    print(f"Referência: busca exata em float64 com {dimensions} dimensões; memória relativa à matriz float32\n")
+    print(f"{'dimensões':>9}  {'tipo':<12} {'recall':>6}  {'memória':>10}  {'redução':>7}  latência")
+
+    for size in sorted({min(int(value), dimensions) for value in args.dims.split(",")}, reverse=True):
+        vectors = shorten(matrix, size)
+        size_queries = shorten(queries, size)
+        quantized, scales = quantize_int8(vectors)
+        for dtype in args.dtypes.split(","):
+            if dtype == "int8":
+                variants = [
+                    (f"int8 r={rescore}", NumpyVectorStore(
+                        vectors, ids, documents, metadatas, quantized=quantized, scales=scales, rescore=int(rescore)
+                    ))
+                    for rescore in args.rescore.split(",")
+                ]
+            else:
+                variants = [(dtype, NumpyVectorStore(vectors.astype(dtype), ids, documents, metadatas))]
+            for name, store in variants:
+                found_recall, latencies = measure(store, size_queries, exact, args.k)
+                print(
+                    f"{size:>9}  {name:<12} {found_recall:6.3f}  {store.nbytes / 1024 / 1024:7.1f} MB  "
+                    f"{baseline / store.nbytes:6.1f}x  {percentiles(latencies)}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Ajuste dos parâmetros HNSW do Chroma: recall@k, tempo de build, tamanho e latência
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_hnsw --index .chroma                   # vetores do índice real
+    python -m benchmarks.bench_hnsw --index .chroma --questions perguntas.txt
+    python -m benchmarks.bench_hnsw --m 16,32 --construction-ef 100,200 --search-ef 50,100,200
+
+Para cada combinação de M e construction_ef, uma coleção nova é construída
+com os vetores do índice (ou sintéticos, sem --index) e medida com cada
+search_ef. As consultas ficam fora do índice: --holdout vetores sorteados
+e separados antes do build, ou as perguntas de --questions (uma por linha,
+exige OPENAI_API_KEY). O gabarito é a busca exata por força bruta (float64)
+sobre os vetores indexados. O tamanho é o do diretório da coleção (grafo
+HNSW e, em "total", o SQLite com embeddings e textos).
+
+Os valores escolhidos vão para HNSW_M, HNSW_CONSTRUCTION_EF e
+HNSW_SEARCH_EF; a próxima reindexação reconstrói a coleção.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from chromadb.api.shared_system_client import SharedSystemClient
+from langchain_chroma import Chroma
+
+from benchmarks.bench_compact_vectors import embed_questions, shorten
+from benchmarks.bench_vector_backends import exact_top, percentiles, recall, synthetic_collection
+from src.juridic_bot.rag.hnsw import collection_metadata
+from src.juridic_bot.rag.vector_index import NumpyVectorStore, export_vectors
+
+NAME = Chroma._LANGCHAIN_DEFAULT_COLLECTION_NAME
+
+
+def load_vectors(args, workdir: Path):
+    """Matriz normalizada, IDs e metadados dos vetores do índice (ou sintéticos)"""
+    if args.index:
+        collection = chromadb.PersistentClient(path=str(args.index)).get_collection(NAME)
+    else:
+        collection = synthetic_collection(workdir / "source", args.vectors, args.dimensions, args.seed)
+    (workdir / "matrix").mkdir()
+    export_vectors(collection, workdir / "matrix", dtype="float32")
+    store = NumpyVectorStore.load(workdir / "matrix")
+    return np.array(store.matrix), store.ids, store.metadatas
+
+
+def close(path: Path):
+    """Encerra o cliente em cache do diretório (grava o índice e descarta o search_ef carregado)"""
+    system = SharedSystemClient._identifier_to_system.pop(str(path), None)
+    if system is not None:
+        system.stop()
+
+
+def directory_size(path: Path, hnsw_only: bool = False) -> int:
+    """Bytes do diretório da coleção; hnsw_only conta só as pastas dos segmentos (o grafo HNSW)"""
+    total = 0
+    for child in path.iterdir():
+        if child.is_dir():
+            total += sum(file.stat().st_size for file in child.rglob("*") if file.is_file())
+        elif not hnsw_only:
+            total += child.stat().st_size
+    return total
+
+
+def build(path: Path, matrix: np.ndarray, ids, metadatas, m: int, construction_ef: int) -> float:
+    """Constrói a coleção com os parâmetros dados; retorna o tempo em segundos"""
+    client = chromadb.PersistentClient(path=str(path))
+    metadata = {**collection_metadata(), "hnsw:M": m, "hnsw:construction_ef": construction_ef}
+    started = time.perf_counter()
+    collection = client.create_collection(NAME, metadata=metadata)
+    batch = client.get_max_batch_size()
+    for start in range(0, len(ids), batch):
+        collection.add(
+            ids=ids[start:start + batch],
+            embeddings=matrix[start:start + batch],
+            metadatas=[item or None for item in metadatas[start:start + batch]],
+        )
+    elapsed = time.perf_counter() - started
+    close(path)
+    return elapsed
+
+
+def measure(path: Path, search_ef: int, queries: np.ndarray, exact, k: int):
+    """Recall e latências com search_ef, num cliente novo (o Chroma lê o search_ef ao carregar)"""
+    chromadb.PersistentClient(path=str(path)).get_collection(NAME).modify(
+        configuration={"hnsw": {"ef_search": search_ef}}
+    )
+    close(path)
+    collection = chromadb.PersistentClient(path=str(path)).get_collection(NAME)
+    collection.query(query_embeddings=queries[:1], n_results=k, include=[])  # Carrega o índice
+    found, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        found.append(collection.query(query_embeddings=[query], n_results=k, include=[])["ids"][0])
+        latencies.append(time.perf_counter() - started)
+    close(path)
+    return recall(found, exact), latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ajuste dos parâmetros HNSW do Chroma")
+    parser.add_argument("--index", type=Path, help="Diretório de um índice existente (com chroma.sqlite3)")
+    parser.add_argument("--questions", type=Path, help="Arquivo com uma pergunta por linha (consultas reais)")
+    parser.add_argument("--vectors", type=int, default=10000, help="Vetores sintéticos (sem --index)")
+    parser.add_argument("--dimensions", type=int, default=1536, help="Dimensão dos vetores sintéticos")
+    parser.add_argument("--holdout", type=int, default=200, help="Vetores separados como consultas")
+    parser.add_argument("--m", default="8,16,32", help="Valores de M")
+    parser.add_argument("--construction-ef", default="50,100,200", help="Valores de construction_ef")
+    parser.add_argument("--search-ef", default="10,25,50,100,200", help="Valores de search_ef")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        matrix, ids, metadatas = load_vectors(args, workdir)
+        if args.questions:
+            queries = shorten(embed_questions(args.questions), matrix.shape[1])
+        else:
+            held_out = np.zeros(len(ids), dtype=bool)
+            held_out[np.random.default_rng(args.seed + 1).choice(len(ids), args.holdout, replace=False)] = True
+            queries = matrix[held_out]
+            matrix = matrix[~held_out]
+            ids = [doc_id for doc_id, out in zip(ids, held_out) if not out]
+            metadatas = [metadata for metadata, out in zip(metadatas, held_out) if not out]
+        exact = exact_top(queries.astype(np.float64), matrix.astype(np.float64), ids, args.k)
+        print(
+            f"{len(ids)} vetores de {matrix.shape[1]} dimensões, {len(queries)} consultas fora do índice, k={args.k}"
+        )
+        print("Gabarito: busca exata por força bruta\n")
+        print(f"{'M':>3} {'c_ef':>5} {'build':>8} {'HNSW':>9} {'total':>9}  {'s_ef':>5} {'recall':>6}  latência")
+
+        for m in [int(value) for value in args.m.split(",")]:
+            for construction_ef in [int(value) for value in args.construction_ef.split(",")]:
+                path = workdir / f"m{m}-ef{construction_ef}"
+                elapsed = build(path, matrix, ids, metadatas, m, construction_ef)
+                sizes = (
+                    f"{directory_size(path, hnsw_only=True) / 1024 / 1024:6.1f} MB "
+                    f"{directory_size(path) / 1024 / 1024:6.1f} MB"
+                )
+                for search_ef in [int(value) for value in args.search_ef.split(",")]:
+                    found_recall, latencies = measure(path, search_ef, queries, exact, args.k)
+                    print(
+                        f"{m:>3} {construction_ef:>5} {elapsed:7.1f}s {sizes}  {search_ef:>5} {found_recall:6.3f}  "
+                        f"{percentiles(latencies)}"
+                    )
+                shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
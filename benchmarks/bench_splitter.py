@@ -0,0 +1,118 @@
+"""
+Benchmark: LegalTextSplitter x RecursiveCharacterTextSplitter em um código grande
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_splitter                 # código sintético (~6 MB)
+    python -m benchmarks.bench_splitter --file lei.pdf  # documento real
+"""
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+from src.juridic_bot.rag.legal_splitter import LegalTextSplitter
+
+ROMAN = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII"]
+WORDS = (
+    "servidor público cargo função administração lei competência prazo recurso autoridade "
+    "processo disciplinar penalidade vencimento vantagem licença direito dever proibição"
+).split()
+
+
+def wrap(line: str, width: int = 90):
+    """Quebra a linha como o texto extraído de um PDF"""
+    while len(line) > width:
+        cut = line.rfind(" ", 0, width)
+        cut = cut if cut > 0 else width
+        yield line[:cut]
+        line = line[cut + 1:]
+    yield line
+
+
+def synthetic_statute(articles: int, seed: int = 42) -> str:
+    """Código sintético com títulos, capítulos, artigos, parágrafos e incisos, com linhas quebradas como em PDF"""
+    rng = random.Random(seed)
+
+    def sentence(low: int, high: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize() + "."
+
+    lines = ["LEI Nº 99.999, DE 1º DE JANEIRO DE 2024", "Institui o Código de Testes.", ""]
+    for number in range(1, articles + 1):
+        if number % 200 == 1:
+            lines.append(f"TÍTULO {ROMAN[(number // 200) % len(ROMAN)]}")
+        if number % 40 == 1:
+            lines.append(f"CAPÍTULO {ROMAN[(number // 40) % len(ROMAN)]}")
+            lines.append(sentence(3, 6).upper())
+        lines.extend(wrap(f"Art. {number}º {sentence(10, 45)}"))
+        for inciso in range(rng.choice([0, 0, 0, 3, 5])):
+            lines.extend(wrap(f"{ROMAN[inciso]} - {sentence(5, 15)}"))
+        for paragraph in range(1, rng.choice([1, 1, 2, 3])):
+            lines.extend(wrap(f"§ {paragraph}º {sentence(10, 35)}"))
+    return "\n".join(lines)
+
+
+def articles_cut(chunks) -> int:
+    """Chunks que começam no meio de um artigo sem indicar de qual artigo são"""
+    boundary = re.compile(r"^(Art\.|TÍTULO|CAPÍTULO|LEI)")
+    return sum(1 for chunk in chunks[1:] if not boundary.match(chunk.page_content))
+
+
+def run(name: str, splitter, documents, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = splitter.split_documents(documents)
+        best = min(best, time.perf_counter() - started)
+
+    size_mb = sum(len(doc.page_content) for doc in documents) / 1024 / 1024
+    sizes = [len(chunk.page_content) for chunk in chunks]
+    print(
+        f"{name:<10} {best * 1000:9.1f} ms  {size_mb / best:7.2f} MB/s  {len(chunks):6d} chunks  "
+        f"média {sum(sizes) / len(sizes):6.0f} chars  sem contexto de artigo: {articles_cut(chunks)}"
+    )
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dos divisores de texto")
+    parser.add_argument("--file", type=Path, help="Documento real (pdf, txt, md, docx)")
+    parser.add_argument("--articles", type=int, default=20000, help="Artigos do código sintético")
+    parser.add_argument("--chunk-size", type=int, default=1500)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=3500, help="Caracteres por página do código sintético")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.file:
+        from src.juridic_bot.rag.ingest import DocumentParser
+        documents = DocumentParser().load_document(args.file)
+    else:
+        # Uma página por Document, como o PyPDFLoader entrega
+        text = synthetic_statute(args.articles)
+        documents = [
+            Document(page_content=text[start:start + args.page_size], metadata={"source": "codigo.pdf", "page": page})
+            for page, start in enumerate(range(0, len(text), args.page_size))
+        ]
+
+    size_mb = sum(len(doc.page_content) for doc in documents) / 1024 / 1024
+    print(f"Texto: {size_mb:.1f} MB em {len(documents)} páginas/seções, chunk_size={args.chunk_size}\n")
+
+    recursive = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        separators=["\n\n", "\n", "Art.", "§", ".", " "],
+        length_function=len,
+    )
+    legal = LegalTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+    baseline = run("recursive", recursive, documents, args.repeat)
+    elapsed = run("legal", legal, documents, args.repeat)
+    print(f"\nLegalTextSplitter: {baseline / elapsed:.1f}x mais rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark: busca vetorial no Chroma x NumpyVectorStore (float32, float16 e em lote)
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_vector_backends                   # 20 mil vetores sintéticos de 1536 dimensões
+    python -m benchmarks.bench_vector_backends --vectors 50000 --k 10
+    python -m benchmarks.bench_vector_backends --index .chroma   # índice real (geração ou layout antigo)
+
+Recall@k contra a busca exata (produto escalar em float64). As consultas são
+vetores do índice com ruído, como perguntas sobre um trecho existente. A
+busca filtrada restringe a uma das 8 "áreas" sintéticas (um oitavo dos
+chunks), como o filtro por área do direito.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from langchain_chroma import Chroma
+
+from src.juridic_bot.rag.vector_index import NumpyVectorStore, export_vectors
+
+# Áreas sintéticas para a busca filtrada
+AREAS = 8
+
+
+def synthetic_collection(directory: Path, vectors: int, dimensions: int, seed: int):
+    """Coleção do Chroma com vetores agrupados em tópicos, como chunks de um mesmo código"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, vectors // 100), dimensions))
+    client = chromadb.PersistentClient(path=str(directory))
+    collection = client.create_collection(Chroma._LANGCHAIN_DEFAULT_COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+    batch = client.get_max_batch_size()
+    for start in range(0, vectors, batch):
+        size = min(batch, vectors - start)
+        embeddings = centers[rng.integers(len(centers), size=size)] + 0.5 * rng.normal(size=(size, dimensions))
+        collection.add(
+            ids=[f"chunk:{i}" for i in range(start, start + size)],
+            embeddings=embeddings.astype(np.float32),
+            documents=[f"Art. {i}º" for i in range(start, start + size)],
+            metadatas=[{"chunk_index": i, "area": i % AREAS} for i in range(start, start + size)],
+        )
+    return collection
+
+
+def percentiles(latencies) -> str:
+    p50, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 99])
+    return f"p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+
+
+def recall(found, exact) -> float:
+    return float(np.mean([len(set(ids) & set(truth)) / len(truth) for ids, truth in zip(found, exact)]))
+
+
+def run(name: str, search, queries, exact):
+    found, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        found.append(search(query))
+        latencies.append(time.perf_counter() - started)
+    print(f"{name:<22} recall {recall(found, exact):.3f}  {percentiles(latencies)}")
+
+
+def exact_top(queries: np.ndarray, matrix: np.ndarray, ids, k: int, mask=None):
+    """IDs dos k vetores mais próximos de cada consulta, por força bruta em float64"""
+    scores = queries @ matrix.T
+    if mask is not None:
+        scores[:, ~mask] = -np.inf
+    return [[ids[i] for i in row] for row in np.argsort(-scores, axis=1)[:, :k]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de busca vetorial")
+    parser.add_argument("--index", type=Path, help="Diretório de um índice existente (com chroma.sqlite3)")
+    parser.add_argument("--vectors", type=int, default=20000, help="Vetores sintéticos")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=32, help="Consultas por busca em lote")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        if args.index:
+            collection = chromadb.PersistentClient(path=str(args.index)).get_collection(
+                Chroma._LANGCHAIN_DEFAULT_COLLECTION_NAME
+            )
+        else:
+            started = time.perf_counter()
+            collection = synthetic_collection(workdir / "chroma", args.vectors, args.dimensions, args.seed)
+            print(f"Chroma criado em {time.perf_counter() - started:.1f}s")
+
+        stores = {}
+        for dtype in ("float32", "float16"):
+            (workdir / dtype).mkdir()
+            export_vectors(collection, workdir / dtype, dtype=dtype)
+            started = time.perf_counter()
+            stores[dtype] = NumpyVectorStore.load(workdir / dtype)
+            print(
+                f"Matriz {dtype}: {stores[dtype].matrix.nbytes / 1024 / 1024:.1f} MB, "
+                f"aberta em {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+
+        matrix = np.asarray(stores["float32"].matrix, dtype=np.float64)
+        rng = np.random.default_rng(args.seed + 1)
+        queries = matrix[rng.integers(len(matrix), size=args.queries)]
+        queries = queries + 0.5 * rng.normal(size=queries.shape) / np.sqrt(matrix.shape[1])
+        ids = stores["float32"].ids
+        exact = exact_top(queries, matrix, ids, args.k)
+        queries = queries.astype(np.float32)
+        print(f"\n{len(matrix)} vetores de {matrix.shape[1]} dimensões, {len(queries)} consultas, k={args.k}\n")
+
+        where = None if args.index else {"area": 3}
+        searches = [("", None, exact)]
+        if where:
+            mask = np.array([metadata.get("area") == 3 for metadata in stores["float32"].metadatas])
+            searches.append((" filtro", where, exact_top(queries.astype(np.float64), matrix, ids, args.k, mask)))
+
+        for label, where, truth in searches:
+            run(
+                f"chroma{label}", lambda q: collection.query(
+                    query_embeddings=[q], n_results=args.k, where=where,
+                    include=["documents", "metadatas", "distances"]
+                )["ids"][0],
+                queries, truth
+            )
+            for dtype, store in stores.items():
+                run(
+                    f"numpy {dtype}{label}",
+                    lambda q: [
+                        doc.id for doc, _ in
+                        store.similarity_search_by_vector_with_relevance_scores(q, k=args.k, filter=where)
+                    ],
+                    queries, truth
+                )
+
+        # Em lote: latência por consulta = tempo do lote / consultas no lote
+        for dtype, store in stores.items():
+            found, latencies = [], []
+            for start in range(0, len(queries), args.batch):
+                batch = queries[start:start + args.batch]
+                started = time.perf_counter()
+                results = store.similarity_search_by_vectors_with_relevance_scores(batch, k=args.k)
+                latencies.extend([(time.perf_counter() - started) / len(batch)] * len(batch))
+                found.extend([doc.id for doc, _ in result] for result in results)
+            print(
+                f"{'lote ' + dtype:<22} recall {recall(found, exact):.3f}  {percentiles(latencies)}  "
+                f"({args.batch} consultas/lote)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,33 @@ Implementação do Bot Discord com capacidades RAG
 """
 import asyncio
 import logging
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Awaitable, Callable, List, Literal, Optional
 import discord
 from discord.ext import commands
 import psutil
+from langchain.schema import Document
 
 from ..config import Config
-from ..rag.ingest import DocumentProcessor
+from ..rag.areas import AREAS_DIREITO, TIPOS_DOCUMENTO, classify_area
+from ..rag.context import context_budget
+from ..rag.filters import metadata_filter
 from ..rag.retriever import RAGRetriever
-from ..llm.client import LLMClient
+from ..rag.statutes import parse_law_reference, parse_statute_query
+from ..llm.answer_cache import SemanticAnswerCache
+from ..llm.client import (
+    LLMClient,
+    CONVERSATIONAL_ERROR_RESPONSE,
+    ERROR_RESPONSE,
+    STREAM_INTERRUPTED_SUFFIX,
+    StreamInterruptedError,
+)
+from ..metrics import metrics
+from .reindex import ReindexJob, ReindexManager, ReindexRunningError
+from .scheduler import QueryScheduler, QueueFullError
+from .singleflight import SingleFlight, flight_key
+from .streaming import StreamingResponder, deliver_text
 
 # Configurar logging
 logging.basicConfig(
@@ -20,6 +38,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+BUSY_MESSAGE = "Estou com muitas perguntas na fila agora! 😅 Tente novamente em alguns instantes. ⏳"
+
+# Opções dos parâmetros de filtro dos comandos
+AreaDireito = Literal[tuple(AREAS_DIREITO.values())]
+TipoDocumento = Literal[TIPOS_DOCUMENTO]
+
+
+@dataclass
+class QueryResult:
+    """Resultado do pipeline de consulta"""
+
+    documents: List[Document]
+    answer: Optional[str]
+    cached: bool = False
+    complete: bool = True  # False quando a geração falhou (resposta de erro ou truncada)
+
+
+def answer_scope(guild_id: Optional[int], user_id: int) -> str:
+    """Escopo de isolamento do cache de respostas (servidor ou DM do usuário)"""
+    return str(guild_id) if guild_id else f"dm:{user_id}"
+
 
 class JuridicBot(commands.Bot):
     """Bot Discord com capacidades RAG"""
@@ -37,6 +76,10 @@ class JuridicBot(commands.Bot):
 
         self.retriever = RAGRetriever()
         self.llm_client = LLMClient()
+        self.scheduler = QueryScheduler()
+        self.singleflight = SingleFlight()
+        self.answer_cache = SemanticAnswerCache()
+        self.reindexer = ReindexManager()
         self.start_time = datetime.now()
 
     async def setup_hook(self):
@@ -69,6 +112,16 @@ class JuridicBot(commands.Bot):
             )
         )
 
+    async def close(self):
+        """Encerra o bot liberando clientes HTTP e pools de threads"""
+        try:
+            await self.reindexer.aclose()
+            await self.retriever.aclose()
+            await self.llm_client.aclose()
+        except Exception as e:
+            logger.warning(f"Erro ao liberar recursos: {e}")
+        await super().close()
+
     async def on_message(self, message: discord.Message):
         """Processa mensagens"""
         # Ignorar mensagens do próprio bot
@@ -105,28 +158,72 @@ class JuridicBot(commands.Bot):
             await message.reply(responses[hash(message.author.id) % len(responses)])
             return
 
+        async def notify_queued(position: int):
+            # O aviso é cortesia: uma falha ao enviá-lo não pode tirar a pergunta da fila
+            try:
+                await message.reply(f"⏳ Estou respondendo outras perguntas agora. Você é o #{position} na fila!")
+            except discord.HTTPException as e:
+                logger.warning(f"Erro ao avisar posição na fila: {e}")
+
+        guild_id = message.guild.id if message.guild else None
+        key = flight_key("mention", query, answer_scope(guild_id, message.author.id))
+
+        try:
+            # Perguntas idênticas em andamento aguardam a mesma resposta
+            text, shared = await self.singleflight.do(
+                key,
+                lambda: self.scheduler.submit(
+                    guild_id,
+                    message.author.id,
+                    lambda: self.answer_message(message, query),
+                    on_queued=notify_queued
+                )
+            )
+        except QueueFullError:
+            await message.reply(BUSY_MESSAGE)
+            return
+
+        if shared:
+            await deliver_text(StreamingResponder(message.reply, message.channel.send), text)
+
+    async def answer_message(self, message: discord.Message, query: str) -> str:
+        """Executa o pipeline RAG + LLM, responde à mensagem e retorna o texto enviado"""
         # Indicador de digitação
         async with message.channel.typing():
             try:
-                # Tentar buscar documentos relevantes (se disponível)
-                documents = self.retriever.search(query, k=3)
-
-                # Formatar contexto se existirem documentos
-                context = ""
-                if documents:
-                    context = self.retriever.format_context(documents)
-                    logger.info(f"Encontrados {len(documents)} documentos relevantes")
-                else:
-                    logger.info("Nenhum documento encontrado, usando conhecimento geral")
-
-                # Gerar resposta conversacional (com ou sem contexto)
-                response = self.llm_client.generate_conversational(query, context)
+                responder = None
+                if Config.STREAM_RESPONSES:
+                    # Entregar a resposta conforme o LLM gera
+                    responder = StreamingResponder(message.reply, message.channel.send)
+
+                # Área inferida da pergunta restringe a busca (chunks sem área continuam elegíveis)
+                filters = None
+                if Config.AUTO_AREA_FILTER:
+                    area = classify_area(query)
+                    if area:
+                        logger.info(f"Pergunta classificada na área {area}")
+                        filters = metadata_filter(area_direito=area, include_general=True)
+
+                result = await self.answer_query(
+                    query,
+                    k=3,
+                    scope=answer_scope(message.guild.id if message.guild else None, message.author.id),
+                    on_delta=responder.feed if responder else None,
+                    filters=filters
+                )
+
+                if responder:
+                    await responder.finish()
+                    return result.answer
+
+                response = result.answer
 
                 # Limitar tamanho para evitar problemas
                 if len(response) > 1800:
                     response = response[:1800] + "..."
 
                 await message.reply(response)
+                return response
 
             except Exception as e:
                 logger.error(f"Erro ao processar query: {e}")
@@ -146,6 +243,88 @@ class JuridicBot(commands.Bot):
                     error_msg = error_responses[hash(str(e)) % len(error_responses)]
 
                 await message.reply(error_msg)
+                return error_msg
+
+    async def answer_query(
+        self,
+        query: str,
+        k: int,
+        scope: str,
+        conversational: bool = True,
+        require_context: bool = False,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+        filters: Optional[dict] = None
+    ) -> "QueryResult":
+        """Pipeline RAG + LLM: busca, cache semântico de respostas e geração
+
+        Com on_delta a resposta é entregue em trechos conforme o LLM gera (ou
+        de uma vez, quando vem do cache); se o streaming falhar no meio, o
+        texto parcial recebe STREAM_INTERRUPTED_SUFFIX e volta com
+        complete=False, e respostas incompletas não entram no cache. Com require_context, perguntas sem
+        documentos relevantes não chegam ao LLM e o resultado não tem resposta.
+        filters restringe a busca (ver metadata_filter).
+        """
+        # Buscar documentos relevantes (se disponível)
+        results = await self.retriever.asearch_with_scores(query, k=k, filters=filters)
+        documents = [doc for doc, _ in results]
+
+        if documents:
+            logger.info(f"Encontrados {len(documents)} documentos relevantes")
+            context = self.retriever.format_context(
+                documents,
+                scores=[score for _, score in results],
+                budget=context_budget(self.llm_client.model)
+            )
+        elif require_context:
+            return QueryResult(documents=[], answer=None)
+        else:
+            logger.info("Nenhum documento relevante, usando conhecimento geral")
+            context = ""
+
+        cache_key = await self._answer_cache_key(query, documents)
+        if cache_key:
+            cached_answer = self.answer_cache.lookup(scope, *cache_key)
+            if cached_answer is not None:
+                logger.info("Resposta servida pelo cache semântico")
+                if on_delta:
+                    await on_delta(cached_answer)
+                return QueryResult(documents=documents, answer=cached_answer, cached=True)
+
+        interrupted = False
+        if on_delta:
+            parts = []
+            try:
+                async for delta in self.llm_client.generate_stream(query, context):
+                    parts.append(delta)
+                    await on_delta(delta)
+            except StreamInterruptedError:
+                # Avisar quem já leu parte da resposta em vez de encerrá-la em silêncio
+                interrupted = True
+                parts.append(STREAM_INTERRUPTED_SUFFIX)
+                await on_delta(STREAM_INTERRUPTED_SUFFIX)
+            answer = "".join(parts)
+        elif conversational:
+            answer = await self.llm_client.agenerate_conversational(query, context)
+        else:
+            answer = await self.llm_client.agenerate(query, context)
+
+        complete = not interrupted and answer not in (ERROR_RESPONSE, CONVERSATIONAL_ERROR_RESPONSE)
+        if cache_key and complete:
+            self.answer_cache.store(scope, query, *cache_key, answer=answer)
+
+        return QueryResult(documents=documents, answer=answer, complete=complete)
+
+    async def _answer_cache_key(self, query: str, documents: List[Document]) -> Optional[tuple]:
+        """(embedding, ids dos trechos, geração, modelo) para o cache de respostas"""
+        if not Config.ANSWER_CACHE_ENABLED:
+            return None
+        try:
+            embedding = await self.retriever.aembed_query(query)
+        except Exception as e:
+            logger.warning(f"Cache de respostas indisponível para esta pergunta: {e}")
+            return None
+        chunk_ids = [doc.id or doc.page_content for doc in documents]
+        return embedding, chunk_ids, self.retriever.generation, self.llm_client.model
 
     async def send_long_message(self, message: discord.Message, content: str):
         """Envia mensagens longas divididas em chunks"""
@@ -206,9 +385,38 @@ async def status(interaction: discord.Interaction):
         title="📊 Status do Sistema",
         color=discord.Color.green()
     )
-    embed.add_field(name="CPU", value=".1f", inline=True)
-    embed.add_field(name="RAM", value=".1f", inline=True)
+    embed.add_field(name="CPU", value=f"{cpu:.1f}%", inline=True)
+    embed.add_field(name="RAM", value=f"{ram:.1f}%", inline=True)
     embed.add_field(name="Uptime", value=str(uptime).split('.')[0], inline=True)
+
+    queue_wait = metrics.histogram("scheduler.queue_wait_ms")
+    embed.add_field(
+        name="Fila de consultas",
+        value=(
+            f"{bot.scheduler.in_flight} em andamento, {bot.scheduler.queued} aguardando\n"
+            f"Espera p50/p95: {queue_wait['p50']:.0f}/{queue_wait['p95']:.0f} ms\n"
+            f"Recusadas: {metrics.counter('scheduler.rejected'):.0f}\n"
+            f"Coalescidas: {metrics.counter('singleflight.saved'):.0f}"
+        ),
+        inline=False
+    )
+
+    batch_size = metrics.histogram("embedding.query_batch_size")
+    embed.add_field(
+        name="Embeddings de perguntas",
+        value=f"{batch_size['count']} chamadas, lote médio {batch_size['avg']:.1f} (máx. {batch_size['max']:.0f})",
+        inline=False
+    )
+
+    cache_stats = bot.retriever.cache_stats()
+    embed.add_field(
+        name="Caches de consulta",
+        value="\n".join(
+            f"{name}: {stats['size']}/{stats['maxsize']} itens, {stats['hit_rate']:.0%} acertos"
+            for name, stats in cache_stats.items()
+        ),
+        inline=False
+    )
     embed.add_field(name="Modelo LLM", value=Config.OPENROUTER_MODEL, inline=False)
     embed.add_field(name="Modelo Embeddings", value=Config.EMBEDDING_MODEL, inline=False)
 
@@ -217,58 +425,151 @@ async def status(interaction: discord.Interaction):
 
 @bot.tree.command(name="reindex")
 @commands.is_owner()
-async def reindex(interaction: discord.Interaction):
-    """Reindexa todos os documentos (apenas owner)"""
+async def reindex(interaction: discord.Interaction, acao: Literal["iniciar", "status", "cancelar"] = "iniciar"):
+    """Reindexa os documentos em segundo plano, mostra o progresso ou cancela (apenas owner)"""
     if interaction.user.id != Config.DISCORD_OWNER_ID:
         await interaction.response.send_message("❌ Você não tem permissão para usar este comando.", ephemeral=True)
         return
 
-    await interaction.response.defer()
-
-    try:
-        processor = DocumentProcessor()
-        vectorstore = processor.create_vectorstore()
+    if acao == "status":
+        job = bot.reindexer.job
+        await interaction.response.send_message(
+            job.describe() if job else "ℹ️ Nenhuma reindexação foi iniciada.", ephemeral=True
+        )
+        return
 
-        if vectorstore:
-            bot.retriever.reload()
-            await interaction.followup.send("✅ Documentos reindexados com sucesso!")
+    if acao == "cancelar":
+        if bot.reindexer.cancel():
+            await interaction.response.send_message("🛑 Cancelando a reindexação...", ephemeral=True)
         else:
-            await interaction.followup.send("⚠️ Nenhum documento foi indexado.")
+            await interaction.response.send_message("ℹ️ Nenhuma reindexação em andamento.", ephemeral=True)
+        return
 
+    try:
+        job = await bot.reindexer.start()
+    except ReindexRunningError:
+        await interaction.response.send_message(
+            "⚠️ Já existe uma reindexação em andamento. Use `/reindex acao:status` ou `acao:cancelar`.",
+            ephemeral=True
+        )
+        return
     except Exception as e:
         logger.error(f"Erro ao reindexar: {e}")
-        await interaction.followup.send(f"❌ Erro ao reindexar: {str(e)}")
+        await interaction.response.send_message(f"❌ Erro ao reindexar: {str(e)}")
+        return
+
+    await interaction.response.send_message(job.describe())
+    # A tarefa fica referenciada pelo job até a reindexação terminar
+    job.watcher = asyncio.create_task(acompanhar_reindex(interaction, job))
+
+
+async def acompanhar_reindex(interaction: discord.Interaction, job: ReindexJob):
+    """Atualiza a mensagem de progresso até o fim da reindexação e recarrega o índice"""
+    message = await interaction.original_response()
+
+    async def show(content: str):
+        nonlocal message
+        try:
+            await message.edit(content=content)
+        except discord.HTTPException as e:
+            # O token da interação expira em 15 minutos; continuar numa mensagem do canal
+            logger.info(f"Mensagem de progresso não pôde ser editada ({e}); enviando nova mensagem")
+            if interaction.channel is None:
+                return
+            message = await interaction.channel.send(content)
+
+    while job.running:
+        try:
+            await asyncio.wait_for(job.wait(), timeout=Config.REINDEX_PROGRESS_INTERVAL)
+        except asyncio.TimeoutError:
+            await show(job.describe())
+
+    if job.changed_index:
+        await bot.retriever.areload()
+    await show(job.describe())
 
 
 @bot.tree.command(name="pergunta")
-async def pergunta(interaction: discord.Interaction, pergunta: str):
-    """Faça uma pergunta jurídica ao bot"""
+async def pergunta(
+    interaction: discord.Interaction,
+    pergunta: str,
+    area: Optional[AreaDireito] = None,
+    tipo: Optional[TipoDocumento] = None
+):
+    """Faça uma pergunta jurídica ao bot (opcionalmente restrita a uma área ou tipo de documento)"""
     await interaction.response.defer()
 
+    async def notify_queued(position: int):
+        # O aviso é cortesia: uma falha ao enviá-lo não pode tirar a pergunta da fila
+        try:
+            await interaction.followup.send(
+                f"⏳ Estou respondendo outras perguntas agora. Você é o #{position} na fila!"
+            )
+        except discord.HTTPException as e:
+            logger.warning(f"Erro ao avisar posição na fila: {e}")
+
+    filters = metadata_filter(area_direito=area, tipo_documento=tipo)
+    key = flight_key(f"pergunta:{area or ''}:{tipo or ''}", pergunta,
+                     answer_scope(interaction.guild_id, interaction.user.id))
+
     try:
-        # Buscar documentos relevantes
-        documents = bot.retriever.search(pergunta, k=5)
+        # Perguntas idênticas em andamento aguardam a mesma resposta
+        text, shared = await bot.singleflight.do(
+            key,
+            lambda: bot.scheduler.submit(
+                interaction.guild_id,
+                interaction.user.id,
+                lambda: responder_pergunta(interaction, pergunta, filters),
+                on_queued=notify_queued
+            )
+        )
+    except QueueFullError:
+        await interaction.followup.send(BUSY_MESSAGE)
+        return
+
+    if shared:
+        await deliver_text(StreamingResponder(lambda content: interaction.followup.send(content, wait=True)), text)
 
-        if not documents:
-            await interaction.followup.send("❌ Não encontrei informações relevantes para sua pergunta. Tente reformular ou adicionar mais detalhes.")
-            return
 
-        # Formatar contexto
-        context = bot.retriever.format_context(documents)
+async def responder_pergunta(interaction: discord.Interaction, pergunta: str, filters: Optional[dict] = None) -> str:
+    """Executa o pipeline RAG + LLM para o comando /pergunta e retorna o texto enviado"""
+    try:
+        responder = None
+        if Config.STREAM_RESPONSES:
+            # Entregar a resposta conforme o LLM gera
+            responder = StreamingResponder(lambda content: interaction.followup.send(content, wait=True))
+
+        result = await bot.answer_query(
+            pergunta,
+            k=5,
+            scope=answer_scope(interaction.guild_id, interaction.user.id),
+            conversational=False,
+            require_context=True,
+            on_delta=responder.feed if responder else None,
+            filters=filters
+        )
 
-        # Gerar resposta usando LLM
-        response = bot.llm_client.generate(pergunta, context)
+        if result.answer is None:
+            not_found = "❌ Não encontrei informações relevantes para sua pergunta. Tente reformular ou adicionar mais detalhes."
+            await interaction.followup.send(not_found)
+            return not_found
 
-        # Adicionar fontes citadas
-        if documents:
-            sources = list(set(doc.metadata.get('source', 'N/A') for doc in documents))
-            response += f"\n\n📚 **Fontes consultadas:** {', '.join(sources[:3])}"  # Limitar a 3 fontes
+        # Fontes citadas (limitar a 3)
+        sources = list(set(doc.metadata.get('source', 'N/A') for doc in result.documents))
+        sources_footer = f"\n\n📚 **Fontes consultadas:** {', '.join(sources[:3])}"
+
+        if responder:
+            await responder.finish(suffix=sources_footer)
+            return result.answer + sources_footer
+
+        response = result.answer + sources_footer
 
         # Verificar tamanho da resposta
         if len(response) > 1900:  # Discord limit
             response = response[:1900] + "\n\n... (resposta truncada)"
 
         await interaction.followup.send(response)
+        return response
 
     except Exception as e:
         logger.error(f"Erro ao processar pergunta: {e}")
@@ -288,19 +589,33 @@ async def pergunta(interaction: discord.Interaction, pergunta: str):
             error_msg = error_responses[hash(str(e)) % len(error_responses)]
 
         await interaction.followup.send(error_msg)
+        return error_msg
 
 
 @bot.tree.command(name="buscar_lei")
-async def buscar_lei(interaction: discord.Interaction, numero: str, ano: str = ""):
-    """Busca uma lei específica"""
+async def buscar_lei(interaction: discord.Interaction, numero: str, ano: str = "", artigo: str = ""):
+    """Busca uma lei específica ou um artigo dela (ex.: numero: 8.112, ano: 1990, artigo: 5º § 2º)"""
     await interaction.response.defer()
 
     query = f"Lei {numero}"
     if ano and ano.strip():
         query += f"/{ano}"
+    if artigo and artigo.strip():
+        query += f", art. {artigo}"
 
     try:
-        documents = bot.retriever.search(query, k=3)
+        # Referência exata (lei, artigo, parágrafo): índice de artigos, sem embedding
+        law, artigo_numero, paragrafo = parse_statute_query(query)
+        law = parse_law_reference(numero) or law  # "CF", "LC 101" etc. no campo número
+        documents = []
+        if law:
+            documents = await bot.retriever.alookup_statute(law, artigo_numero, paragrafo, k=3)
+
+        if not documents:
+            # Número e ano da lei são termos exatos: busca lexical, sem embedding
+            documents = await bot.retriever.asearch(
+                query, k=3, weights=(Config.BUSCAR_LEI_VECTOR_WEIGHT, Config.BUSCAR_LEI_LEXICAL_WEIGHT)
+            )
 
         if documents:
             context = bot.retriever.format_context(documents)
@@ -315,6 +630,38 @@ async def buscar_lei(interaction: discord.Interaction, numero: str, ano: str = "
         await interaction.followup.send("❌ Erro ao buscar lei.")
 
 
+@bot.tree.command(name="cache_respostas")
+async def cache_respostas(
+    interaction: discord.Interaction,
+    acao: Literal["info", "limpar"] = "info",
+    todos_servidores: bool = False
+):
+    """Inspeciona ou limpa o cache semântico de respostas (apenas owner)"""
+    if interaction.user.id != Config.DISCORD_OWNER_ID:
+        await interaction.response.send_message("❌ Você não tem permissão para usar este comando.", ephemeral=True)
+        return
+
+    scope = None if todos_servidores else answer_scope(interaction.guild_id, interaction.user.id)
+
+    if acao == "limpar":
+        removed = bot.answer_cache.flush(scope)
+        await interaction.response.send_message(f"🧹 {removed} respostas removidas do cache.", ephemeral=True)
+        return
+
+    stats = bot.answer_cache.stats(scope)
+    embed = discord.Embed(title="🗄️ Cache de Respostas", color=discord.Color.blue())
+    embed.add_field(name="Respostas", value=f"{stats['size']} em {stats['scopes']} servidores", inline=True)
+    embed.add_field(name="Acertos", value=f"{stats['hits']} ({stats['hit_rate']:.0%})", inline=True)
+    embed.add_field(name="Limite por servidor", value=str(stats['max_entries_per_scope']), inline=True)
+
+    entries = stats.get("entries", [])
+    if entries:
+        top = "\n".join(f"• {e['query'][:80]} ({e['hits']}x)" for e in entries[:10])
+        embed.add_field(name="Perguntas mais reaproveitadas", value=top, inline=False)
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
 @bot.tree.command(name="ajuda")
 async def ajuda(interaction: discord.Interaction):
     """Mostra informações de ajuda"""
@@ -332,7 +679,7 @@ async def ajuda(interaction: discord.Interaction):
 
     embed.add_field(
         name="Comandos",
-        value="`/pergunta` - Faça perguntas jurídicas\n`/ping` - Verifica latência\n`/status` - Status do sistema\n`/buscar_lei` - Busca lei específica\n`/ajuda` - Este menu",
+        value="`/pergunta` - Faça perguntas jurídicas\n`/ping` - Verifica latência\n`/status` - Status do sistema\n`/buscar_lei` - Busca lei ou artigo específico\n`/ajuda` - Este menu",
         inline=False
     )
 
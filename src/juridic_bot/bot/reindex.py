@@ -0,0 +1,191 @@
+"""
+Reindexação em segundo plano: CLI da ingestão em outro processo, com progresso e cancelamento
+"""
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from ..config import Config
+from ..rag import ingest
+
+logger = logging.getLogger(__name__)
+
+RUNNING = "executando"
+DONE = "concluída"
+CANCELLED = "cancelada"
+FAILED = "falhou"
+
+
+class ReindexRunningError(Exception):
+    """Já existe uma reindexação em andamento"""
+
+
+def format_duration(seconds: float) -> str:
+    """125 -> '2min05s'"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}min{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}min"
+
+
+class ReindexJob:
+    """Uma execução da CLI de ingestão (rag.ingest --progress-json)
+
+    O processo imprime o relatório parcial como linhas JSON; a leitura é
+    assíncrona, então o event loop do bot nunca espera pela ingestão.
+    """
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.state = RUNNING
+        self.report: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.cancel_requested = False
+        # Tarefa que acompanha o job no Discord (mantida aqui para não ser coletada)
+        self.watcher: Optional[asyncio.Task] = None
+        self._reader = asyncio.create_task(self._read())
+
+    @property
+    def running(self) -> bool:
+        """Até o processo terminar, mesmo depois do resultado final"""
+        return self.finished is None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Segundos restantes estimados pelo ritmo dos arquivos já processados"""
+        done = self.report.get("files_done", 0)
+        planned = self.report.get("files_planned", 0)
+        if not self.running or not done or planned <= done:
+            return None
+        return self.elapsed / done * (planned - done)
+
+    @property
+    def changed_index(self) -> bool:
+        """Se a execução publicou uma geração ou gravou algo (o retriever precisa recarregar)"""
+        report = self.report
+        return bool(report.get("generation") or report.get("chunks_written") or report.get("chunks_deleted"))
+
+    async def wait(self):
+        """Aguarda o fim do processo e da leitura do progresso"""
+        await asyncio.shield(self._reader)
+
+    def cancel(self):
+        """Pede o cancelamento (SIGTERM); sem resposta em REINDEX_CANCEL_TIMEOUT, o processo é morto"""
+        if not self.running or self.cancel_requested:
+            return
+        self.cancel_requested = True
+        self.process.terminate()
+        asyncio.get_running_loop().call_later(Config.REINDEX_CANCEL_TIMEOUT, self._kill)
+
+    def _kill(self):
+        if self.process.returncode is None:
+            logger.warning("Reindexação não parou após o cancelamento; encerrando o processo")
+            self.process.kill()
+
+    async def _read(self):
+        try:
+            async for line in self.process.stdout:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue  # Saída que não é do protocolo de progresso
+                event = message.pop("event", None)
+                self.report = message
+                if event == "done":
+                    self.state = DONE
+                elif event == "cancelled":
+                    self.state = CANCELLED
+            returncode = await self.process.wait()
+        except Exception as e:
+            self.state, self.error = FAILED, str(e)
+        else:
+            if self.state == RUNNING:
+                # Saiu sem o resultado final: erro na ingestão ou processo morto
+                self.state = CANCELLED if self.cancel_requested else FAILED
+                self.error = f"processo terminou com código {returncode}"
+        self.finished = time.monotonic()
+        logger.info(f"Reindexação {self.state} em {format_duration(self.elapsed)}")
+
+    def describe(self) -> str:
+        """Mensagem de status para o Discord"""
+        report = self.report
+        done, planned = report.get("files_done", 0), report.get("files_planned", 0)
+        chunks = report.get("chunks_written", 0)
+        rate = chunks / self.elapsed if self.elapsed else 0.0
+
+        if self.state == RUNNING:
+            text = (
+                f"🔄 Reindexando{' (cancelando...)' if self.cancel_requested else ''}: "
+                f"{done}/{planned} arquivos processados, {chunks} chunks gravados ({rate:.1f}/s), "
+                f"{format_duration(self.elapsed)} decorridos"
+            )
+            if self.eta is not None:
+                text += f", faltam ~{format_duration(self.eta)}"
+            return text
+
+        summary = (
+            f"{report.get('added', 0)} novos, {report.get('updated', 0)} alterados, "
+            f"{report.get('removed', 0)} removidos, {report.get('unchanged', 0)} sem alteração, "
+            f"{report.get('failed', 0)} com erro ({chunks} chunks gravados, "
+            f"{report.get('duplicates', 0)} duplicatas descartadas)"
+        )
+        if self.state == DONE:
+            if not report.get("total_files"):
+                return "⚠️ Nenhum documento foi indexado."
+            generation = f" (geração {report['generation']})" if report.get("generation") else ""
+            return f"✅ Índice atualizado em {format_duration(self.elapsed)}{generation}: {summary}"
+        if self.state == CANCELLED:
+            return (
+                f"🛑 Reindexação cancelada após {format_duration(self.elapsed)} ({done}/{planned} arquivos): "
+                f"{summary}. A próxima execução continua dos arquivos pendentes."
+            )
+        return f"❌ Erro ao reindexar: {self.error}"
+
+
+class ReindexManager:
+    """Garante uma única reindexação por vez e guarda a última execução"""
+
+    def __init__(self):
+        self.job: Optional[ReindexJob] = None
+        # Via -c e não -m: o pacote rag já importa o módulo ingest
+        self.command = [sys.executable, "-c", f"from {ingest.__name__} import main; main()", "--progress-json"]
+        self._starting = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.job is not None and self.job.running
+
+    async def start(self) -> ReindexJob:
+        """Inicia a CLI de ingestão em outro processo; levanta ReindexRunningError se já houver uma"""
+        async with self._starting:
+            if self.running:
+                raise ReindexRunningError()
+            process = await asyncio.create_subprocess_exec(*self.command, stdout=asyncio.subprocess.PIPE)
+            self.job = ReindexJob(process)
+        logger.info(f"Reindexação iniciada (pid {process.pid})")
+        return self.job
+
+    def cancel(self) -> bool:
+        """Pede o cancelamento da reindexação em andamento; False se não há nenhuma"""
+        if not self.running:
+            return False
+        self.job.cancel()
+        return True
+
+    async def aclose(self):
+        """Cancela a reindexação em andamento e aguarda o processo"""
+        if self.cancel():
+            await self.job.wait()
@@ -0,0 +1,176 @@
+"""
+Agendador de consultas com concorrência limitada e fila justa por usuário/servidor
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from ..config import Config
+from ..metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class QueueFullError(Exception):
+    """Fila de consultas cheia (backpressure)"""
+
+    def __init__(self, queued: int):
+        super().__init__(f"Fila de consultas cheia ({queued} aguardando)")
+        self.queued = queued
+
+
+class QueryScheduler:
+    """Limita consultas simultâneas e atende a fila em round-robin
+
+    A fila tem dois níveis: servidores (guilds) são atendidos em rodízio e,
+    dentro de cada servidor, os usuários também. Assim um usuário que envia
+    muitas perguntas não atrasa os demais.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_queue_depth: Optional[int] = None,
+        max_per_user: Optional[int] = None
+    ):
+        self.max_in_flight = max_in_flight or Config.SCHEDULER_MAX_IN_FLIGHT
+        self.max_queue_depth = max_queue_depth if max_queue_depth is not None else Config.SCHEDULER_MAX_QUEUE_DEPTH
+        self.max_per_user = max_per_user or Config.SCHEDULER_MAX_PER_USER
+
+        self.in_flight = 0
+        self.queued = 0
+        # guild -> usuário -> fila de tickets
+        self._queues: "OrderedDict[object, OrderedDict[object, deque]]" = OrderedDict()
+
+    async def submit(
+        self,
+        guild_id: Optional[int],
+        user_id: int,
+        job: Callable[[], Awaitable[T]],
+        on_queued: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> T:
+        """Executa job respeitando o limite global e a ordem justa da fila
+
+        on_queued é chamado com a posição na ordem de atendimento (ver
+        position) quando a consulta precisa esperar. Levanta QueueFullError
+        se a fila estiver cheia.
+        """
+        guild_key = guild_id or "dm"
+        enqueued_at = time.monotonic()
+
+        if self.in_flight < self.max_in_flight and self.queued == 0:
+            self.in_flight += 1
+        else:
+            user_queue = self._queues.get(guild_key, {}).get(user_id)
+            if self.queued >= self.max_queue_depth or (user_queue and len(user_queue) >= self.max_per_user):
+                metrics.incr("scheduler.rejected")
+                raise QueueFullError(self.queued)
+
+            ticket = asyncio.get_running_loop().create_future()
+            self._enqueue(guild_key, user_id, ticket)
+            metrics.incr("scheduler.queued_total")
+
+            try:
+                if on_queued:
+                    await on_queued(self.position(ticket))
+                await ticket
+            except BaseException:
+                if ticket.done() and not ticket.cancelled():
+                    # Vaga já concedida: devolver para o próximo da fila
+                    self._release()
+                else:
+                    ticket.cancel()
+                    self._remove(guild_key, user_id, ticket)
+                raise
+
+        wait_ms = (time.monotonic() - enqueued_at) * 1000
+        metrics.observe("scheduler.queue_wait_ms", wait_ms)
+        self._update_gauges()
+
+        try:
+            return await job()
+        finally:
+            self._release()
+
+    def _enqueue(self, guild_key, user_id, ticket: asyncio.Future):
+        users = self._queues.setdefault(guild_key, OrderedDict())
+        users.setdefault(user_id, deque()).append(ticket)
+        self.queued += 1
+        self._update_gauges()
+
+    def _remove(self, guild_key, user_id, ticket: asyncio.Future):
+        users = self._queues.get(guild_key)
+        if not users or user_id not in users:
+            return
+        try:
+            users[user_id].remove(ticket)
+        except ValueError:
+            return
+        self.queued -= 1
+        if not users[user_id]:
+            del users[user_id]
+        if not users:
+            del self._queues[guild_key]
+        self._update_gauges()
+
+    def position(self, ticket: asyncio.Future) -> int:
+        """Posição do ticket na ordem em que o round-robin atenderia a fila agora (1 = próximo)
+
+        Simula _next_ticket sem alterar a fila; perguntas que chegarem depois
+        podem passar à frente (ex.: um usuário novo num servidor da vez).
+        """
+        guilds = deque(
+            (guild_key, deque((user_id, deque(tickets)) for user_id, tickets in users.items()))
+            for guild_key, users in self._queues.items()
+        )
+        position = 0
+        while guilds:
+            guild_key, users = guilds.popleft()
+            user_id, tickets = users.popleft()
+            queued = tickets.popleft()
+            if tickets:
+                users.append((user_id, tickets))
+            if users:
+                guilds.append((guild_key, users))
+            if queued.done():
+                continue
+            position += 1
+            if queued is ticket:
+                return position
+        return 0
+
+    def _next_ticket(self) -> Optional[asyncio.Future]:
+        """Retira o próximo ticket em round-robin (servidor, depois usuário)"""
+        while self._queues:
+            guild_key, users = self._queues.popitem(last=False)
+            user_id, tickets = users.popitem(last=False)
+            ticket = tickets.popleft()
+            self.queued -= 1
+
+            # Recolocar no fim do rodízio quem ainda tem pendências
+            if tickets:
+                users[user_id] = tickets
+            if users:
+                self._queues[guild_key] = users
+
+            if not ticket.done():
+                return ticket
+        return None
+
+    def _release(self):
+        self.in_flight -= 1
+        while self.in_flight < self.max_in_flight:
+            ticket = self._next_ticket()
+            if ticket is None:
+                break
+            self.in_flight += 1
+            ticket.set_result(None)
+        self._update_gauges()
+
+    def _update_gauges(self):
+        metrics.set_gauge("scheduler.in_flight", self.in_flight)
+        metrics.set_gauge("scheduler.queued", self.queued)
@@ -0,0 +1,73 @@
+"""
+Coalescência de consultas idênticas em andamento (single-flight)
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from ..metrics import metrics
+from ..rag.cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def flight_key(mode: str, query: str, scope: str) -> tuple:
+    """Chave de coalescência: modo de resposta, pergunta normalizada e escopo"""
+    return (mode, normalize_query(query), scope)
+
+
+class _Flight:
+    """Execução compartilhada de uma chave e quantos ainda aguardam por ela"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Executa uma única vez chamadas concorrentes com a mesma chave
+
+    A primeira chamada (líder) executa a função; as que chegam enquanto ela
+    está em andamento aguardam o mesmo resultado em vez de repetir embedding,
+    busca e geração.
+
+    A função roda numa task própria: cancelar quem aguarda (inclusive o
+    líder) não cancela a execução enquanto houver outro aguardando por ela.
+    Ela só é cancelada quando o último desiste.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._inflight: Dict[Hashable, _Flight] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Retorna (resultado, compartilhado); compartilhado=True para quem aguardou o líder"""
+        flight = self._inflight.get(key)
+        shared = flight is not None
+        if shared:
+            metrics.incr(f"{self.name}.saved")
+        else:
+            flight = _Flight(asyncio.ensure_future(func()))
+            flight.task.add_done_callback(lambda task: self._finished(key, flight))
+            self._inflight[key] = flight
+            metrics.incr(f"{self.name}.leaders")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Ninguém mais aguarda: cancelar a execução
+                flight.task.cancel()
+
+    def _finished(self, key: Hashable, flight: _Flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        # Evitar aviso de exceção não lida quando ninguém aguardava
+        flight.task.cancelled() or flight.task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
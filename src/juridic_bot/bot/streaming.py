@@ -0,0 +1,130 @@
+"""
+Entrega progressiva de respostas no Discord (streaming com edições)
+"""
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+import discord
+
+from ..config import Config
+from ..metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SendFunc = Callable[[str], Awaitable[discord.Message]]
+
+
+def split_for_discord(text: str, max_length: int) -> int:
+    """Retorna a posição de corte preferindo quebras de linha e espaços"""
+    if len(text) <= max_length:
+        return len(text)
+
+    window = text[:max_length]
+    # Só aceitar quebras no último quarto para não gerar mensagens curtas
+    min_cut = max_length * 3 // 4
+    for separator in ("\n\n", "\n", ". ", " "):
+        cut = window.rfind(separator)
+        if cut >= min_cut:
+            return cut + len(separator)
+    return max_length
+
+
+async def deliver_text(responder: "StreamingResponder", text: Optional[str]):
+    """Envia um texto já pronto, dividido em mensagens se necessário"""
+    if text:
+        await responder.feed(text)
+        await responder.finish()
+
+
+class StreamingResponder:
+    """Publica uma resposta conforme os tokens chegam
+
+    A primeira mensagem é enviada assim que chega texto visível; depois ela é
+    editada no máximo uma vez a cada STREAM_EDIT_INTERVAL segundos (limite de
+    edições do Discord). Ao passar de max_length caracteres a resposta continua
+    em novas mensagens em vez de ser truncada. Se uma edição falhar, o texto
+    continua no buffer para a próxima tentativa; no fim da resposta, o que a
+    edição não conseguiu publicar vai numa mensagem nova.
+    """
+
+    def __init__(
+        self,
+        reply: SendFunc,
+        send: Optional[SendFunc] = None,
+        max_length: Optional[int] = None,
+        edit_interval: Optional[float] = None
+    ):
+        self.reply = reply
+        self.send = send or reply
+        self.max_length = max_length or Config.STREAM_MESSAGE_LIMIT
+        self.edit_interval = edit_interval if edit_interval is not None else Config.STREAM_EDIT_INTERVAL
+
+        self.messages: List[discord.Message] = []
+        self._text = ""  # Conteúdo da mensagem atual (incluindo o que falta publicar)
+        self._published = ""  # Conteúdo já visível na mensagem atual
+        self._last_edit = 0.0
+        self._started = time.monotonic()
+
+    async def feed(self, delta: str):
+        """Adiciona um trecho da resposta e publica se for o momento"""
+        self._text += delta
+
+        if not self.messages:
+            if self._text.strip():
+                await self._flush()
+                metrics.observe("stream.first_visible_ms", (time.monotonic() - self._started) * 1000)
+            return
+
+        if time.monotonic() - self._last_edit >= self.edit_interval:
+            await self._flush()
+
+    async def finish(self, suffix: str = "", fallback: str = ""):
+        """Publica o restante da resposta"""
+        self._text += suffix
+        if not self.messages and not self._text.strip():
+            self._text = fallback
+        if self._text.strip():
+            await self._flush(final=True)
+        self.messages = [message for message in self.messages if message is not None]
+
+    async def _flush(self, final: bool = False):
+        # Transbordar para novas mensagens quando passar do limite
+        while len(self._text) > self.max_length:
+            cut = split_for_discord(self._text, self.max_length)
+            head = self._text[:cut].rstrip()
+            if not await self._publish(head, final):
+                return  # O trecho segue no buffer até a próxima publicação
+            self._text = self._text[cut:].lstrip()
+            self._published = ""
+            self.messages.append(None)  # Próxima publicação cria nova mensagem
+
+        if self._text.strip():
+            await self._publish(self._text, final)
+
+    async def _publish(self, content: str, final: bool = False) -> bool:
+        """Publica content na mensagem atual; False se a edição falhou e o texto não foi publicado"""
+        if content == self._published:
+            return True
+
+        if not self.messages or self.messages[-1] is None:
+            send = self.send if self.messages else self.reply
+            message = await send(content)
+            if self.messages:
+                self.messages[-1] = message
+            else:
+                self.messages.append(message)
+        else:
+            try:
+                await self.messages[-1].edit(content=content)
+            except discord.HTTPException as e:
+                if not final:
+                    logger.warning(f"Erro ao editar mensagem em streaming: {e}")
+                    return False
+                # Última chance: enviar em nova mensagem para não perder o texto
+                logger.warning(f"Erro ao editar mensagem em streaming, enviando como nova mensagem: {e}")
+                self.messages[-1] = await self.send(content)
+
+        self._published = content
+        self._last_edit = time.monotonic()
+        return True
@@ -25,17 +25,92 @@ class Config:
     # OpenAI
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0"))  # 0 = padrão do modelo; mudar exige reindexar
+    EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))  # 0 desativa o micro-batching
+    EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
 
     # RAG
     TOP_K = int(os.getenv("TOP_K", "5"))
+    MIN_RELEVANCE_SCORE = float(os.getenv("MIN_RELEVANCE_SCORE", "0.2"))  # Relevância vetorial mínima (0 desativa)
+    SCORE_GAP_RATIO = float(os.getenv("SCORE_GAP_RATIO", "0.25"))  # Queda relativa que encerra os resultados (0 desativa)
+    ADAPTIVE_K_MIN = int(os.getenv("ADAPTIVE_K_MIN", "1"))  # Resultados mantidos antes de aplicar SCORE_GAP_RATIO
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))  # Tokens de contexto por pergunta
+    CONTEXT_TOKEN_BUDGETS = os.getenv("CONTEXT_TOKEN_BUDGETS", "")  # Por modelo: "modelo=tokens,modelo=tokens"
+    CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))  # Relevância (1) x diversidade (0)
+    CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.8"))  # Jaccard de trecho repetido
+    REINDEX_PROGRESS_INTERVAL = float(os.getenv("REINDEX_PROGRESS_INTERVAL", "5"))  # Segundos entre atualizações
+    REINDEX_CANCEL_TIMEOUT = float(os.getenv("REINDEX_CANCEL_TIMEOUT", "60"))  # Espera antes de matar o processo
+    INDEX_GENERATIONS_ENABLED = os.getenv("INDEX_GENERATIONS_ENABLED", "true").lower() == "true"  # Build em cópia
+    INDEX_GC_GRACE_SECONDS = float(os.getenv("INDEX_GC_GRACE_SECONDS", "3600"))  # Espera para apagar gerações antigas
+    INDEX_RELOAD_CHECK_INTERVAL = float(os.getenv("INDEX_RELOAD_CHECK_INTERVAL", "30"))  # Segundos (0 = desliga)
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1500"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+    TEXT_SPLITTER = os.getenv("TEXT_SPLITTER", "legal")  # legal (artigos inteiros) ou recursive
+    EMBEDDING_STORE_ENABLED = os.getenv("EMBEDDING_STORE_ENABLED", "true").lower() == "true"  # Reaproveita embeddings na ingestão
+    RETRIEVER_MAX_WORKERS = int(os.getenv("RETRIEVER_MAX_WORKERS", "4"))  # Threads para buscas no Chroma
+    HNSW_M = int(os.getenv("HNSW_M", "16"))  # Vizinhos por nó do grafo HNSW (mudar reconstrói a coleção numa nova geração)
+    HNSW_CONSTRUCTION_EF = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))  # Candidatos na construção do grafo
+    HNSW_SEARCH_EF = int(os.getenv("HNSW_SEARCH_EF", "100"))  # Candidatos por busca (mais recall e latência)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # chroma ou numpy (matriz mapeada em memória)
+    VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32")  # Matriz do backend numpy: float32, float16 ou int8
+    VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))  # int8: candidatos reavaliados por resultado
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))  # Chunks por upsert/delete no Chroma
+    INGEST_SCAN_PAGE_SIZE = int(os.getenv("INGEST_SCAN_PAGE_SIZE", "5000"))  # Página ao ler metadados do índice
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))  # Processos de parsing (0 = núcleos disponíveis)
+    INGEST_FILE_TIMEOUT = float(os.getenv("INGEST_FILE_TIMEOUT", "300"))  # Segundos por arquivo (0 = sem limite)
+    INGEST_PREFETCH_FILES = int(os.getenv("INGEST_PREFETCH_FILES", "8"))  # Arquivos processados à frente da gravação
+    INGEST_QUEUE_BATCHES = int(os.getenv("INGEST_QUEUE_BATCHES", "4"))  # Lotes aguardando embedding/gravação
+    EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))  # Requisições de embedding simultâneas
+    EMBEDDING_REQUEST_MAX_INPUTS = int(os.getenv("EMBEDDING_REQUEST_MAX_INPUTS", "64"))  # Textos por requisição
+    EMBEDDING_REQUEST_MAX_TOKENS = int(os.getenv("EMBEDDING_REQUEST_MAX_TOKENS", "250000"))  # Tokens por requisição
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))  # Tentativas por lote (429, 5xx, rede)
+    EMBEDDING_RETRY_ROUNDS = int(os.getenv("EMBEDDING_RETRY_ROUNDS", "2"))  # Rodadas extras para lotes que falharam
+    TEXT_CACHE_ENABLED = os.getenv("TEXT_CACHE_ENABLED", "true").lower() == "true"  # Cache do texto extraído
+    TEXT_CACHE_MAX_MB = int(os.getenv("TEXT_CACHE_MAX_MB", "1024"))  # Tamanho máximo do cache de texto
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"  # Descarta chunks quase duplicados
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))  # Jaccard estimado mínimo (MinHash)
+    DEDUP_MIN_CHARS = int(os.getenv("DEDUP_MIN_CHARS", "200"))  # Chunks menores nunca são descartados
+    LEXICAL_SEARCH_ENABLED = os.getenv("LEXICAL_SEARCH_ENABLED", "true").lower() == "true"  # Índice BM25 (FTS5)
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Resultados de cada busca antes da fusão
+    RRF_K = int(os.getenv("RRF_K", "60"))  # Constante do Reciprocal Rank Fusion
+    VECTOR_WEIGHT = float(os.getenv("VECTOR_WEIGHT", "1.0"))  # Peso da busca vetorial (/pergunta e menções)
+    LEXICAL_WEIGHT = float(os.getenv("LEXICAL_WEIGHT", "1.0"))  # Peso da busca lexical (/pergunta e menções)
+    BUSCAR_LEI_VECTOR_WEIGHT = float(os.getenv("BUSCAR_LEI_VECTOR_WEIGHT", "0.0"))  # 0 = sem embedding
+    BUSCAR_LEI_LEXICAL_WEIGHT = float(os.getenv("BUSCAR_LEI_LEXICAL_WEIGHT", "1.0"))
+    STATUTE_INDEX_ENABLED = os.getenv("STATUTE_INDEX_ENABLED", "true").lower() == "true"  # Índice lei/artigo
+    AUTO_AREA_FILTER = os.getenv("AUTO_AREA_FILTER", "true").lower() == "true"  # Área inferida filtra as menções
+
+    # Agendador de consultas
+    SCHEDULER_MAX_IN_FLIGHT = int(os.getenv("SCHEDULER_MAX_IN_FLIGHT", "4"))  # Consultas simultâneas ao RAG/LLM
+    SCHEDULER_MAX_QUEUE_DEPTH = int(os.getenv("SCHEDULER_MAX_QUEUE_DEPTH", "20"))  # Consultas aguardando na fila
+    SCHEDULER_MAX_PER_USER = int(os.getenv("SCHEDULER_MAX_PER_USER", "3"))  # Consultas na fila por usuário
+
+    # Caches de consulta
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+    QUERY_EMBEDDING_CACHE_TTL = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "604800"))  # Segundos (0 = sem expiração)
+    QUERY_EMBEDDING_CACHE_PERSIST = os.getenv("QUERY_EMBEDDING_CACHE_PERSIST", "false").lower() == "true"
+    RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+    RETRIEVAL_CACHE_TTL = int(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))  # Segundos (0 = sem expiração)
+
+    # Cache semântico de respostas
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_MAX_DISTANCE = float(os.getenv("ANSWER_CACHE_MAX_DISTANCE", "0.08"))  # Distância de cosseno
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))  # Respostas por servidor
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "86400"))  # Segundos (0 = sem expiração)
+
+    # Streaming de respostas
+    STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+    STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.2"))  # Segundos entre edições
+    STREAM_MESSAGE_LIMIT = int(os.getenv("STREAM_MESSAGE_LIMIT", "1900"))  # Caracteres por mensagem
 
     # Paths
     BASE_DIR = Path(__file__).parent.parent.parent
     DOCUMENTS_DIR = BASE_DIR / "knowledge"
     CHROMA_DIR = BASE_DIR / ".chroma"
     LOGS_DIR = BASE_DIR / "logs"
+    CACHE_DIR = BASE_DIR / ".cache"
+    EMBEDDING_STORE_PATH = Path(os.getenv("EMBEDDING_STORE_PATH", str(CACHE_DIR / "embeddings.sqlite3")))
+    TEXT_CACHE_DIR = Path(os.getenv("TEXT_CACHE_DIR", str(CACHE_DIR / "extracted")))
 
     # System
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "2000"))
@@ -59,4 +134,5 @@ class Config:
         """Cria diretórios necessários"""
         cls.DOCUMENTS_DIR.mkdir(parents=True, exist_ok=True)
         cls.CHROMA_DIR.mkdir(parents=True, exist_ok=True)
-        cls.LOGS_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+        cls.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        cls.CACHE_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
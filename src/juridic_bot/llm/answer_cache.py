@@ -0,0 +1,173 @@
+"""
+Cache semântico de respostas para perguntas quase idênticas
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..config import Config
+from ..metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """Resposta armazenada com o contexto que a originou"""
+
+    query: str
+    embedding: np.ndarray
+    chunk_ids: frozenset
+    generation: int
+    model: str
+    answer: str
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+class SemanticAnswerCache:
+    """Cache de respostas indexado pelo embedding da pergunta
+
+    Uma pergunta reaproveita uma resposta quando está a no máximo
+    max_distance (distância de cosseno) de uma pergunta já respondida e os
+    trechos recuperados são os mesmos, na mesma geração do índice e com o
+    mesmo modelo. Cada servidor tem seu próprio espaço, com descarte LRU.
+    """
+
+    def __init__(
+        self,
+        max_distance: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None
+    ):
+        self.max_distance = max_distance if max_distance is not None else Config.ANSWER_CACHE_MAX_DISTANCE
+        self.max_entries = max_entries or Config.ANSWER_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else Config.ANSWER_CACHE_TTL
+
+        self.hits = 0
+        self.misses = 0
+        self._scopes: Dict[str, "OrderedDict[int, CachedAnswer]"] = {}
+        self._matrices: Dict[str, tuple] = {}  # escopo -> (ids, matriz de embeddings)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        scope: str,
+        embedding: Iterable[float],
+        chunk_ids: Iterable[str],
+        generation: int,
+        model: str
+    ) -> Optional[str]:
+        """Retorna a resposta de uma pergunta equivalente, se houver"""
+        vector = self._normalize(embedding)
+        chunk_set = frozenset(chunk_ids)
+
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if entries:
+                ids, matrix = self._matrix(scope)
+                distances = 1.0 - matrix @ vector
+                for index in np.argsort(distances):
+                    if distances[index] > self.max_distance:
+                        break
+                    entry_id = ids[index]
+                    entry = entries[entry_id]
+                    if self._is_valid(entry, chunk_set, generation, model):
+                        entry.hits += 1
+                        entries.move_to_end(entry_id)
+                        self.hits += 1
+                        metrics.incr("cache.answer.hits")
+                        return entry.answer
+
+            self.misses += 1
+            metrics.incr("cache.answer.misses")
+            return None
+
+    def store(
+        self,
+        scope: str,
+        query: str,
+        embedding: Iterable[float],
+        chunk_ids: Iterable[str],
+        generation: int,
+        model: str,
+        answer: str
+    ):
+        """Armazena uma resposta gerada"""
+        entry = CachedAnswer(
+            query=query,
+            embedding=self._normalize(embedding),
+            chunk_ids=frozenset(chunk_ids),
+            generation=generation,
+            model=model,
+            answer=answer
+        )
+        with self._lock:
+            entries = self._scopes.setdefault(scope, OrderedDict())
+            # Entradas de gerações antigas nunca mais serão válidas
+            for entry_id in [i for i, e in entries.items() if e.generation != generation]:
+                del entries[entry_id]
+            entries[self._next_id] = entry
+            self._next_id += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                metrics.incr("cache.answer.evictions")
+            self._matrices.pop(scope, None)
+
+    def flush(self, scope: Optional[str] = None) -> int:
+        """Remove as respostas de um escopo (ou de todos); retorna quantas"""
+        with self._lock:
+            if scope is None:
+                removed = sum(len(entries) for entries in self._scopes.values())
+                self._scopes.clear()
+                self._matrices.clear()
+            else:
+                removed = len(self._scopes.pop(scope, {}))
+                self._matrices.pop(scope, None)
+            return removed
+
+    def stats(self, scope: Optional[str] = None) -> Dict[str, Any]:
+        """Estatísticas gerais e, opcionalmente, as perguntas de um escopo"""
+        with self._lock:
+            total = self.hits + self.misses
+            result = {
+                "scopes": len(self._scopes),
+                "size": sum(len(entries) for entries in self._scopes.values()),
+                "max_entries_per_scope": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+            if scope is not None:
+                entries = self._scopes.get(scope, {})
+                result["entries"] = [
+                    {"query": e.query, "hits": e.hits, "created_at": e.created_at}
+                    for e in sorted(entries.values(), key=lambda e: e.hits, reverse=True)
+                ]
+            return result
+
+    def _is_valid(self, entry: CachedAnswer, chunk_set: frozenset, generation: int, model: str) -> bool:
+        if self.ttl and time.time() - entry.created_at > self.ttl:
+            return False
+        return entry.generation == generation and entry.model == model and entry.chunk_ids == chunk_set
+
+    def _matrix(self, scope: str) -> tuple:
+        cached = self._matrices.get(scope)
+        if cached is None:
+            entries = self._scopes[scope]
+            ids: List[int] = list(entries.keys())
+            matrix = np.stack([entries[i].embedding for i in ids])
+            cached = self._matrices[scope] = (ids, matrix)
+        return cached
+
+    @staticmethod
+    def _normalize(embedding: Iterable[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
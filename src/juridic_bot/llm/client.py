@@ -2,13 +2,21 @@
 Cliente para interação com LLM via OpenRouter
 """
 import logging
-from typing import Dict, Any, Optional
-from openai import OpenAI
+from typing import AsyncIterator, Dict, Any, Optional
+from openai import OpenAI, AsyncOpenAI
 
 from ..config import Config
 
 logger = logging.getLogger(__name__)
 
+ERROR_RESPONSE = "Desculpe, ocorreu um erro ao processar sua solicitação."
+CONVERSATIONAL_ERROR_RESPONSE = "Ops! Tive um probleminha técnico. Pode tentar perguntar de novo?"
+STREAM_INTERRUPTED_SUFFIX = "\n\n⚠️ A resposta foi interrompida por um erro. Pode perguntar de novo?"
+
+
+class StreamInterruptedError(Exception):
+    """O streaming falhou depois do primeiro trecho: a resposta entregue está incompleta"""
+
 
 class LLMClient:
     """Cliente para interação com LLM via OpenRouter"""
@@ -18,6 +26,10 @@ class LLMClient:
             api_key=Config.OPENROUTER_API_KEY,
             base_url=Config.OPENROUTER_BASE_URL
         )
+        self.async_client = AsyncOpenAI(
+            api_key=Config.OPENROUTER_API_KEY,
+            base_url=Config.OPENROUTER_BASE_URL
+        )
         self.model = Config.OPENROUTER_MODEL
 
         # System prompt conversacional para estudantes de concursos jurídicos
@@ -58,39 +70,33 @@ IMPORTANTE: Nunca mencione que é uma IA ou dê disclaimers legais."""
     ) -> str:
         """Gera resposta usando o LLM"""
 
-        # Montar mensagem com contexto
-        user_message = self._build_user_message(query, context)
-
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                max_tokens=max_tokens or Config.MAX_TOKENS,
-                temperature=temperature or Config.TEMPERATURE,
-                # Headers recomendados pelo OpenRouter
-                extra_headers={
-                    "HTTP-Referer": "https://github.com/prof-ramos/SamerPosterga",
-                    "X-Title": "Juridic Concursos Bot"
-                }
+                **self._build_request(query, context, max_tokens, temperature)
             )
+            return self._extract_content(response)
 
-            # Log de uso
-            if hasattr(response, 'usage') and response.usage:
-                logger.info(f"Tokens usados: {response.usage.total_tokens}")
+        except Exception as e:
+            logger.error(f"Erro ao gerar resposta: {e}")
+            return ERROR_RESPONSE
 
-            # Garantir encoding UTF-8 correto
-            content = response.choices[0].message.content
-            if isinstance(content, str):
-                # Garantir que string está em UTF-8
-                return content.encode('utf-8', errors='replace').decode('utf-8')
-            return str(content)
+    async def agenerate(
+        self,
+        query: str,
+        context: str = "",
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> str:
+        """Gera resposta usando o LLM sem bloquear o event loop"""
+        try:
+            response = await self.async_client.chat.completions.create(
+                **self._build_request(query, context, max_tokens, temperature)
+            )
+            return self._extract_content(response)
 
         except Exception as e:
             logger.error(f"Erro ao gerar resposta: {e}")
-            return "Desculpe, ocorreu um erro ao processar sua solicitação."
+            return ERROR_RESPONSE
 
     def generate_conversational(
         self,
@@ -106,7 +112,100 @@ IMPORTANTE: Nunca mencione que é uma IA ou dê disclaimers legais."""
 
         except Exception as e:
             logger.error(f"Erro ao gerar resposta conversacional: {e}")
-            return "Ops! Tive um probleminha técnico. Pode tentar perguntar de novo?"
+            return CONVERSATIONAL_ERROR_RESPONSE
+
+    async def generate_stream(
+        self,
+        query: str,
+        context: str = "",
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Gera resposta em streaming, produzindo os trechos conforme chegam
+
+        Um erro antes do primeiro trecho produz ERROR_RESPONSE; depois dele,
+        levanta StreamInterruptedError (o texto já produzido está truncado).
+        """
+        produced = 0
+        try:
+            stream = await self.async_client.chat.completions.create(
+                **self._build_request(query, context, max_tokens, temperature),
+                stream=True
+            )
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    logger.info(f"Tokens usados: {chunk.usage.total_tokens}")
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    produced += 1
+                    yield delta
+
+        except Exception as e:
+            if produced:
+                logger.error(f"Streaming interrompido após {produced} trechos: {e}")
+                raise StreamInterruptedError(str(e)) from e
+            logger.error(f"Erro ao gerar resposta em streaming: {e}")
+            yield ERROR_RESPONSE
+
+    async def agenerate_conversational(
+        self,
+        query: str,
+        context: str = "",
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> str:
+        """Versão assíncrona de generate_conversational"""
+        try:
+            return await self.agenerate(query, context, max_tokens, temperature)
+
+        except Exception as e:
+            logger.error(f"Erro ao gerar resposta conversacional: {e}")
+            return CONVERSATIONAL_ERROR_RESPONSE
+
+    async def aclose(self):
+        """Fecha o cliente HTTP assíncrono"""
+        await self.async_client.close()
+
+    def _build_request(
+        self,
+        query: str,
+        context: str,
+        max_tokens: Optional[int],
+        temperature: Optional[float]
+    ) -> Dict[str, Any]:
+        """Monta os parâmetros da chamada de chat completion"""
+        # Montar mensagem com contexto
+        user_message = self._build_user_message(query, context)
+
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            "max_tokens": max_tokens or Config.MAX_TOKENS,
+            "temperature": temperature or Config.TEMPERATURE,
+            # Headers recomendados pelo OpenRouter
+            "extra_headers": {
+                "HTTP-Referer": "https://github.com/prof-ramos/SamerPosterga",
+                "X-Title": "Juridic Concursos Bot"
+            }
+        }
+
+    def _extract_content(self, response) -> str:
+        """Extrai o texto da resposta garantindo encoding UTF-8"""
+        # Log de uso
+        if hasattr(response, 'usage') and response.usage:
+            logger.info(f"Tokens usados: {response.usage.total_tokens}")
+
+        # Garantir encoding UTF-8 correto
+        content = response.choices[0].message.content
+        if isinstance(content, str):
+            # Garantir que string está em UTF-8
+            return content.encode('utf-8', errors='replace').decode('utf-8')
+        return str(content)
 
     def _build_user_message(self, query: str, context: str) -> str:
         """Constrói mensagem do usuário com contexto de forma conversacional"""
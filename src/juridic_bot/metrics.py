@@ -0,0 +1,109 @@
+"""
+Métricas internas do bot (contadores, gauges e histogramas em memória)
+"""
+import threading
+from collections import deque
+from typing import Dict, Any
+
+
+class Histogram:
+    """Histograma simples com janela deslizante de amostras para percentis"""
+
+    def __init__(self, max_samples: int = 2048):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.samples = deque(maxlen=max_samples)
+
+    def observe(self, value: float):
+        """Registra uma observação"""
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.samples.append(value)
+
+    def percentile(self, p: float) -> float:
+        """Retorna o percentil p (0-100) das amostras recentes"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Resumo do histograma"""
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class MetricsRegistry:
+    """Registro de métricas thread-safe do processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._histograms: Dict[str, Histogram] = {}
+
+    def incr(self, name: str, value: float = 1):
+        """Incrementa um contador"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """Define o valor atual de um gauge"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """Registra uma observação em um histograma"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def counter(self, name: str) -> float:
+        """Valor atual de um contador"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def gauge(self, name: str) -> float:
+        """Valor atual de um gauge"""
+        with self._lock:
+            return self._gauges.get(name, 0)
+
+    def histogram(self, name: str) -> Dict[str, float]:
+        """Resumo de um histograma (vazio se não houver observações)"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return histogram.snapshot() if histogram else Histogram().snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Retorna todas as métricas registradas"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": {name: h.snapshot() for name, h in self._histograms.items()},
+            }
+
+    def reset(self):
+        """Limpa todas as métricas"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+# Registro global do processo
+metrics = MetricsRegistry()
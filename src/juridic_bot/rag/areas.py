@@ -0,0 +1,106 @@
+"""
+Áreas do direito e tipos de documento usados nos metadados dos chunks
+"""
+import re
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+# Pasta do acervo -> área gravada em "area_direito"
+AREAS_DIREITO: Dict[str, str] = {
+    "direito_administrativo": "Administrativo",
+    "direito_constitucional": "Constitucional",
+    "direito_penal": "Penal",
+    "direito_civil": "Civil",
+    "direito_processual": "Processual",
+    "direito_tributario": "Tributario",
+    "direito_trabalhista": "Trabalhista",
+    "direito_previdenciario": "Previdenciario",
+    "direito_eleitoral": "Eleitoral",
+    "direito_internacional": "Internacional",
+    "direito_ambiental": "Ambiental",
+    "direito_consumidor": "Consumidor",
+}
+AREA_GERAL = "Direito Geral"
+
+# Valores de "tipo_documento" (ver DocumentParser.identificar_tipo_documento)
+TIPOS_DOCUMENTO: Tuple[str, ...] = (
+    "lei", "decreto", "portaria", "resolucao", "instrucao_normativa", "sumula", "jurisprudencia", "doutrina",
+    "documento_geral",
+)
+
+# Termos característicos de cada área (sem acentos); expressões valem mais que palavras soltas
+_AREA_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "Administrativo": (
+        "servidor publico", "servidores publicos", "licitacao", "licitacoes", "ato administrativo",
+        "improbidade", "concurso publico", "8112", "14133", "8666", "processo administrativo", "poder de policia",
+        "autarquia", "estagio probatorio", "cargo publico", "administracao publica", "desapropriacao",
+    ),
+    "Constitucional": (
+        "constituicao", "constitucional", "cf", "direitos fundamentais", "emenda constitucional",
+        "mandado de seguranca", "habeas corpus", "habeas data", "controle de constitucionalidade", "adi", "adpf",
+        "poder constituinte", "clausula petrea",
+    ),
+    "Penal": (
+        "crime", "crimes", "pena", "penal", "homicidio", "furto", "roubo", "dolo", "culposo", "tipicidade",
+        "legitima defesa", "codigo penal", "peculato", "corrupcao passiva", "concussao", "prevaricacao",
+    ),
+    "Civil": (
+        "contrato", "contratos", "codigo civil", "responsabilidade civil", "posse", "usucapiao", "obrigacoes",
+        "heranca", "sucessao", "casamento", "capacidade civil", "negocio juridico",
+    ),
+    "Processual": (
+        "processo civil", "processo penal", "cpc", "cpp", "apelacao", "agravo", "citacao", "sentenca",
+        "peticao inicial", "tutela provisoria", "recurso especial", "recurso extraordinario",
+    ),
+    "Tributario": (
+        "tributo", "tributos", "tributario", "imposto", "impostos", "contribuicao de melhoria", "ctn",
+        "lancamento tributario", "icms", "iss", "ipi", "imunidade tributaria", "fato gerador",
+    ),
+    "Trabalhista": (
+        "clt", "empregado", "empregador", "fgts", "jornada de trabalho", "aviso previo", "justa causa",
+        "rescisao", "trabalhista",
+    ),
+    "Previdenciario": (
+        "inss", "beneficio previdenciario", "auxilio doenca", "pensao por morte", "regime geral",
+        "previdencia", "previdenciario", "aposentadoria",
+    ),
+    "Eleitoral": (
+        "eleicao", "eleicoes", "eleitoral", "candidato", "partido politico", "tse", "inelegibilidade",
+        "propaganda eleitoral",
+    ),
+    "Internacional": ("tratado", "tratados", "direito internacional", "extradicao", "asilo", "refugiado"),
+    "Ambiental": (
+        "meio ambiente", "ambiental", "licenciamento ambiental", "area de preservacao", "fauna", "flora",
+    ),
+    "Consumidor": ("consumidor", "cdc", "fornecedor", "relacao de consumo", "vicio do produto", "procon"),
+}
+
+_AREA_PATTERNS = {
+    area: [(re.compile(rf"\b{re.escape(keyword)}\b"), len(keyword.split())) for keyword in keywords]
+    for area, keywords in _AREA_KEYWORDS.items()
+}
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    # "8.112" -> "8112", "auxílio-doença" -> "auxilio doenca"
+    return re.sub(r"(?<=\d)\.(?=\d)", "", text).replace("-", " ")
+
+
+def classify_area(query: str) -> Optional[str]:
+    """Área do direito de uma pergunta por palavras-chave, ou None se incerta
+
+    Classificador barato (sem chamada de API) para restringir a busca das
+    menções; só responde quando uma área vence as demais com folga.
+    """
+    text = _fold(query)
+    scores = {
+        area: sum(weight for pattern, weight in patterns if pattern.search(text))
+        for area, patterns in _AREA_PATTERNS.items()
+    }
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, second_score) = ranked[0], ranked[1]
+    if best_score == 0 or best_score == second_score:
+        return None
+    return best
@@ -0,0 +1,79 @@
+"""
+Micro-batching de embeddings de perguntas concorrentes
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from ..metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+EmbedBatchFunc = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingMicroBatcher:
+    """Agrupa pedidos de embedding que chegam em uma janela curta
+
+    Pedidos feitos dentro de window_ms (ou até max_batch_size pedidos) vão
+    em uma única chamada à API; cada chamador recebe o seu vetor. O custo é
+    no máximo window_ms de latência extra por pergunta.
+    """
+
+    def __init__(self, embed_batch: EmbedBatchFunc, window_ms: float, max_batch_size: int):
+        self.embed_batch = embed_batch
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """Embedding de um texto, enviado junto com os pedidos da mesma janela"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        # Textos repetidos na mesma janela são enviados uma vez só
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+
+        metrics.incr("embedding.query_batches")
+        metrics.observe("embedding.query_batch_size", len(unique_texts))
+
+        try:
+            vectors = await self.embed_batch(unique_texts)
+            if len(vectors) != len(unique_texts):
+                # Resposta parcial da API: sem vetor para todos, ninguém do lote pode ficar esperando
+                raise RuntimeError(f"{len(vectors)} embeddings para {len(unique_texts)} textos")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, vectors))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
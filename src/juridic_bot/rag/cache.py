@@ -0,0 +1,180 @@
+"""
+Caches de consulta: embeddings de perguntas e resultados de busca
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional
+
+from ..metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    """Normaliza o texto da pergunta para uso como chave de cache"""
+    text = unicodedata.normalize("NFC", text).casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!.;: ")
+
+
+class LRUCache:
+    """Cache LRU em memória com expiração (TTL) e contadores de acerto"""
+
+    def __init__(self, maxsize: int, ttl: float = 0, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl  # 0 = sem expiração
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor ou default, contando acerto/erro"""
+        value = self._get(key)
+        if value is _MISSING:
+            self._record(hit=False)
+            return default
+        self._record(hit=True)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """Armazena um valor, descartando o menos usado se necessário"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Remove todas as entradas"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Tamanho e taxa de acerto do cache"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            value, stored_at = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        metrics.incr(f"cache.{self.name}.{'hits' if hit else 'misses'}")
+
+
+class EmbeddingCache(LRUCache):
+    """Cache de embeddings de perguntas, opcionalmente persistido em SQLite
+
+    A camada em memória atende a maioria dos acessos; a SQLite permite que
+    o cache sobreviva a reinicializações do bot.
+    """
+
+    def __init__(self, maxsize: int, ttl: float = 0, path: Optional[Path] = None):
+        super().__init__(maxsize, ttl, name="query_embedding")
+        self.path = path
+        self._conn = None
+        if path:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(path), check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                    "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Cache persistente de embeddings indisponível ({path}): {e}")
+                self._conn = None
+
+    def get(self, key: str, default: Any = None) -> Optional[List[float]]:
+        value = self._get(key)
+        if value is _MISSING:
+            value = self._load(key)
+            if value is not None:
+                super().put(key, value)
+        if value is _MISSING or value is None:
+            self._record(hit=False)
+            return default
+        self._record(hit=True)
+        return value
+
+    def put(self, key: str, value: List[float]):
+        super().put(key, value)
+        if not self._conn:
+            return
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                    (key, array("f", value).tobytes(), time.time())
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao persistir embedding em cache: {e}")
+
+    def clear(self):
+        super().clear()
+        if self._conn:
+            with self._lock:
+                self._conn.execute("DELETE FROM query_embeddings")
+                self._conn.commit()
+
+    def close(self):
+        """Fecha a conexão SQLite"""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def _load(self, key: str) -> Optional[List[float]]:
+        if not self._conn:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT vector, created_at FROM query_embeddings WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao ler embedding em cache: {e}")
+            return None
+        if not row:
+            return None
+        vector, created_at = row
+        if self.ttl and time.time() - created_at > self.ttl:
+            return None
+        return array("f", vector).tolist()
@@ -0,0 +1,182 @@
+"""
+Montagem do contexto do LLM dentro de um orçamento de tokens
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from ..config import Config
+from .embedding_engine import estimate_tokens
+from .lexical import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Tokens do cabeçalho "**Documento N** - fonte (tipo) [Chunk i/n]" de cada trecho
+_HEADER_TOKENS = 24
+# Menor texto repetido (caracteres) tratado como sobreposição entre chunks vizinhos
+_MIN_OVERLAP = 20
+# Prefixo que o LegalTextSplitter repete antes da sobreposição nos pedaços de um artigo longo
+_CONTINUATION_PREFIX = re.compile(r"Art\. [^\n]{1,40} \(continuação\)\n")
+
+
+def context_budget(model: Optional[str] = None) -> int:
+    """Orçamento de tokens de contexto do modelo (CONTEXT_TOKEN_BUDGETS, senão CONTEXT_TOKEN_BUDGET)"""
+    for item in Config.CONTEXT_TOKEN_BUDGETS.split(","):
+        name, _, tokens = item.partition("=")
+        if model and name.strip() == model and tokens.strip().isdigit():
+            return int(tokens)
+    return Config.CONTEXT_TOKEN_BUDGET
+
+
+def chunk_tokens(doc: Document) -> int:
+    """Tokens do chunk calculados na ingestão (num_tokens); estimativa para chunks antigos"""
+    tokens = doc.metadata.get("num_tokens")
+    return int(tokens) if tokens is not None else estimate_tokens(doc.page_content)
+
+
+def _similarity(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    """Jaccard dos termos normalizados"""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def _overlap_end(previous: str, following: str, limit: int) -> int:
+    """Posição de following logo após o final repetido de previous (0 se não há sobreposição)
+
+    A sobreposição dos splitters fica no início de following (depois do
+    prefixo de continuação do artigo, se houver); texto repetido em outro
+    ponto é conteúdo do chunk, como uma frase comum a dois artigos vizinhos.
+    """
+    prefix = _CONTINUATION_PREFIX.match(following)
+    start = prefix.end() if prefix else 0
+    for size in range(min(len(previous), limit), _MIN_OVERLAP - 1, -1):
+        if following.startswith(previous[-size:], start):
+            return start + size
+    return 0
+
+
+@dataclass
+class Passage:
+    """Trecho do contexto: um chunk ou chunks consecutivos do mesmo arquivo unidos"""
+
+    documents: List[Document]
+    text: str
+    tokens: int
+    score: float
+
+
+@dataclass
+class _Candidate:
+    document: Document
+    score: float
+    terms: FrozenSet[str]
+    tokens: int
+
+
+class ContextBuilder:
+    """Escolhe e une os trechos do prompt dentro de um orçamento de tokens
+
+    Seleção por MMR: a cada passo entra o chunk com melhor equilíbrio entre
+    relevância (score da busca) e diferença para os já escolhidos; chunks
+    quase idênticos a um escolhido são descartados e os que não cabem no
+    orçamento restante são pulados. Os tokens vêm de num_tokens, gravado na
+    ingestão, então o orçamento não custa tokenização na consulta. Por fim,
+    chunks consecutivos do mesmo arquivo viram um único trecho, sem o texto
+    repetido pela sobreposição do divisor.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
+        duplicate_threshold: Optional[float] = None
+    ):
+        self.budget = context_budget() if budget is None else budget
+        self.mmr_lambda = Config.CONTEXT_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+        self.duplicate_threshold = (
+            Config.CONTEXT_DUPLICATE_THRESHOLD if duplicate_threshold is None else duplicate_threshold
+        )
+
+    def build(self, results: Sequence[Tuple[Document, float]]) -> List[Passage]:
+        """Trechos do contexto, do mais relevante para o menos"""
+        return self._merge(self._select(results))
+
+    def _select(self, results: Sequence[Tuple[Document, float]]) -> List[_Candidate]:
+        candidates = [
+            _Candidate(doc, score, frozenset(tokenize(doc.page_content)), chunk_tokens(doc) + _HEADER_TOKENS)
+            for doc, score in results
+        ]
+        top = max((candidate.score for candidate in candidates), default=0.0)
+        # Maior similaridade de cada candidato com os já escolhidos
+        redundancy = [0.0] * len(candidates)
+        pending = list(range(len(candidates)))
+        selected: List[_Candidate] = []
+        remaining = self.budget
+
+        while pending:
+            best = max(
+                pending,
+                key=lambda i: self.mmr_lambda * (candidates[i].score / top if top > 0 else 1.0)
+                - (1 - self.mmr_lambda) * redundancy[i]
+            )
+            pending.remove(best)
+            candidate = candidates[best]
+            if redundancy[best] >= self.duplicate_threshold:
+                continue
+            # O chunk mais relevante sempre entra, mesmo maior que o orçamento
+            if selected and candidate.tokens > remaining:
+                continue
+            selected.append(candidate)
+            remaining -= candidate.tokens
+            for i in pending:
+                redundancy[i] = max(redundancy[i], _similarity(candidates[i].terms, candidate.terms))
+
+        return selected
+
+    def _merge(self, selected: List[_Candidate]) -> List[Passage]:
+        # Chunks do mesmo arquivo, em ordem de chunk_index
+        groups: Dict[str, List[_Candidate]] = {}
+        passages = []
+        for candidate in selected:
+            metadata = candidate.document.metadata
+            key = metadata.get("file_key") or metadata.get("source")
+            if key is None or metadata.get("chunk_index") is None:
+                passages.append(self._passage([candidate]))
+            else:
+                groups.setdefault(key, []).append(candidate)
+
+        for group in groups.values():
+            group.sort(key=lambda candidate: candidate.document.metadata["chunk_index"])
+            run = [group[0]]
+            for candidate in group[1:]:
+                if candidate.document.metadata["chunk_index"] == run[-1].document.metadata["chunk_index"] + 1:
+                    run.append(candidate)
+                else:
+                    passages.append(self._passage(run))
+                    run = [candidate]
+            passages.append(self._passage(run))
+
+        passages.sort(key=lambda passage: passage.score, reverse=True)
+        return passages
+
+    @staticmethod
+    def _passage(run: List[_Candidate]) -> Passage:
+        text = run[0].document.page_content
+        tokens = run[0].tokens
+        for candidate in run[1:]:
+            following = candidate.document.page_content
+            start = _overlap_end(text, following, Config.CHUNK_OVERLAP)
+            text = f"{text}{following[start:]}" if start else f"{text}\n{following}"
+            # Um cabeçalho só para o trecho; tokens da sobreposição estimados pela proporção do texto
+            repeated = round((candidate.tokens - _HEADER_TOKENS) * start / len(following)) if following else 0
+            tokens += candidate.tokens - _HEADER_TOKENS - repeated
+        return Passage(
+            documents=[candidate.document for candidate in run],
+            text=text,
+            tokens=tokens,
+            score=max(candidate.score for candidate in run)
+        )
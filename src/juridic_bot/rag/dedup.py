@@ -0,0 +1,230 @@
+"""
+Detecção de chunks quase duplicados na ingestão (MinHash + LSH)
+"""
+import hashlib
+import logging
+import re
+import sqlite3
+import unicodedata
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Primo logo acima de 2^32: com a, x < 2^32, (a * x + b) cabe em uint64
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = 2 ** 32
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Limite de parâmetros por consulta SQLite
+_SQL_BATCH = 500
+
+
+def _normalize(text: str) -> List[str]:
+    """Palavras sem acentos e em minúsculas (diferenças de formatação não contam)"""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _WORD_PATTERN.findall(text)
+
+
+class MinHasher:
+    """Assinaturas MinHash de shingles de palavras"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.randint(1, _MAX_HASH, num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MAX_HASH, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Assinatura do texto, ou None se ele for curto demais para comparar"""
+        words = _normalize(text)
+        k = self.shingle_size
+        if len(words) < k:
+            return None
+
+        shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        return ((np.outer(hashes, self.a) + self.b) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+class DedupIndex:
+    """Índice LSH persistente das assinaturas dos chunks canônicos
+
+    Um chunk cuja similaridade de Jaccard estimada com um chunk canônico de
+    outro arquivo passa de threshold não é indexado: fica registrado como
+    duplicata, e o canônico recebe os demais arquivos em "outras_fontes".
+    Quando um canônico sai do índice, os arquivos das suas duplicatas
+    aparecem em orphaned_paths() para serem reprocessados.
+
+    As alterações ficam pendentes até commit(), chamado depois que o lote
+    foi gravado no Chroma.
+    """
+
+    def __init__(self, path: Optional[Path] = None, threshold: Optional[float] = None,
+                 num_perm: int = 128, bands: int = 16, min_chars: Optional[int] = None):
+        if num_perm % bands:
+            raise ValueError("num_perm deve ser múltiplo de bands")
+        self.path = path or Config.CHROMA_DIR / "dedup.sqlite3"
+        self.threshold = threshold if threshold is not None else Config.DEDUP_THRESHOLD
+        self.min_chars = min_chars if min_chars is not None else Config.DEDUP_MIN_CHARS
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Usado pela thread de gravação da ingestão, um acesso por vez
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS canonical ("
+            "chunk_id TEXT PRIMARY KEY, path TEXT NOT NULL, signature BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS bands ("
+            "band INTEGER NOT NULL, hash INTEGER NOT NULL, chunk_id TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, hash);"
+            "CREATE INDEX IF NOT EXISTS bands_chunk ON bands (chunk_id);"
+            "CREATE TABLE IF NOT EXISTS duplicates ("
+            "chunk_id TEXT PRIMARY KEY, path TEXT NOT NULL, canonical_id TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS duplicates_canonical ON duplicates (canonical_id);"
+        )
+        self._conn.commit()
+
+    def _band_hashes(self, signature: np.ndarray) -> List[int]:
+        return [
+            int.from_bytes(
+                hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).digest(),
+                "big", signed=True
+            )
+            for band in range(self.bands)
+        ]
+
+    def _find_canonical(self, signature: np.ndarray, band_hashes: List[int], path: str) -> Optional[str]:
+        candidates = set()
+        for band, band_hash in enumerate(band_hashes):
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM bands WHERE band = ? AND hash = ?", (band, band_hash)
+            ).fetchall()
+            candidates.update(row[0] for row in rows)
+
+        best_id, best_score = None, self.threshold
+        for candidate in sorted(candidates):
+            row = self._conn.execute(
+                "SELECT path, signature FROM canonical WHERE chunk_id = ?", (candidate,)
+            ).fetchone()
+            if row is None or row[0] == path:
+                continue
+            score = float(np.mean(np.frombuffer(row[1], dtype=np.uint32) == signature))
+            if score >= best_score:
+                best_id, best_score = candidate, score
+        return best_id
+
+    def _forget(self, chunk_ids: List[str]):
+        for start in range(0, len(chunk_ids), _SQL_BATCH):
+            batch = chunk_ids[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            for table in ("canonical", "bands", "duplicates"):
+                self._conn.execute(f"DELETE FROM {table} WHERE chunk_id IN ({placeholders})", batch)
+
+    def filter(self, chunks: List[Document]) -> Tuple[List[Document], List[Tuple[Document, str]]]:
+        """Separa os chunks canônicos das duplicatas (chunk, id do canônico)"""
+        self._forget([chunk.id for chunk in chunks])
+        canonical: List[Document] = []
+        duplicates: List[Tuple[Document, str]] = []
+
+        for chunk in chunks:
+            path = chunk.metadata.get("caminho_relativo", "")
+            signature = self.hasher.signature(chunk.page_content) if len(chunk.page_content) >= self.min_chars else None
+            if signature is None:
+                canonical.append(chunk)
+                continue
+
+            band_hashes = self._band_hashes(signature)
+            canonical_id = self._find_canonical(signature, band_hashes, path)
+            if canonical_id:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO duplicates (chunk_id, path, canonical_id) VALUES (?, ?, ?)",
+                    (chunk.id, path, canonical_id)
+                )
+                duplicates.append((chunk, canonical_id))
+                continue
+
+            # Chunks seguintes (inclusive do mesmo lote) já enxergam este canônico
+            self._conn.execute(
+                "INSERT OR REPLACE INTO canonical (chunk_id, path, signature) VALUES (?, ?, ?)",
+                (chunk.id, path, signature.tobytes())
+            )
+            self._conn.executemany(
+                "INSERT INTO bands (band, hash, chunk_id) VALUES (?, ?, ?)",
+                [(band, band_hash, chunk.id) for band, band_hash in enumerate(band_hashes)]
+            )
+            canonical.append(chunk)
+
+        return canonical, duplicates
+
+    def release(self, chunk_ids: Iterable[str]) -> Set[str]:
+        """Esquece chunks que saíram do índice
+
+        Retorna os canônicos que perderam duplicatas e precisam ter
+        "outras_fontes" recalculado. Duplicatas cujo canônico saiu continuam
+        registradas e aparecem em orphaned_paths().
+        """
+        chunk_ids = list(chunk_ids)
+        affected: Set[str] = set()
+        for start in range(0, len(chunk_ids), _SQL_BATCH):
+            batch = chunk_ids[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            affected.update(row[0] for row in self._conn.execute(
+                f"SELECT canonical_id FROM duplicates WHERE chunk_id IN ({placeholders})", batch
+            ))
+        self._forget(chunk_ids)
+        return affected - set(chunk_ids)
+
+    def orphaned_paths(self) -> List[str]:
+        """Arquivos com duplicatas cujo canônico não está mais no índice
+
+        Esses arquivos precisam ser reprocessados para que o trecho volte a
+        ter uma cópia indexada.
+        """
+        rows = self._conn.execute(
+            "SELECT DISTINCT path FROM duplicates "
+            "WHERE canonical_id NOT IN (SELECT chunk_id FROM canonical) ORDER BY path"
+        )
+        return [row[0] for row in rows]
+
+    def sources(self, canonical_ids: Iterable[str]) -> Dict[str, List[str]]:
+        """Arquivos das duplicatas de cada canônico"""
+        canonical_ids = list(canonical_ids)
+        found: Dict[str, Set[str]] = {chunk_id: set() for chunk_id in canonical_ids}
+        for start in range(0, len(canonical_ids), _SQL_BATCH):
+            batch = canonical_ids[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            for canonical_id, path in self._conn.execute(
+                f"SELECT canonical_id, path FROM duplicates WHERE canonical_id IN ({placeholders})", batch
+            ):
+                found[canonical_id].add(path)
+        return {chunk_id: sorted(paths) for chunk_id, paths in found.items()}
+
+    def stats(self) -> Dict[str, int]:
+        """Quantidade de chunks canônicos e de duplicatas registradas"""
+        canonical = self._conn.execute("SELECT COUNT(*) FROM canonical").fetchone()[0]
+        duplicates = self._conn.execute("SELECT COUNT(*) FROM duplicates").fetchone()[0]
+        return {"canonical": canonical, "duplicates": duplicates}
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        """Fecha a conexão SQLite"""
+        self._conn.close()
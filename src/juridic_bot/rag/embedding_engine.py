@@ -0,0 +1,263 @@
+"""
+Motor de embeddings da ingestão: lotes por tokens, requisições concorrentes e retries
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+import openai
+from langchain_core.embeddings import Embeddings
+
+from ..metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Erros transitórios: vale tentar de novo o mesmo lote
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class EmbeddingError(Exception):
+    """Lotes de embeddings que falharam mesmo após todas as novas tentativas"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa conservadora de tokens para textos em português"""
+    return len(text) // 3 + 1
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str) -> Callable[[str], int]:
+    """Contador de tokens do modelo (tiktoken), com estimativa como fallback"""
+    try:
+        import tiktoken
+        encoding = tiktoken.encoding_for_model(model)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception as e:
+        logger.warning(f"Tokenizador indisponível para {model} ({e}); estimando tokens pelo tamanho do texto")
+        return estimate_tokens
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Valor do cabeçalho Retry-After (ou retry-after-ms) de uma resposta de erro"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+@dataclass
+class EmbeddingBatch:
+    """Textos enviados em uma requisição e suas posições na lista original"""
+
+    positions: List[int]
+    texts: List[str]
+    tokens: int
+
+
+class AdaptiveLimiter:
+    """Limita requisições simultâneas e recua diante de 429
+
+    Cada 429 reduz o limite pela metade e pausa novas requisições até o
+    Retry-After; a cada recover_after sucessos seguidos o limite volta a
+    subir um, até max_concurrency.
+    """
+
+    def __init__(self, max_concurrency: int, recover_after: int = 10):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.recover_after = recover_after
+        self.active = 0
+        self.paused_until = 0.0
+
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Aguarda uma vaga (e o fim de uma pausa por rate limit)"""
+        with self._cond:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.active < self.limit:
+                    self.active += 1
+                    return
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, success: bool):
+        """Libera a vaga; sucessos seguidos recuperam a concorrência"""
+        with self._cond:
+            self.active -= 1
+            if success:
+                self._successes += 1
+                if self._successes >= self.recover_after and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+    def throttle(self, pause: float):
+        """Registra um 429: reduz a concorrência e pausa todas as requisições"""
+        with self._cond:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            self._cond.notify_all()
+
+
+class EmbeddingEngine:
+    """Gera embeddings de muitos textos respeitando os limites da API
+
+    Os textos são agrupados em requisições limitadas por quantidade e por
+    tokens, enviadas em paralelo. Erros transitórios são repetidos com
+    backoff exponencial e jitter; lotes que esgotam as tentativas ficam para
+    uma nova rodada no fim, sem perder os lotes que deram certo.
+    """
+
+    def __init__(self, client: openai.OpenAI, model: str, max_batch_tokens: int, max_batch_inputs: int,
+                 concurrency: int, max_retries: int, retry_rounds: int,
+                 base_delay: float = 1.0, max_delay: float = 60.0,
+                 count_tokens: Optional[Callable[[str], int]] = None,
+                 dimensions: Optional[int] = None):
+        self.client = client
+        self.model = model
+        self.dimensions = dimensions
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_inputs = max_batch_inputs
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.retry_rounds = retry_rounds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.count_tokens = count_tokens or get_token_counter(model)
+        self.limiter = AdaptiveLimiter(self.concurrency)
+
+    def pack(self, texts: List[str]) -> List[EmbeddingBatch]:
+        """Agrupa os textos em lotes dentro dos limites de entradas e tokens"""
+        batches: List[EmbeddingBatch] = []
+        current = EmbeddingBatch([], [], 0)
+
+        for position, text in enumerate(texts):
+            tokens = self.count_tokens(text)
+            if current.texts and (
+                len(current.texts) >= self.max_batch_inputs or current.tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current = EmbeddingBatch([], [], 0)
+            current.positions.append(position)
+            current.texts.append(text)
+            current.tokens += tokens
+
+        if current.texts:
+            batches.append(current)
+        return batches
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings na mesma ordem dos textos"""
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        batches = self.pack(texts)
+        pending = batches
+
+        for round_number in range(self.retry_rounds + 1):
+            if round_number:
+                logger.warning(f"Repetindo {len(pending)} lotes de embeddings que falharam (rodada {round_number})")
+            pending = self._run_round(pending, vectors)
+            if not pending:
+                break
+        else:
+            failed = sum(len(batch.texts) for batch in pending)
+            raise EmbeddingError(f"{len(pending)} lotes ({failed} textos) falharam após {self.retry_rounds} rodadas")
+
+        elapsed = time.perf_counter() - started
+        rate = len(texts) / elapsed if elapsed > 0 else 0.0
+        metrics.incr("embedding.ingest_texts", len(texts))
+        metrics.observe("embedding.ingest_chunks_per_s", rate)
+        logger.info(
+            f"{len(texts)} embeddings em {elapsed:.2f}s ({rate:.1f} chunks/s, {len(batches)} requisições, "
+            f"concorrência atual {self.limiter.limit})"
+        )
+        return vectors
+
+    def _run_round(self, batches: List[EmbeddingBatch], vectors: List) -> List[EmbeddingBatch]:
+        """Executa os lotes em paralelo; retorna os que falharam por erro transitório"""
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embedding") as pool:
+            futures = {pool.submit(self._embed_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    result = future.result()
+                except RETRYABLE_ERRORS as e:
+                    logger.error(f"Lote de {len(batch.texts)} embeddings falhou: {e}")
+                    failed.append(batch)
+                    continue
+                for position, vector in zip(batch.positions, result):
+                    vectors[position] = vector
+        return failed
+
+    def _embed_batch(self, batch: EmbeddingBatch) -> List[List[float]]:
+        """Uma requisição com novas tentativas para erros transitórios"""
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                response = self.client.embeddings.create(
+                    model=self.model, input=batch.texts, **({"dimensions": self.dimensions} if self.dimensions else {})
+                )
+            except openai.RateLimitError as e:
+                self.limiter.release(success=False)
+                error = e
+                retry_after = retry_after_seconds(e)
+                delay = retry_after * random.uniform(1.0, 1.2) if retry_after is not None else self._backoff(attempt)
+                # A pausa vale para todas as requisições, não só para esta
+                self.limiter.throttle(delay)
+                metrics.incr("embedding.rate_limited")
+            except RETRYABLE_ERRORS as e:
+                self.limiter.release(success=False)
+                error = e
+                delay = self._backoff(attempt)
+            except Exception:
+                self.limiter.release(success=False)
+                raise
+            else:
+                self.limiter.release(success=True)
+                data = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise error
+            metrics.incr("embedding.retries")
+            logger.warning(f"Erro transitório nos embeddings ({type(error).__name__}); nova tentativa em {delay:.1f}s")
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        # Backoff exponencial com jitter completo
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class EngineEmbeddings(Embeddings):
+    """Embeddings do LangChain servidos pelo EmbeddingEngine"""
+
+    def __init__(self, engine: EmbeddingEngine):
+        self.engine = engine
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.engine.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.engine.embed([text])[0]
@@ -0,0 +1,182 @@
+"""
+Armazenamento persistente de embeddings endereçado por conteúdo
+"""
+import argparse
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from ..config import Config
+from ..metrics import metrics
+from .embeddings import embedding_model_key
+
+logger = logging.getLogger(__name__)
+
+# Limite de parâmetros por consulta SQLite
+_SQL_BATCH = 500
+
+
+def content_hash(text: str) -> str:
+    """sha256 do texto do chunk"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Vetores já calculados, indexados por (modelo, sha256 do texto)
+
+    Um chunk com o mesmo texto nunca é enviado duas vezes à API de
+    embeddings, mesmo que venha de outro arquivo ou de outra reindexação.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or Config.EMBEDDING_STORE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Vetores encontrados para os hashes informados"""
+        hashes = list(dict.fromkeys(hashes))
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+
+        with self._lock:
+            for start in range(0, len(hashes), _SQL_BATCH):
+                batch = hashes[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for content_id, vector in rows:
+                    found[content_id] = array("f", vector).tolist()
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                    [(now, model, content_id) for content_id in found]
+                )
+                self._conn.commit()
+
+        metrics.incr("embedding_store.hits", len(found))
+        metrics.incr("embedding_store.misses", len(hashes) - len(found))
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        """Armazena vetores calculados"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(model, content_id, array("f", vector).tobytes(), now, now) for content_id, vector in vectors.items()]
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, object]:
+        """Quantidade de vetores por modelo e tamanho do arquivo"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT model, COUNT(*), MIN(last_used) FROM embeddings GROUP BY model"
+            ).fetchall()
+        return {
+            "path": str(self.path),
+            "size_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "entries": sum(count for _, count, _ in rows),
+            "models": {model: {"entries": count, "oldest_use": oldest} for model, count, oldest in rows},
+        }
+
+    def prune(self, older_than_days: Optional[float] = None, keep_model: Optional[str] = None) -> int:
+        """Remove vetores sem uso há N dias e/ou de outros modelos; retorna quantos"""
+        conditions, params = [], []
+        if older_than_days is not None:
+            conditions.append("last_used < ?")
+            params.append(time.time() - older_than_days * 86400)
+        if keep_model is not None:
+            conditions.append("model != ?")
+            params.append(keep_model)
+        if not conditions:
+            return 0
+
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM embeddings WHERE {' OR '.join(conditions)}", params)
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        logger.info(f"{cursor.rowcount} embeddings removidos do armazenamento")
+        return cursor.rowcount
+
+    def close(self):
+        """Fecha a conexão SQLite"""
+        self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings do LangChain que consultam o EmbeddingStore antes da API"""
+
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore, model: str):
+        self.embeddings = embeddings
+        self.store = store
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [content_hash(text) for text in texts]
+        found = self.store.get_many(self.model, hashes)
+
+        missing = {h: text for h, text in zip(hashes, texts) if h not in found}
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), vectors))
+            self.store.put_many(self.model, new_vectors)
+            found.update(new_vectors)
+
+        logger.info(f"Embeddings: {len(texts) - len(missing)} reaproveitados, {len(missing)} calculados")
+        return [found[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+def main() -> None:
+    """CLI para inspecionar e limpar o armazenamento de embeddings."""
+    parser = argparse.ArgumentParser(description="Armazenamento de embeddings da ingestão")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Mostra estatísticas do armazenamento")
+    prune = subparsers.add_parser("prune", help="Remove embeddings antigos ou de outros modelos")
+    prune.add_argument("--older-than", type=float, metavar="DIAS", help="Sem uso há mais de DIAS dias")
+    prune.add_argument("--other-models", action="store_true", help=f"Modelos diferentes de {embedding_model_key()}")
+    args = parser.parse_args()
+
+    store = EmbeddingStore()
+    try:
+        if args.command == "stats":
+            stats = store.stats()
+            print(f"Arquivo: {stats['path']} ({stats['size_bytes'] / 1024 / 1024:.1f} MB)")
+            print(f"Embeddings: {stats['entries']}")
+            for model, info in stats["models"].items():
+                print(f"  {model}: {info['entries']}")
+        else:
+            keep_model = embedding_model_key() if args.other_models else None
+            removed = store.prune(older_than_days=args.older_than, keep_model=keep_model)
+            print(f"{removed} embeddings removidos")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,113 @@
 """
 Serviço de embeddings usando OpenAI
 """
-from openai import OpenAI
+from typing import List, Optional
+from openai import OpenAI, AsyncOpenAI
 from langchain_openai import OpenAIEmbeddings
 from ..config import Config
+from .batcher import EmbeddingMicroBatcher
+from .embedding_engine import EmbeddingEngine, EngineEmbeddings
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def embedding_model_key(model: Optional[str] = None, dimensions: Optional[int] = None) -> str:
+    """Identifica o espaço dos embeddings (modelo e dimensão) nos caches e no fingerprint da ingestão
+
+    Sem EMBEDDING_DIMENSIONS é só o nome do modelo, como antes da opção.
+    """
+    model = model or Config.EMBEDDING_MODEL
+    dimensions = Config.EMBEDDING_DIMENSIONS if dimensions is None else dimensions
+    return f"{model}@{dimensions}" if dimensions else model
+
+
 class EmbeddingService:
     """Serviço de embeddings usando OpenAI"""
 
     def __init__(self):
         self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.async_client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
         self.model = Config.EMBEDDING_MODEL
+        # Embeddings encurtados pela API (text-embedding-3); None = dimensão padrão do modelo
+        self.dimensions = Config.EMBEDDING_DIMENSIONS or None
+        self.model_key = embedding_model_key(self.model, Config.EMBEDDING_DIMENSIONS)
+        self._options = {"dimensions": self.dimensions} if self.dimensions else {}
 
         # Para LangChain
         self.langchain_embeddings = OpenAIEmbeddings(
             openai_api_key=Config.OPENAI_API_KEY,
-            model=self.model
+            model=self.model,
+            dimensions=self.dimensions
         )
 
-        logger.info(f"Serviço de embeddings inicializado com modelo: {self.model}")
+        # Agrupa embeddings de perguntas simultâneas em uma única chamada
+        self.batcher = None
+        if Config.EMBEDDING_BATCH_WINDOW_MS > 0:
+            self.batcher = EmbeddingMicroBatcher(
+                self.aget_embeddings,
+                window_ms=Config.EMBEDDING_BATCH_WINDOW_MS,
+                max_batch_size=Config.EMBEDDING_BATCH_MAX_SIZE
+            )
+
+        # Motor da ingestão, criado sob demanda (o bot não precisa dele)
+        self.engine = None
+
+        logger.info(f"Serviço de embeddings inicializado com modelo: {self.model_key}")
 
     def get_embeddings(self, texts):
         """Gera embeddings para uma lista de textos"""
         try:
             response = self.client.embeddings.create(
                 model=self.model,
-                input=texts
+                input=texts,
+                **self._options
+            )
+            return [item.embedding for item in response.data]
+        except Exception as e:
+            logger.error(f"Erro ao gerar embeddings: {e}")
+            raise
+
+    async def aget_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Gera embeddings para uma lista de textos sem bloquear o event loop"""
+        try:
+            response = await self.async_client.embeddings.create(
+                model=self.model,
+                input=texts,
+                **self._options
             )
             return [item.embedding for item in response.data]
         except Exception as e:
             logger.error(f"Erro ao gerar embeddings: {e}")
             raise
 
+    async def aembed_query(self, text: str) -> List[float]:
+        """Gera o embedding de uma consulta de forma assíncrona"""
+        if self.batcher:
+            return await self.batcher.embed(text)
+        embeddings = await self.aget_embeddings([text])
+        return embeddings[0]
+
     def get_langchain_embeddings(self):
         """Retorna objeto de embeddings para uso com LangChain"""
-        return self.langchain_embeddings
\ No newline at end of file
+        return self.langchain_embeddings
+
+    def get_ingest_embeddings(self) -> EngineEmbeddings:
+        """Embeddings para a ingestão: lotes por tokens, requisições concorrentes e retries"""
+        if self.engine is None:
+            self.engine = EmbeddingEngine(
+                # Os retries ficam por conta do motor, que conhece o Retry-After
+                self.client.with_options(max_retries=0),
+                self.model,
+                dimensions=self.dimensions,
+                max_batch_tokens=Config.EMBEDDING_REQUEST_MAX_TOKENS,
+                max_batch_inputs=Config.EMBEDDING_REQUEST_MAX_INPUTS,
+                concurrency=Config.EMBEDDING_CONCURRENCY,
+                max_retries=Config.EMBEDDING_MAX_RETRIES,
+                retry_rounds=Config.EMBEDDING_RETRY_ROUNDS
+            )
+        return EngineEmbeddings(self.engine)
+
+    async def aclose(self):
+        """Fecha o cliente HTTP assíncrono"""
+        await self.async_client.close()
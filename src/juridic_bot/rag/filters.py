@@ -0,0 +1,70 @@
+"""
+Filtros de metadados (área do direito, tipo de documento) no formato where do Chroma
+"""
+from typing import Any, Dict, Optional
+
+from .areas import AREA_GERAL
+
+_FILTER_OPERATORS = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+}
+
+
+def metadata_filter(
+    area_direito: Optional[str] = None,
+    tipo_documento: Optional[str] = None,
+    include_general: bool = False
+) -> Optional[Dict[str, Any]]:
+    """Filtro where do Chroma por área e tipo de documento
+
+    Com include_general, chunks sem área definida ("Direito Geral") também
+    passam no filtro de área; útil quando a área vem de classificação
+    automática e pode estar errada.
+    """
+    conditions = []
+    if area_direito:
+        if include_general and area_direito != AREA_GERAL:
+            conditions.append({"area_direito": {"$in": [area_direito, AREA_GERAL]}})
+        else:
+            conditions.append({"area_direito": area_direito})
+    if tipo_documento:
+        conditions.append({"tipo_documento": tipo_documento})
+
+    if not conditions:
+        return None
+    # O Chroma exige $and para mais de uma condição
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def matches_filter(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    """Avalia um filtro where do Chroma ($eq, $ne, $in, $nin, $and, $or) nos metadados"""
+    for key, condition in where.items():
+        if key == "$and":
+            matched = all(matches_filter(metadata, item) for item in condition)
+        elif key == "$or":
+            matched = any(matches_filter(metadata, item) for item in condition)
+        elif isinstance(condition, dict):
+            matched = all(
+                _FILTER_OPERATORS[operator](metadata.get(key), target) for operator, target in condition.items()
+            )
+        else:
+            matched = metadata.get(key) == condition
+        if not matched:
+            return False
+    return True
+
+
+def filter_supported(where: Dict[str, Any]) -> bool:
+    """Se matches_filter sabe avaliar todos os operadores do filtro"""
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            if not all(filter_supported(item) for item in condition):
+                return False
+        elif key.startswith("$"):
+            return False
+        elif isinstance(condition, dict) and not set(condition) <= set(_FILTER_OPERATORS):
+            return False
+    return True
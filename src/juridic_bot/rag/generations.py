@@ -0,0 +1,238 @@
+"""
+Gerações do índice: cada reindexação grava numa cópia, publicada por troca atômica
+
+Layout em CHROMA_DIR:
+
+    CURRENT              ID da geração ativa
+    generations/<id>/    Chroma e índices auxiliares (manifesto, dedup, lexical, artigos)
+
+Sem CURRENT vale o layout antigo, com o índice direto em CHROMA_DIR; ele é
+tratado como a geração inicial e copiado pelo primeiro build.
+"""
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from chromadb.api.shared_system_client import SharedSystemClient
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+GENERATIONS_DIR = "generations"
+CURRENT_FILE = "CURRENT"
+# Marca uma geração substituída, com o horário da troca
+RETIRED_FILE = "RETIRED"
+
+
+class IndexValidationError(Exception):
+    """A geração construída não passou nas verificações e não foi publicada"""
+
+
+def current_generation() -> Optional[str]:
+    """ID da geração ativa (None no layout antigo)"""
+    try:
+        return (Config.CHROMA_DIR / CURRENT_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def generation_dir(generation: Optional[str]) -> Path:
+    """Diretório de uma geração; None é o layout antigo (CHROMA_DIR)"""
+    return Config.CHROMA_DIR / GENERATIONS_DIR / generation if generation else Config.CHROMA_DIR
+
+
+def current_dir() -> Path:
+    """Diretório do índice ativo"""
+    return generation_dir(current_generation())
+
+
+def _copy_file(source: str, destination: str) -> str:
+    """copy2 para o copytree; bancos SQLite vão pela API de backup
+
+    O backup lê um instante consistente do banco (incluindo o que ainda
+    está no WAL), mesmo com outra conexão gravando: a cópia nunca pega
+    uma página no meio de uma escrita.
+    """
+    if not source.endswith(".sqlite3"):
+        return shutil.copy2(source, destination)
+    with closing(sqlite3.connect(source)) as reader, closing(sqlite3.connect(destination)) as writer:
+        reader.backup(writer)
+    shutil.copystat(source, destination)
+    return destination
+
+
+def create_generation() -> Tuple[str, Path]:
+    """Nova geração, ainda não publicada, com uma cópia do índice ativo
+
+    A ingestão incremental continua a partir da cópia; o índice ativo é só
+    lido, então as buscas seguem nele, sem disputa, durante todo o build.
+    Antes da cópia, o cliente do Chroma deste processo no índice ativo é
+    encerrado (grava o que estiver pendente do grafo HNSW); os bancos SQLite
+    são copiados por _copy_file e os arquivos -wal/-shm/-journal ficam de fora.
+    """
+    generation = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = generation_dir(generation)
+    source = current_dir()
+    if source.exists():
+        release_chroma_dir(source)
+        shutil.copytree(
+            source, path,
+            ignore=shutil.ignore_patterns(
+                GENERATIONS_DIR, CURRENT_FILE, f"{CURRENT_FILE}.tmp", RETIRED_FILE,
+                "*.sqlite3-wal", "*.sqlite3-shm", "*.sqlite3-journal"
+            ),
+            copy_function=_copy_file
+        )
+    else:
+        path.mkdir(parents=True)
+    logger.info(f"Geração {generation} criada a partir de {source}")
+    return generation, path
+
+
+def publish(generation: str):
+    """Torna a geração ativa e marca a anterior como substituída
+
+    O CURRENT é gravado num arquivo temporário e trocado com os.replace:
+    quem o lê vê a geração antiga ou a nova, nunca um estado intermediário.
+    """
+    previous = current_dir()
+    pointer = Config.CHROMA_DIR / CURRENT_FILE
+    temporary = pointer.with_name(f"{CURRENT_FILE}.tmp")
+    with open(temporary, "w") as f:
+        f.write(generation)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, pointer)
+
+    if previous != generation_dir(generation) and previous.exists():
+        (previous / RETIRED_FILE).write_text(str(time.time()))
+    logger.info(f"Geração {generation} publicada")
+
+
+def discard(path: Path):
+    """Apaga uma geração não publicada"""
+    shutil.rmtree(path, ignore_errors=True)
+    logger.info(f"Geração descartada: {path.name}")
+
+
+def _retired_at(path: Path) -> float:
+    try:
+        return float((path / RETIRED_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        # Build interrompido, nunca publicado
+        return path.stat().st_mtime
+
+
+def collect_garbage(grace: Optional[float] = None) -> List[Path]:
+    """Apaga as gerações substituídas há mais de grace segundos (INDEX_GC_GRACE_SECONDS)
+
+    O bot passa para a geração nova em até INDEX_RELOAD_CHECK_INTERVAL, e
+    a geração antiga só é fechada quando a última busca nela termina; a
+    espera garante que ninguém mais lê os arquivos apagados. O layout antigo,
+    depois de substituído, tem seus arquivos apagados da mesma forma.
+    """
+    grace = Config.INDEX_GC_GRACE_SECONDS if grace is None else grace
+    deadline = time.time() - grace
+    active = current_dir()
+    root = Config.CHROMA_DIR / GENERATIONS_DIR
+    removed = []
+
+    for path in sorted(root.iterdir()) if root.exists() else []:
+        if path.is_dir() and path != active and _retired_at(path) <= deadline:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+
+    if active != Config.CHROMA_DIR and (Config.CHROMA_DIR / RETIRED_FILE).exists():
+        if _retired_at(Config.CHROMA_DIR) <= deadline:
+            for child in Config.CHROMA_DIR.iterdir():
+                if child.name in (GENERATIONS_DIR, CURRENT_FILE):
+                    continue
+                if child.is_dir():
+                    shutil.rmtree(child, ignore_errors=True)
+                else:
+                    child.unlink(missing_ok=True)
+            removed.append(Config.CHROMA_DIR)
+
+    if removed:
+        logger.info(f"{len(removed)} gerações antigas do índice apagadas")
+    return removed
+
+
+def release_chroma(vectorstore):
+    """Encerra o cliente do Chroma em cache para o diretório do vectorstore, liberando os arquivos"""
+    identifier = getattr(getattr(vectorstore, "_client", None), "_identifier", None)
+    if isinstance(identifier, str):
+        release_chroma_dir(identifier)
+
+
+def release_chroma_dir(path):
+    """Encerra o cliente do Chroma em cache para path neste processo, se houver"""
+    system = SharedSystemClient._identifier_to_system.pop(str(path), None)
+    if system is not None:
+        system.stop()
+
+
+class IndexGeneration:
+    """Vectorstore e índices auxiliares abertos de uma geração
+
+    Cada busca segura a geração enquanto roda (acquire/release). Depois de
+    substituída (retire), ela é fechada quando a última busca termina: as
+    buscas em andamento na troca terminam na geração em que começaram.
+    """
+
+    def __init__(self, path: Path, vectorstore=None, lexical=None, statutes=None):
+        self.path = path
+        self.vectorstore = vectorstore
+        self.lexical = lexical
+        self.statutes = statutes
+        self._lock = threading.Lock()
+        self._active = 0
+        self._retired = False
+        self._closed = False
+        self._release_store = True
+
+    def acquire(self) -> bool:
+        """Registra uma busca; False se a geração já foi fechada"""
+        with self._lock:
+            if self._closed:
+                return False
+            self._active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            close = self._retired and not self._active and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self._close()
+
+    def retire(self, release_store: bool = True):
+        """Marca a geração como substituída; fecha já se não há buscas nela
+
+        release_store=False mantém o cliente do Chroma, compartilhado quando a
+        nova geração está no mesmo diretório (recarga sem gerações).
+        """
+        with self._lock:
+            self._retired = True
+            self._release_store = release_store
+            close = not self._active and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self._close()
+
+    def _close(self):
+        for index in (self.lexical, self.statutes):
+            if index is not None:
+                index.close()
+        if self._release_store and self.vectorstore is not None:
+            release_chroma(self.vectorstore)
+        logger.debug(f"Geração do índice fechada: {self.path}")
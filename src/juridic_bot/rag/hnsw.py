@@ -0,0 +1,97 @@
+"""
+Parâmetros do índice HNSW da coleção do Chroma
+
+M e construction_ef definem o grafo e só valem na criação da coleção;
+search_ef pode ser trocado depois, mas o Chroma só o lê ao carregar o
+índice (um processo que já buscou na coleção continua com o valor antigo).
+"""
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Parâmetro de Config -> chave em configuration["hnsw"] da coleção
+_SETTINGS = {
+    "HNSW_M": "max_neighbors",
+    "HNSW_CONSTRUCTION_EF": "ef_construction",
+    "HNSW_SEARCH_EF": "ef_search",
+}
+# Fixos depois da criação: mudá-los exige reconstruir a coleção
+_BUILD_SETTINGS = ("HNSW_M", "HNSW_CONSTRUCTION_EF")
+
+
+def collection_metadata() -> Dict[str, Any]:
+    """Metadados de criação da coleção: distância de cosseno e os parâmetros HNSW de Config"""
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": Config.HNSW_M,
+        "hnsw:construction_ef": Config.HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": Config.HNSW_SEARCH_EF,
+    }
+
+
+def hnsw_settings(collection) -> Dict[str, Optional[int]]:
+    """Parâmetros HNSW gravados na coleção, pelos nomes de Config"""
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    return {setting: hnsw.get(key) for setting, key in _SETTINGS.items()}
+
+
+def needs_rebuild(collection) -> bool:
+    """Se M ou construction_ef da coleção diferem dos de Config"""
+    settings = hnsw_settings(collection)
+    return any(settings[setting] != getattr(Config, setting) for setting in _BUILD_SETTINGS)
+
+
+def apply_search_ef(collection) -> bool:
+    """Grava o HNSW_SEARCH_EF de Config na coleção, se diferente; True se mudou"""
+    current = hnsw_settings(collection)["HNSW_SEARCH_EF"]
+    if current == Config.HNSW_SEARCH_EF:
+        return False
+    collection.modify(configuration={"hnsw": {"ef_search": Config.HNSW_SEARCH_EF}})
+    logger.info(f"search_ef da coleção {collection.name}: {current} -> {Config.HNSW_SEARCH_EF}")
+    return True
+
+
+def rebuild_collection(client, collection, page_size: Optional[int] = None):
+    """Copia a coleção para uma nova com os parâmetros HNSW de Config e a põe no lugar
+
+    Os embeddings, textos e metadados são copiados como estão, sem
+    recalcular nada. A cópia é criada com outro nome e renomeada depois de
+    completa; o diretório deve ser uma geração ainda não publicada (as buscas
+    no índice ativo veriam a coleção sumir entre a remoção e a renomeação).
+    Retorna a nova coleção.
+    """
+    page_size = page_size or Config.INGEST_SCAN_PAGE_SIZE
+    name = collection.name
+    count = collection.count()
+    target = client.create_collection(f"{name}-rebuild", metadata=collection_metadata())
+    batch_size = min(page_size, client.get_max_batch_size())
+    copied = 0
+    while copied < count:
+        page = collection.get(
+            include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=copied
+        )
+        if not len(page["ids"]):
+            break
+        target.add(
+            ids=page["ids"],
+            embeddings=np.asarray(page["embeddings"], dtype=np.float32),
+            documents=page["documents"],
+            metadatas=page["metadatas"]
+        )
+        copied += len(page["ids"])
+    if copied != count:
+        client.delete_collection(target.name)
+        raise RuntimeError(f"Coleção mudou durante a reconstrução ({copied} de {count} chunks)")
+
+    client.delete_collection(name)
+    target.modify(name=name)
+    logger.info(
+        f"Coleção {name} reconstruída com M={Config.HNSW_M}, construction_ef={Config.HNSW_CONSTRUCTION_EF} "
+        f"({count} chunks)"
+    )
+    return target
@@ -1,12 +1,22 @@
 """
 Processamento e indexação de documentos para o RAG
 """
+import argparse
 import os
 import hashlib
+import json
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from datetime import datetime
 import logging
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import (
@@ -19,25 +29,143 @@ from langchain_chroma import Chroma
 from langchain.schema import Document
 
 from ..config import Config
-from .embeddings import EmbeddingService
+from .areas import AREA_GERAL, AREAS_DIREITO
+from .dedup import DedupIndex
+from .embedding_engine import get_token_counter
+from .embedding_store import CachedEmbeddings, EmbeddingStore
+from .embeddings import EmbeddingService, embedding_model_key
+from .generations import IndexValidationError, collect_garbage, create_generation, current_dir, discard, publish
+from .hnsw import apply_search_ef, collection_metadata, hnsw_settings, needs_rebuild, rebuild_collection
+from .legal_splitter import LegalTextSplitter
+from .lexical import LexicalIndex
+from .manifest import FileManifest, ManifestEntry, chunk_id, file_content_hash, file_key
+from .statutes import StatuteIndex
+from .text_cache import ExtractedTextCache
+from .vector_index import NumpyVectorStore, export_vectors
 
 logger = logging.getLogger(__name__)
 
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.md', '.docx', '.doc')
 
-class DocumentProcessor:
-    """Processa e indexa documentos para o RAG"""
+# Segundos mínimos entre linhas de progresso da CLI (--progress-json)
+PROGRESS_INTERVAL = 1.0
 
-    def __init__(self):
-        self.embedding_service = EmbeddingService()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP,
-            separators=["\n\n", "\n", "Art.", "§", ".", " "],
-            length_function=len,
-        )
+# Índices auxiliares mantidos junto com o Chroma: (classe, configuração que o liga)
+SideIndex = Union[LexicalIndex, StatuteIndex]
+SIDE_INDEXES = (
+    (LexicalIndex, "LEXICAL_SEARCH_ENABLED"),
+    (StatuteIndex, "STATUTE_INDEX_ENABLED"),
+)
 
-        # Criar diretórios se não existirem
-        Config.create_directories()
+
+def ingest_fingerprint() -> str:
+    """Identifica a configuração que afeta os chunks gerados"""
+    settings = f"{Config.CHUNK_SIZE}:{Config.CHUNK_OVERLAP}:{Config.TEXT_SPLITTER}:{embedding_model_key()}"
+    if Config.DEDUP_ENABLED:
+        settings += f":dedup={Config.DEDUP_THRESHOLD}:{Config.DEDUP_MIN_CHARS}"
+    return hashlib.sha1(settings.encode()).hexdigest()[:12]
+
+
+class FileTimeoutError(BaseException):
+    """Arquivo excedeu INGEST_FILE_TIMEOUT
+
+    Deriva de BaseException para não ser capturada pelos fallbacks de
+    load_document, que tentariam outro loader no mesmo arquivo.
+    """
+
+
+@contextmanager
+def file_deadline(seconds: float):
+    """Interrompe o processamento de um arquivo após N segundos
+
+    Usa SIGALRM, disponível apenas em Unix e na thread principal; fora disso
+    não há limite.
+    """
+    if seconds <= 0 or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise FileTimeoutError(f"tempo limite de {seconds:g}s excedido")
+
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+@dataclass
+class IngestPlan:
+    """Diferença entre o diretório de documentos e o manifesto"""
+
+    changed: List[Tuple[Path, ManifestEntry]] = field(default_factory=list)
+    previous: Dict[str, ManifestEntry] = field(default_factory=dict)  # Versão anterior dos alterados
+    removed: List[ManifestEntry] = field(default_factory=list)
+    touched: List[ManifestEntry] = field(default_factory=list)  # mtime mudou, conteúdo não
+    unchanged: int = 0
+
+
+@dataclass
+class IngestReport:
+    """Resumo de uma execução da ingestão"""
+
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    chunks_written: int = 0
+    chunks_deleted: int = 0
+    failed: int = 0
+    duplicates: int = 0  # Chunks quase duplicados que não foram gravados
+    promoted: int = 0  # Arquivos reprocessados porque o canônico das suas duplicatas saiu
+    files_planned: int = 0  # Arquivos a processar ou remover nesta execução
+    files_done: int = 0  # Arquivos já processados ou removidos (progresso)
+    cancelled: bool = False
+    total_files: int = 0
+    generation: str = ""  # Geração publicada por build_generation
+    elapsed: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks_written / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def duplicate_ratio(self) -> float:
+        """Fração dos chunks processados descartada como duplicata"""
+        total = self.chunks_written + self.duplicates
+        return self.duplicates / total if total else 0.0
+
+
+class IngestCancelled(Exception):
+    """Ingestão interrompida a pedido; o manifesto guarda os arquivos já gravados"""
+
+
+ProgressCallback = Callable[[IngestReport], None]
+
+
+class DocumentParser:
+    """Carrega, enriquece e divide documentos (sem acesso à API nem ao índice)
+
+    Não guarda clientes nem conexões, para poder ser instanciado em cada
+    processo do pool de ingestão.
+    """
+
+    def __init__(self):
+        if Config.TEXT_SPLITTER == "legal":
+            self.text_splitter = LegalTextSplitter(chunk_size=Config.CHUNK_SIZE, chunk_overlap=Config.CHUNK_OVERLAP)
+        else:
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=Config.CHUNK_SIZE,
+                chunk_overlap=Config.CHUNK_OVERLAP,
+                separators=["\n\n", "\n", "Art.", "§", ".", " "],
+                length_function=len,
+            )
+        self.text_cache = ExtractedTextCache() if Config.TEXT_CACHE_ENABLED else None
+        # Tokens de cada chunk, gravados nos metadados para o orçamento de contexto da consulta
+        self.count_tokens = get_token_counter(Config.EMBEDDING_MODEL)
 
     def load_document(self, file_path: Path) -> List[Document]:
         """Carrega documento baseado na extensão"""
@@ -80,6 +208,21 @@ class DocumentProcessor:
                     logger.error(f"Erro também na abordagem alternativa para {file_path}: {alt_e}")
             return []
 
+    def load_extracted(self, file_path: Path, content_hash: str) -> List[Document]:
+        """Carrega o documento, reaproveitando o texto já extraído do mesmo conteúdo"""
+        if self.text_cache:
+            docs = self.text_cache.get(content_hash, file_path)
+            if docs is not None:
+                logger.info(f"Texto reaproveitado do cache: {file_path.name} ({len(docs)} páginas/seções)")
+                return docs
+
+        docs = self.load_document(file_path)
+
+        # Falhas de extração não são guardadas, para serem tentadas de novo
+        if docs and self.text_cache:
+            self.text_cache.put(content_hash, file_path, docs)
+        return docs
+
     def enrich_metadata(self, doc: Document, file_path: Path) -> Document:
         """Adiciona metadados aos documentos"""
         # Identificar área do direito baseada no caminho do arquivo
@@ -101,19 +244,12 @@ class DocumentProcessor:
         path_parts = file_path.parts
 
         # Procurar por pastas de área do direito
-        areas_conhecidas = [
-            "direito_administrativo", "direito_constitucional", "direito_penal",
-            "direito_civil", "direito_processual", "direito_tributario",
-            "direito_trabalhista", "direito_previdenciario", "direito_eleitoral",
-            "direito_internacional", "direito_ambiental", "direito_consumidor"
-        ]
-
         for part in path_parts:
-            for area in areas_conhecidas:
-                if area in part.lower():
-                    return area.replace("direito_", "").replace("_", " ").title()
+            for pasta, area in AREAS_DIREITO.items():
+                if pasta in part.lower():
+                    return area
 
-        return "Direito Geral"
+        return AREA_GERAL
 
     def identificar_tipo_documento(self, content: str) -> str:
         """Identifica o tipo de documento jurídico"""
@@ -138,116 +274,930 @@ class DocumentProcessor:
         else:
             return "documento_geral"
 
+    def process_file(self, file_path: Path, entry: ManifestEntry) -> List[Document]:
+        """Carrega, enriquece e divide um arquivo em chunks com IDs estáveis"""
+        docs = self.load_extracted(file_path, entry.content_hash)
+
+        # Enriquecer metadados
+        docs = [self.enrich_metadata(doc, file_path) for doc in docs]
+
+        # Metadados do arquivo (permitem reconstruir o manifesto a partir do índice)
+        for doc in docs:
+            doc.metadata.update({
+                "file_hash": entry.content_hash,
+                "file_key": entry.file_key,
+                "caminho_relativo": entry.path,
+                "file_size": entry.size,
+                "file_mtime_ns": entry.mtime_ns,
+            })
+
+        # Dividir em chunks
+        chunks = self.text_splitter.split_documents(docs)
+
+        # Adicionar índice e ID determinístico do chunk
+        for i, chunk in enumerate(chunks):
+            chunk.metadata["chunk_index"] = i
+            chunk.metadata["total_chunks"] = len(chunks)
+            chunk.metadata["num_tokens"] = self.count_tokens(chunk.page_content)
+            chunk.id = chunk_id(entry.file_key, i)
+
+        return chunks
+
+
+ParseResult = Tuple[Optional[List[Document]], Optional[str]]
+
+# Parser de cada processo do pool, criado pelo initializer
+_worker_parser: Optional[DocumentParser] = None
+# Processos do pool nascem limpos (sem fork): o processo que ingere pode ter
+# threads (gravação, embeddings) e um event loop, que o fork copiaria pela metade
+_POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def parse_file(parser: DocumentParser, file_path: Path, entry: ManifestEntry) -> ParseResult:
+    """Processa um arquivo com tempo limite; retorna (chunks, erro)"""
+    try:
+        with file_deadline(Config.INGEST_FILE_TIMEOUT):
+            return parser.process_file(file_path, entry), None
+    except (Exception, FileTimeoutError) as e:
+        return None, str(e) or type(e).__name__
+
+
+def _config_settings() -> Dict[str, object]:
+    """Parâmetros de Config deste processo, para os processos do pool (que só leriam o ambiente)"""
+    return {name: value for name, value in vars(Config).items() if name.isupper()}
+
+
+def _init_worker(settings: Dict[str, object]):
+    global _worker_parser
+    for name, value in settings.items():
+        setattr(Config, name, value)
+    _worker_parser = DocumentParser()
+
+
+def _parse_in_worker(task: Tuple[Path, ManifestEntry]) -> ParseResult:
+    return parse_file(_worker_parser, *task)
+
+
+@dataclass
+class FileDone:
+    """Sentinela na fila de gravação: todos os lotes de um arquivo foram enfileirados"""
+
+    entry: ManifestEntry
+    chunk_ids: List[str]
+    previous: Optional[ManifestEntry]
+    promoted: bool = False
+
+
+class IndexWriter:
+    """Grava lotes de chunks no Chroma em uma thread própria
+
+    O parsing enfileira lotes de INGEST_BATCH_SIZE chunks em uma fila de no
+    máximo INGEST_QUEUE_BATCHES lotes. Enquanto um lote é enviado à API de
+    embeddings, o próximo arquivo já está sendo processado; quando a gravação
+    fica para trás, a fila cheia segura o parsing. A memória fica limitada
+    pela configuração, e não pelo tamanho do acervo.
+
+    Com um DedupIndex, os chunks quase duplicados de um chunk já indexado
+    (de outro arquivo) não são gravados; o canônico recebe o arquivo em
+    "outras_fontes". Cada upsert/remoção no Chroma é repetido nos índices
+    auxiliares (busca lexical, artigos de lei).
+    """
+
+    def __init__(self, processor: "DocumentProcessor", vectorstore: Chroma, manifest: FileManifest,
+                 report: IngestReport, dedup: Optional[DedupIndex] = None,
+                 side_indexes: Sequence[SideIndex] = (), progress: Optional[ProgressCallback] = None):
+        self.processor = processor
+        self.vectorstore = vectorstore
+        self.manifest = manifest
+        self.report = report
+        self.dedup = dedup
+        self.side_indexes = side_indexes
+        self.progress = progress
+        self.error: Optional[BaseException] = None
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, Config.INGEST_QUEUE_BATCHES))
+        self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+        self._thread.start()
+
+    def put_file(self, entry: ManifestEntry, chunks: List[Document], previous: Optional[ManifestEntry],
+                 promoted: bool = False):
+        """Enfileira os lotes de um arquivo seguidos do seu FileDone"""
+        batch_size = Config.INGEST_BATCH_SIZE
+        for start in range(0, len(chunks), batch_size):
+            self._put(chunks[start:start + batch_size])
+        self._put(FileDone(entry, [chunk.id for chunk in chunks], previous, promoted))
+
+    def close(self):
+        """Aguarda a gravação dos lotes pendentes e propaga erro da thread"""
+        if self._thread.is_alive():
+            self._put(None)
+            self._thread.join()
+        if self.error:
+            raise self.error
+
+    def _put(self, item):
+        # Não bloquear para sempre se a thread de gravação morreu
+        while True:
+            if self.error:
+                raise self.error
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                if isinstance(item, FileDone):
+                    self._finish_file(item)
+                elif self.dedup:
+                    self._write_deduplicated(item)
+                else:
+                    self._upsert(item)
+                    self.report.chunks_written += len(item)
+                if self.progress:
+                    self.progress(self.report)
+        except BaseException as e:
+            logger.error(f"Erro ao gravar no índice: {e}")
+            if self.dedup:
+                self.dedup.rollback()
+            self.error = e
+
+    def _upsert(self, chunks: List[Document]):
+        self.processor.upsert_chunks(self.vectorstore, chunks)
+        for index in self.side_indexes:
+            index.upsert(chunks)
+
+    def _write_deduplicated(self, chunks: List[Document]):
+        canonical, duplicates = self.dedup.filter(chunks)
+        self._upsert(canonical)
+        if duplicates:
+            self.processor.annotate_duplicates(
+                self.vectorstore, self.dedup, {canonical_id for _, canonical_id in duplicates}
+            )
+        # O registro das assinaturas só vale depois que os chunks estão no Chroma
+        self.dedup.commit()
+        self.report.chunks_written += len(canonical)
+        self.report.duplicates += len(duplicates)
+
+    def _finish_file(self, done: FileDone):
+        # Chunks da versão anterior só saem depois que os novos foram gravados
+        if done.previous:
+            stale_ids = sorted(set(done.previous.chunk_ids) - set(done.chunk_ids))
+            self.processor.delete_chunks(self.vectorstore, stale_ids)
+            for index in self.side_indexes:
+                index.delete(stale_ids)
+            if self.dedup and stale_ids:
+                self.processor.annotate_duplicates(self.vectorstore, self.dedup, self.dedup.release(stale_ids))
+                self.dedup.commit()
+            if done.promoted:
+                self.report.promoted += 1
+            else:
+                self.report.updated += 1
+        else:
+            self.report.added += 1
+
+        done.entry.chunk_count = len(done.chunk_ids)
+        self.manifest.upsert([done.entry])
+
+
+class DocumentProcessor(DocumentParser):
+    """Processa e indexa documentos para o RAG"""
+
+    def __init__(self):
+        super().__init__()
+        self.embedding_service = EmbeddingService()
+
+        # Criar diretórios se não existirem
+        Config.create_directories()
+        # Diretório do Chroma e dos índices auxiliares; build_generation grava numa cópia
+        self.index_dir = current_dir()
+
+    def index_path(self, name: str) -> Path:
+        """Arquivo SQLite de um índice auxiliar (manifest, dedup, lexical, statutes) em index_dir"""
+        return self.index_dir / f"{name}.sqlite3"
+
+    def open_vectorstore(self, embeddings=None) -> Chroma:
+        """Abre (ou cria) a coleção persistente do Chroma"""
+        return Chroma(
+            persist_directory=str(self.index_dir),
+            embedding_function=embeddings or self.embedding_service.get_langchain_embeddings(),
+            collection_metadata=collection_metadata()
+        )
+
+    def scan_index_metadata(self, vectorstore: Chroma) -> Iterator[Tuple[str, Dict]]:
+        """Percorre (id, metadados) da coleção em páginas, sem carregar textos nem vetores"""
+        offset = 0
+        while True:
+            page = vectorstore.get(include=["metadatas"], limit=Config.INGEST_SCAN_PAGE_SIZE, offset=offset)
+            ids = page["ids"]
+            if not ids:
+                break
+            yield from zip(ids, page["metadatas"])
+            offset += len(ids)
+
     def get_processed_files_hash(self) -> set:
-        """Retorna um set com os hashes dos arquivos já processados"""
+        """Retorna um set com os hashes de conteúdo dos arquivos já indexados"""
         processed_hashes = set()
 
         # Verificar se existe vectorstore
-        if not Config.CHROMA_DIR.exists():
+        if not self.index_dir.exists():
             return processed_hashes
 
         try:
-            # Tentar carregar o vectorstore existente
-            vectorstore = Chroma(
-                persist_directory=str(Config.CHROMA_DIR),
-                embedding_function=self.embedding_service.get_langchain_embeddings()
-            )
-
-            # Obter todos os documentos e seus metadados
-            results = vectorstore.get()
-            for metadata in results['metadatas']:
-                if metadata and 'hash_documento' in metadata:
-                    processed_hashes.add(metadata['hash_documento'])
+            vectorstore = self.open_vectorstore()
+            for _, metadata in self.scan_index_metadata(vectorstore):
+                if metadata and 'file_hash' in metadata:
+                    processed_hashes.add(metadata['file_hash'])
 
         except Exception as e:
             logger.warning(f"Erro ao carregar vectorstore existente: {e}")
 
         return processed_hashes
 
-    def process_all_documents(self) -> List[Document]:
-        """Processa todos os documentos do diretório, pulando os já processados"""
-        all_documents = []
-
+    def list_files(self) -> List[Path]:
+        """Arquivos suportados do diretório de documentos (recursivo, ordenado)"""
         if not Config.DOCUMENTS_DIR.exists():
             logger.warning(f"Diretório {Config.DOCUMENTS_DIR} não existe")
-            return all_documents
+            return []
+        return sorted(
+            path for path in Config.DOCUMENTS_DIR.rglob('*')
+            if path.suffix.lower() in SUPPORTED_EXTENSIONS and path.is_file()
+        )
 
-        # Obter hashes dos arquivos já processados
-        processed_hashes = self.get_processed_files_hash()
+    def plan_changes(self, manifest: FileManifest) -> IngestPlan:
+        """Compara o diretório de documentos com o manifesto
 
-        # Extensões suportadas
-        extensions = ['.pdf', '.txt', '.md', '.docx', '.doc']
+        O hash de conteúdo só é calculado quando tamanho ou mtime mudaram, de
+        forma que uma execução sem alterações faz apenas um stat por arquivo.
+        """
+        fingerprint = ingest_fingerprint()
+        previous = manifest.get_all()
+        plan = IngestPlan()
+        seen = set()
 
-        # Coletar todos os arquivos recursivamente (incluindo subpastas)
-        all_files = []
-        for ext in extensions:
-            all_files.extend(list(Config.DOCUMENTS_DIR.rglob(f'*{ext}')))
+        for file_path in self.list_files():
+            relative = file_path.relative_to(Config.DOCUMENTS_DIR).as_posix()
+            seen.add(relative)
+            stat = file_path.stat()
+            old = previous.get(relative)
 
-        logger.info(f"Encontrados {len(all_files)} documentos no diretório")
+            if old and old.size == stat.st_size and old.mtime_ns == stat.st_mtime_ns:
+                if old.file_key == file_key(relative, old.content_hash, fingerprint):
+                    plan.unchanged += 1
+                    continue
+                content_hash = old.content_hash  # Só a configuração de ingestão mudou
+            else:
+                content_hash = file_content_hash(file_path)
 
-        # Filtrar arquivos não processados
-        new_files = []
-        for file_path in all_files:
-            # Calcular hash do arquivo baseado no caminho e tamanho
-            file_hash = hashlib.md5(f"{file_path}:{file_path.stat().st_size}".encode()).hexdigest()[:8]
+            entry = ManifestEntry(
+                path=relative,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                content_hash=content_hash,
+                file_key=file_key(relative, content_hash, fingerprint)
+            )
 
-            if file_hash not in processed_hashes:
-                new_files.append((file_path, file_hash))
+            if old and old.file_key == entry.file_key:
+                # Arquivo tocado sem mudança de conteúdo: só atualizar o manifesto
+                entry.chunk_count = old.chunk_count
+                plan.touched.append(entry)
+                plan.unchanged += 1
             else:
-                logger.info(f"Pulando arquivo já processado: {file_path.name}")
+                plan.changed.append((file_path, entry))
+                if old:
+                    plan.previous[relative] = old
+
+        plan.removed = [entry for path, entry in previous.items() if path not in seen]
+        return plan
 
-        logger.info(f"{len(new_files)} arquivos novos para processar")
+    def ingest_workers(self, file_count: int) -> int:
+        """Quantidade de processos para o parsing (0 em INGEST_WORKERS = núcleos disponíveis)"""
+        workers = Config.INGEST_WORKERS or os.cpu_count() or 1
+        return max(1, min(workers, file_count))
+
+    def parse_files(
+        self, tasks: Iterable[Tuple[Path, ManifestEntry]]
+    ) -> Iterator[Tuple[Path, ManifestEntry, Optional[List[Document]], Optional[str]]]:
+        """Carrega, enriquece e divide arquivos em um pool de processos
+
+        Os resultados saem na ordem de entrada e o erro de um arquivo não afeta
+        os demais. Se um processo travar fora do alcance do SIGALRM (código
+        nativo), o pool é recriado para os arquivos restantes. Os processos
+        são criados com forkserver (spawn onde não há) e recebem os
+        parâmetros de Config deste processo.
+        """
+        pending = deque(tasks)
+        workers = self.ingest_workers(len(pending))
+
+        if workers == 1:
+            for file_path, entry in pending:
+                yield (file_path, entry, *parse_file(self, file_path, entry))
+            return
+
+        # Folga sobre o limite do próprio worker antes de considerar o processo travado
+        hard_timeout = Config.INGEST_FILE_TIMEOUT * 2 + 30 if Config.INGEST_FILE_TIMEOUT > 0 else None
+        # Arquivos enviados ao pool à frente do consumidor (limita a memória dos resultados)
+        prefetch = max(workers, Config.INGEST_PREFETCH_FILES)
+        logger.info(f"Processando {len(pending)} arquivos com {workers} processos")
+
+        context = multiprocessing.get_context(_POOL_START_METHOD)
+        while pending:
+            with context.Pool(workers, initializer=_init_worker, initargs=(_config_settings(),)) as pool:
+                window = deque()
+                try:
+                    while pending or window:
+                        while pending and len(window) < prefetch:
+                            task = pending.popleft()
+                            window.append((task, pool.apply_async(_parse_in_worker, (task,))))
 
-        for file_path, file_hash in new_files:
-            docs = self.load_document(file_path)
+                        (file_path, entry), result = window[0]
+                        chunks, error = result.get(timeout=hard_timeout)
+                        window.popleft()
+                        yield file_path, entry, chunks, error
+                except multiprocessing.TimeoutError:
+                    (file_path, entry), _ = window.popleft()
+                    yield file_path, entry, None, "processo travado; pool reiniciado"
+                    pending.extendleft(reversed([task for task, _ in window]))
 
-            # Enriquecer metadados
-            docs = [self.enrich_metadata(doc, file_path) for doc in docs]
+    def process_all_documents(self) -> List[Document]:
+        """Processa os documentos novos ou alterados do diretório
 
-            # Adicionar hash do arquivo aos metadados
-            for doc in docs:
-                doc.metadata["file_hash"] = file_hash
+        Mantém todos os chunks em memória; a ingestão do índice usa
+        update_index, que grava em lotes à medida que os arquivos são lidos.
+        """
+        all_documents = []
 
-            # Dividir em chunks
-            chunks = self.text_splitter.split_documents(docs)
+        manifest = FileManifest(self.index_path("manifest"))
+        try:
+            plan = self.plan_changes(manifest)
+        finally:
+            manifest.close()
 
-            # Adicionar índice do chunk aos metadados
-            for i, chunk in enumerate(chunks):
-                chunk.metadata["chunk_index"] = i
-                chunk.metadata["total_chunks"] = len(chunks)
+        logger.info(f"{len(plan.changed)} arquivos novos ou alterados para processar")
 
+        for file_path, entry, chunks, error in self.parse_files(plan.changed):
+            if error:
+                logger.error(f"Erro ao processar {entry.path}: {error}")
+                continue
             all_documents.extend(chunks)
 
         logger.info(f"Total de chunks criados: {len(all_documents)}")
         return all_documents
 
+    def update_index(self, progress: Optional[ProgressCallback] = None,
+                     cancel: Optional[threading.Event] = None) -> IngestReport:
+        """Atualiza o índice de forma incremental
+
+        Arquivos novos ou alterados têm seus chunks gravados por upsert (IDs
+        determinísticos) e os chunks da versão anterior removidos; arquivos
+        apagados têm seus chunks removidos. O parsing e a gravação rodam em
+        paralelo, ligados por uma fila limitada (ver IndexWriter), e o
+        manifesto é atualizado arquivo a arquivo, então uma execução
+        interrompida continua de onde parou.
+
+        Com DEDUP_ENABLED, chunks quase duplicados entre arquivos são gravados
+        uma única vez (ver DedupIndex). Os índices auxiliares ligados (ver
+        SIDE_INDEXES) acompanham cada alteração do Chroma. Com
+        VECTOR_BACKEND=numpy, a matriz de embeddings é exportada de novo ao
+        final de toda execução que alterou o Chroma (ver export_vectors).
+        Se o modelo ou a dimensão dos embeddings mudou, a coleção é esvaziada
+        e tudo é reindexado (ver _reset_if_embeddings_changed); se mudaram os
+        parâmetros HNSW, ela é reconstruída numa nova geração (ver
+        _apply_hnsw_settings).
+
+        progress recebe o relatório parcial a cada arquivo e lote gravado
+        (também da thread de gravação). Com cancel sinalizado, a execução
+        para entre arquivos e o relatório volta com cancelled=True.
+        """
+        started = time.perf_counter()
+        report = IngestReport()
+        manifest = FileManifest(self.index_path("manifest"))
+        dedup = DedupIndex(self.index_path("dedup")) if Config.DEDUP_ENABLED else None
+        side_indexes: List[SideIndex] = []
+        vectorstore = None
+        store = None
+
+        try:
+            if not manifest.existed:
+                self._bootstrap_manifest(manifest)
+            self._reset_if_embeddings_changed(manifest)
+            self._apply_hnsw_settings()
+
+            self._open_side_indexes(manifest, side_indexes)
+
+            plan = self.plan_changes(manifest)
+            report.unchanged = plan.unchanged
+            if plan.touched:
+                manifest.upsert(plan.touched)
+
+            logger.info(
+                f"Ingestão incremental: {len(plan.changed)} novos/alterados, "
+                f"{len(plan.removed)} removidos, {plan.unchanged} sem alteração"
+            )
+            report.files_planned = len(plan.changed) + len(plan.removed)
+            if progress:
+                progress(report)
+
+            if plan.changed or plan.removed or (dedup and dedup.orphaned_paths()):
+                # Reaproveitar embeddings de chunks com texto idêntico já calculados
+                embeddings = self.embedding_service.get_ingest_embeddings()
+                store = EmbeddingStore() if Config.EMBEDDING_STORE_ENABLED else None
+                if store:
+                    embeddings = CachedEmbeddings(embeddings, store, self.embedding_service.model_key)
+                vectorstore = self.open_vectorstore(embeddings)
+
+            if plan.changed:
+                self._write_files(plan.changed, plan.previous, vectorstore, manifest, report, dedup, side_indexes,
+                                  progress=progress, cancel=cancel)
+
+            for entry in plan.removed:
+                if cancel and cancel.is_set():
+                    raise IngestCancelled()
+                self.delete_chunks(vectorstore, entry.chunk_ids)
+                for index in side_indexes:
+                    index.delete(entry.chunk_ids)
+                if dedup:
+                    self.annotate_duplicates(vectorstore, dedup, dedup.release(entry.chunk_ids))
+                    dedup.commit()
+                manifest.remove([entry.path])
+                report.removed += 1
+                report.chunks_deleted += entry.chunk_count
+                report.files_done += 1
+                if progress:
+                    progress(report)
+
+            if dedup:
+                self._promote_orphans(vectorstore, manifest, report, dedup, side_indexes, progress, cancel)
+
+            manifest.set_meta("fingerprint", ingest_fingerprint())
+            report.total_files = len(manifest)
+
+            if self.text_cache:
+                self.text_cache.prune()
+
+        except IngestCancelled:
+            report.cancelled = True
+            logger.warning("Ingestão cancelada; a próxima execução continua a partir dos arquivos pendentes")
+
+        finally:
+            manifest.close()
+            if dedup:
+                dedup.close()
+            for index in side_indexes:
+                index.close()
+            if store:
+                store.close()
+
+        # Também após o cancelamento: a matriz acompanha o que foi gravado
+        if Config.VECTOR_BACKEND == "numpy":
+            if vectorstore is not None or not NumpyVectorStore.exists(self.index_dir):
+                self.export_vectors(vectorstore)
+
+        report.elapsed = time.perf_counter() - started
+        logger.info(
+            f"Índice atualizado em {report.elapsed:.2f}s: +{report.added} ~{report.updated} -{report.removed} "
+            f"arquivos, {report.chunks_written} chunks gravados ({report.chunks_per_second:.1f}/s), "
+            f"{report.chunks_deleted} removidos, {report.duplicates} duplicatas descartadas "
+            f"({report.duplicate_ratio:.1%})"
+        )
+        return report
+
+    def refresh_index(self, progress: Optional[ProgressCallback] = None,
+                      cancel: Optional[threading.Event] = None) -> IngestReport:
+        """Reindexa por build_generation (INDEX_GENERATIONS_ENABLED) ou direto no índice ativo"""
+        if Config.INDEX_GENERATIONS_ENABLED:
+            return self.build_generation(progress, cancel)
+        return self.update_index(progress, cancel)
+
+    def build_generation(self, progress: Optional[ProgressCallback] = None,
+                         cancel: Optional[threading.Event] = None) -> IngestReport:
+        """Atualiza o índice numa nova geração e a publica depois de validada
+
+        O índice ativo nunca é alterado: update_index roda numa cópia dele
+        (ver generations.create_generation), conferida por validate_index
+        antes da troca atômica do CURRENT. As buscas do bot seguem na geração
+        antiga durante todo o build. Gerações substituídas há mais de
+        INDEX_GC_GRACE_SECONDS são apagadas ao final.
+
+        Sem nada a gravar, nenhuma cópia é feita. Uma execução cancelada também
+        é publicada, pois o que foi gravado está consistente e a próxima
+        continua dos arquivos pendentes; em erro ou validação reprovada, a
+        cópia é apagada e o índice ativo fica como estava.
+        """
+        if self._is_up_to_date():
+            # Só o manifesto muda (arquivos tocados), e o retriever não o lê
+            return self.update_index(progress, cancel)
+
+        generation, path = create_generation()
+        active_dir, self.index_dir = self.index_dir, path
+        try:
+            report = self.update_index(progress, cancel)
+            self.validate_index()
+        except BaseException as e:
+            logger.error(f"Geração {generation} descartada: {e}")
+            self.index_dir = active_dir
+            discard(path)
+            raise
+
+        publish(generation)
+        report.generation = generation
+        collect_garbage()
+        return report
+
+    def export_vectors(self, vectorstore: Optional[Chroma] = None) -> int:
+        """Exporta os embeddings do Chroma de index_dir para o NumpyVectorStore (VECTOR_BACKEND=numpy)"""
+        vectorstore = vectorstore or self.open_vectorstore()
+        return export_vectors(vectorstore._collection, self.index_dir)
+
+    def validate_index(self) -> int:
+        """Confere o índice de index_dir antes da publicação; levanta IndexValidationError
+
+        Exige chunks no Chroma quando o manifesto tem arquivos, o índice
+        lexical com a mesma quantidade de chunks do Chroma e uma consulta de
+        teste, pelo vetor de um chunk gravado, que encontre esse vetor; com
+        VECTOR_BACKEND=numpy, o mesmo para a matriz exportada. Retorna a
+        quantidade de chunks.
+        """
+        manifest = FileManifest(self.index_path("manifest"))
+        try:
+            files = len(manifest)
+        finally:
+            manifest.close()
+
+        collection = self.open_vectorstore()._collection
+        count = collection.count()
+        if files and not count:
+            raise IndexValidationError(f"{files} arquivos no manifesto, mas nenhum chunk no Chroma")
+
+        lexical_path = self.index_path(LexicalIndex.name)
+        if Config.LEXICAL_SEARCH_ENABLED and lexical_path.exists():
+            lexical = LexicalIndex(lexical_path)
+            try:
+                lexical_count = len(lexical)
+            finally:
+                lexical.close()
+            if lexical_count != count:
+                raise IndexValidationError(f"Índice lexical com {lexical_count} chunks e Chroma com {count}")
+
+        if count:
+            sample = collection.get(limit=1, include=["embeddings"])
+            found = collection.query(query_embeddings=sample["embeddings"], n_results=1, include=["distances"])
+            # Distância de cosseno do vetor para ele mesmo (ou para um chunk de texto idêntico)
+            if not found["distances"][0] or found["distances"][0][0] > 1e-3:
+                raise IndexValidationError("Consulta de teste não encontrou o chunk consultado")
+
+        if Config.VECTOR_BACKEND == "numpy":
+            if not NumpyVectorStore.exists(self.index_dir):
+                raise IndexValidationError("Índice NumPy não foi exportado")
+            vectors = NumpyVectorStore.load(self.index_dir)
+            if vectors.count() != count:
+                raise IndexValidationError(f"Índice NumPy com {vectors.count()} vetores e Chroma com {count}")
+            if count:
+                hits = vectors.similarity_search_by_vector_with_relevance_scores(sample["embeddings"][0], k=1)
+                if not hits or hits[0][1] > 1e-3:  # Distância de cosseno do próprio vetor
+                    raise IndexValidationError("Consulta de teste no índice NumPy não encontrou o chunk consultado")
+
+        logger.info(f"Índice validado: {files} arquivos, {count} chunks")
+        return count
+
+    def _is_up_to_date(self) -> bool:
+        """Se update_index não gravaria nada no Chroma nem nos índices auxiliares"""
+        manifest_path = self.index_path("manifest")
+        if not manifest_path.exists():
+            return False
+        if Config.VECTOR_BACKEND == "numpy" and not NumpyVectorStore.exists(self.index_dir):
+            return False
+        if (self.index_dir / "chroma.sqlite3").exists():
+            collection = self.open_vectorstore()._collection
+            if needs_rebuild(collection) or hnsw_settings(collection)["HNSW_SEARCH_EF"] != Config.HNSW_SEARCH_EF:
+                return False
+
+        manifest = FileManifest(manifest_path)
+        try:
+            plan = self.plan_changes(manifest)
+            if plan.changed or plan.removed:
+                return False
+            for index_class, setting in SIDE_INDEXES:
+                if getattr(Config, setting) and (
+                    not self.index_path(index_class.name).exists()
+                    or manifest.get_meta(f"{index_class.name}_index") != "ok"
+                ):
+                    return False
+        finally:
+            manifest.close()
+
+        dedup_path = self.index_path("dedup")
+        if Config.DEDUP_ENABLED and dedup_path.exists():
+            dedup = DedupIndex(dedup_path)
+            try:
+                return not dedup.orphaned_paths()
+            finally:
+                dedup.close()
+        return True
+
+    def _write_files(self, tasks: List[Tuple[Path, ManifestEntry]], previous: Dict[str, ManifestEntry],
+                     vectorstore: Chroma, manifest: FileManifest, report: IngestReport,
+                     dedup: Optional[DedupIndex], side_indexes: Sequence[SideIndex], promoted: bool = False,
+                     progress: Optional[ProgressCallback] = None, cancel: Optional[threading.Event] = None):
+        """Processa arquivos e grava os chunks pelo IndexWriter"""
+        writer = IndexWriter(self, vectorstore, manifest, report, dedup, side_indexes, progress)
+        try:
+            for file_path, entry, chunks, error in self.parse_files(tasks):
+                report.files_done += 1
+                if error:
+                    # Manifesto não é atualizado: o arquivo será tentado de novo na próxima execução
+                    logger.error(f"Erro ao processar {entry.path}: {error}")
+                    report.failed += 1
+                else:
+                    writer.put_file(entry, chunks, previous.get(entry.path), promoted)
+                if progress:
+                    progress(report)
+                # Arquivos já entregues ao IndexWriter são gravados antes de parar
+                if cancel and cancel.is_set():
+                    raise IngestCancelled()
+        finally:
+            writer.close()
+
+    def _promote_orphans(self, vectorstore: Chroma, manifest: FileManifest, report: IngestReport,
+                         dedup: DedupIndex, side_indexes: Sequence[SideIndex],
+                         progress: Optional[ProgressCallback] = None, cancel: Optional[threading.Event] = None):
+        """Reprocessa arquivos cujas duplicatas perderam o chunk canônico
+
+        Os IDs dos chunks não mudam: a nova passada pelo DedupIndex elege
+        outro canônico ou grava o próprio chunk no índice.
+        """
+        entries = manifest.get_all()
+        tasks = []
+        for relative in dedup.orphaned_paths():
+            entry = entries.get(relative)
+            file_path = Config.DOCUMENTS_DIR / relative
+            if not entry or not file_path.is_file():
+                continue
+            stat = file_path.stat()
+            if (stat.st_size, stat.st_mtime_ns) != (entry.size, entry.mtime_ns):
+                continue  # Alterado desde o manifesto: fica para a próxima execução
+            tasks.append((file_path, entry))
+
+        if tasks:
+            logger.info(f"Reprocessando {len(tasks)} arquivos cujas duplicatas perderam o chunk canônico")
+            report.files_planned += len(tasks)
+            self._write_files(tasks, {entry.path: entry for _, entry in tasks}, vectorstore, manifest, report,
+                              dedup, side_indexes, promoted=True, progress=progress, cancel=cancel)
+
+    def upsert_chunks(self, vectorstore: Chroma, chunks: List[Document]):
+        """Grava chunks por upsert, em lotes"""
+        batch_size = Config.INGEST_BATCH_SIZE
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start:start + batch_size]
+            vectorstore.add_documents(batch, ids=[chunk.id for chunk in batch])
+
+    def delete_chunks(self, vectorstore: Chroma, ids: List[str]):
+        """Remove chunks por ID, em lotes"""
+        batch_size = Config.INGEST_BATCH_SIZE
+        for start in range(0, len(ids), batch_size):
+            vectorstore.delete(ids=ids[start:start + batch_size])
+
+    def annotate_duplicates(self, vectorstore: Chroma, dedup: DedupIndex, canonical_ids: Iterable[str]):
+        """Atualiza "outras_fontes" e "duplicatas" nos metadados dos chunks canônicos"""
+        sources = dedup.sources(sorted(canonical_ids))
+        ids = list(sources)
+        batch_size = Config.INGEST_BATCH_SIZE
+        for start in range(0, len(ids), batch_size):
+            found = vectorstore._collection.get(ids=ids[start:start + batch_size], include=[])
+            if not found["ids"]:
+                continue
+            # update() mescla os metadados; None remove a chave
+            metadatas = [
+                {"outras_fontes": "; ".join(sources[doc_id]), "duplicatas": len(sources[doc_id])}
+                if sources[doc_id] else {"outras_fontes": None, "duplicatas": None}
+                for doc_id in found["ids"]
+            ]
+            vectorstore._collection.update(ids=found["ids"], metadatas=metadatas)
+
+    def _bootstrap_manifest(self, manifest: FileManifest):
+        """Reconstrói o manifesto a partir dos metadados do índice existente
+
+        Chunks de versões antigas (sem IDs estáveis) são removidos, pois não
+        há como associá-los a um arquivo; eles serão reindexados.
+        """
+        if not (self.index_dir / "chroma.sqlite3").exists():
+            return
+
+        vectorstore = self.open_vectorstore()
+        entries: Dict[str, ManifestEntry] = {}
+        legacy_ids = []
+
+        for doc_id, metadata in self.scan_index_metadata(vectorstore):
+            metadata = metadata or {}
+            relative = metadata.get("caminho_relativo")
+            if not relative or "file_key" not in metadata:
+                legacy_ids.append(doc_id)
+                continue
+            if relative not in entries:
+                entries[relative] = ManifestEntry(
+                    path=relative,
+                    size=metadata["file_size"],
+                    mtime_ns=metadata["file_mtime_ns"],
+                    content_hash=metadata["file_hash"],
+                    file_key=metadata["file_key"],
+                    chunk_count=metadata.get("total_chunks", 0)
+                )
+
+        if legacy_ids:
+            logger.warning(f"Removendo {len(legacy_ids)} chunks sem ID estável de indexações antigas")
+            self.delete_chunks(vectorstore, legacy_ids)
+        if entries:
+            manifest.upsert(entries.values())
+            logger.info(f"Manifesto reconstruído com {len(entries)} arquivos a partir do índice")
+
+    def _reset_if_embeddings_changed(self, manifest: FileManifest):
+        """Esvazia a coleção do Chroma quando o modelo ou a dimensão dos embeddings mudou
+
+        Vetores de outro espaço não são comparáveis com os novos (e, com outra
+        dimensão, nem cabem na coleção). O fingerprint novo já faz todos os
+        arquivos serem reindexados; o manifesto é mantido para que os chunks
+        antigos saiam dos índices auxiliares. Índices anteriores ao registro
+        do modelo foram gerados com EMBEDDING_MODEL na dimensão padrão.
+        """
+        current = embedding_model_key()
+        previous = manifest.get_meta("embedding_model") or Config.EMBEDDING_MODEL
+        if previous != current and (self.index_dir / "chroma.sqlite3").exists():
+            logger.warning(f"Embeddings mudaram de {previous} para {current}; todos os chunks serão recalculados")
+            self.open_vectorstore().delete_collection()
+        manifest.set_meta("embedding_model", current)
+
+    def _apply_hnsw_settings(self) -> bool:
+        """Leva os parâmetros HNSW de Config para a coleção existente; True se ela mudou
+
+        Com M ou construction_ef diferentes, a coleção é reconstruída a partir
+        dos embeddings gravados, mas só numa geração ainda não publicada: no
+        índice ativo (INDEX_GENERATIONS_ENABLED=false) as buscas veriam a
+        coleção pela metade, então ela fica com o grafo antigo. Só o search_ef
+        diferente é gravado na coleção.
+        """
+        if not (self.index_dir / "chroma.sqlite3").exists():
+            return False
+        vectorstore = self.open_vectorstore()
+        if needs_rebuild(vectorstore._collection):
+            if self.index_dir == current_dir():
+                logger.warning(
+                    "HNSW_M/HNSW_CONSTRUCTION_EF mudaram, mas o índice ativo não é reconstruído no lugar; "
+                    "ative INDEX_GENERATIONS_ENABLED para aplicá-los"
+                )
+            else:
+                rebuild_collection(vectorstore._client, vectorstore._collection)
+                return True
+        return apply_search_ef(vectorstore._collection)
+
+    def _open_side_indexes(self, manifest: FileManifest, side_indexes: List[SideIndex]):
+        """Abre os índices auxiliares ligados e reconstrói os desatualizados
+
+        Um índice que ficou desligado durante alguma ingestão (ou cujo
+        arquivo sumiu) é reconstruído a partir do Chroma; o estado de cada
+        um fica nos metadados do manifesto.
+        """
+        stale = []
+        for index_class, setting in SIDE_INDEXES:
+            meta_key = f"{index_class.name}_index"
+            if not getattr(Config, setting):
+                manifest.set_meta(meta_key, "")
+                continue
+            index = index_class(self.index_path(index_class.name))
+            side_indexes.append(index)
+            if not index.existed or manifest.get_meta(meta_key) != "ok":
+                stale.append(index)
+
+        if stale:
+            self._bootstrap_side_indexes(stale)
+            for index in stale:
+                manifest.set_meta(f"{index.name}_index", "ok")
+
+    def _bootstrap_side_indexes(self, side_indexes: List[SideIndex]):
+        """Reconstrói índices auxiliares a partir dos chunks já gravados no Chroma"""
+        for index in side_indexes:
+            index.clear()
+        if not (self.index_dir / "chroma.sqlite3").exists():
+            return
+
+        vectorstore = self.open_vectorstore()
+        offset = 0
+        while True:
+            page = vectorstore.get(
+                include=["documents", "metadatas"], limit=Config.INGEST_SCAN_PAGE_SIZE, offset=offset
+            )
+            if not page["ids"]:
+                break
+            chunks = [
+                Document(id=doc_id, page_content=text or "", metadata=metadata or {})
+                for doc_id, text, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+            ]
+            for index in side_indexes:
+                index.upsert(chunks)
+            offset += len(chunks)
+
+        if offset:
+            names = ", ".join(index.name for index in side_indexes)
+            logger.info(f"Índices auxiliares ({names}) reconstruídos com {offset} chunks do Chroma")
+
     def create_vectorstore(self, documents: List[Document] = None) -> Chroma:
-        """Cria ou atualiza o vectorstore"""
+        """Cria ou atualiza o vectorstore
+
+        Sem documentos explícitos, executa a ingestão incremental do diretório.
+        """
         if documents is None:
-            documents = self.process_all_documents()
+            report = self.refresh_index()
+            if not report.total_files:
+                logger.warning("Nenhum documento para indexar")
+                return None
+            return self.open_vectorstore()
 
         if not documents:
             logger.warning("Nenhum documento para indexar")
             return None
 
+        # Reaproveitar embeddings de chunks com texto idêntico já calculados
+        embeddings = self.embedding_service.get_ingest_embeddings()
+        store = EmbeddingStore() if Config.EMBEDDING_STORE_ENABLED else None
+        if store:
+            embeddings = CachedEmbeddings(embeddings, store, self.embedding_service.model_key)
+
         # Criar/atualizar Chroma DB
-        vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embedding_service.get_langchain_embeddings(),
-            persist_directory=str(Config.CHROMA_DIR),
-            collection_metadata={"hnsw:space": "cosine"}
-        )
+        try:
+            vectorstore = self.open_vectorstore(embeddings)
+            if all(doc.id for doc in documents):
+                self.upsert_chunks(vectorstore, documents)
+            else:
+                vectorstore.add_documents(documents)
+        finally:
+            if store:
+                store.close()
 
-        vectorstore.persist()
         logger.info(f"Vectorstore criado/atualizado com {len(documents)} chunks")
 
         return vectorstore
 
 
+def _json_progress_printer() -> ProgressCallback:
+    """Imprime o relatório parcial como uma linha JSON, no máximo uma vez por PROGRESS_INTERVAL"""
+    lock = threading.Lock()
+    last = 0.0
+
+    def progress(report: IngestReport):
+        nonlocal last
+        with lock:
+            now = time.monotonic()
+            if now - last < PROGRESS_INTERVAL:
+                return
+            last = now
+            print(json.dumps({"event": "progress", **asdict(report)}), flush=True)
+
+    return progress
+
+
 def main() -> None:
     """CLI para reindexação da base RAG."""
+    parser = argparse.ArgumentParser(description="Atualiza o índice RAG de forma incremental")
+    parser.add_argument(
+        "--progress-json", action="store_true",
+        help="Emite o progresso e o resultado como linhas JSON (usado pelo /reindex do bot)"
+    )
+    args = parser.parse_args()
+
+    # SIGTERM pede o cancelamento: a ingestão para entre arquivos, com o manifesto consistente
+    cancel = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: cancel.set())
+
     processor = DocumentProcessor()
-    processor.create_vectorstore()
+    report = processor.refresh_index(
+        progress=_json_progress_printer() if args.progress_json else None,
+        cancel=cancel
+    )
+    if args.progress_json:
+        print(json.dumps({"event": "cancelled" if report.cancelled else "done", **asdict(report)}), flush=True)
+        return
+
+    if report.cancelled:
+        print("Ingestão cancelada; execute novamente para continuar")
+    if report.generation:
+        print(f"Geração publicada: {report.generation}")
+    print(
+        f"Arquivos: {report.added} novos, {report.updated} alterados, {report.removed} removidos, "
+        f"{report.unchanged} sem alteração, {report.failed} com erro"
+    )
+    if Config.DEDUP_ENABLED:
+        print(
+            f"Duplicatas: {report.duplicates} chunks descartados ({report.duplicate_ratio:.1%}), "
+            f"{report.promoted} arquivos reprocessados"
+        )
+    print(
+        f"Chunks: {report.chunks_written} gravados, {report.chunks_deleted} removidos "
+        f"({report.elapsed:.1f}s, {report.chunks_per_second:.1f} chunks/s)"
+    )
 
 
 if __name__ == "__main__":
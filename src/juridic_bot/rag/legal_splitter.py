@@ -0,0 +1,266 @@
+"""
+Divisor de textos que conhece a estrutura de leis e códigos
+"""
+import bisect
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+# Títulos, capítulos e artigos no início da linha, encontrados em uma única
+# varredura. Começar pelo literal "\n" (em vez de ^ com MULTILINE) permite ao
+# motor de regex saltar direto entre quebras de linha.
+_STRUCTURE_PATTERN = re.compile(
+    r"\n[ \t]*(?:"
+    r"(?P<livro>(?i:LIVRO)[ \t]+(?:[IVXLCDM]+|(?i:[ÚU]NICO))\b[^\n]*)"
+    r"|(?P<titulo>(?i:T[ÍI]TULO)[ \t]+(?:[IVXLCDM]+|(?i:[ÚU]NICO))\b[^\n]*)"
+    r"|(?P<capitulo>(?i:CAP[ÍI]TULO)[ \t]+(?:[IVXLCDM]+|(?i:[ÚU]NICO))\b[^\n]*)"
+    r"|(?P<secao>(?i:SE[ÇC][ÃA]O)[ \t]+(?:[IVXLCDM]+|(?i:[ÚU]NICO))\b[^\n]*)"
+    r"|Art\.?[ \t]*(?P<artigo>\d+(?:\.\d{3})*(?:[ \t]*[º°o])?(?:-[A-Z])?)"
+    r")"
+)
+
+# Parágrafos e incisos, procurados só dentro de artigos maiores que chunk_size
+_SUBDIVISION_PATTERN = re.compile(
+    r"\n[ \t]*(?:(?P<paragrafo>§[ \t]*\d+[ \t]*[º°o]?|Par[áa]grafo[ \t]+[úu]nico)|[IVXLCDM]+[ \t]*[-–—][ \t])"
+)
+
+# Cabeçalho do ato normativo (usado como nome da lei nos metadados)
+_LAW_PATTERN = re.compile(
+    r"^[ \t]*((?:LEI COMPLEMENTAR|LEI|DECRETO-LEI|DECRETO|MEDIDA PROVISÓRIA|EMENDA CONSTITUCIONAL|"
+    r"CONSTITUIÇÃO)\b[^\n]*)",
+    re.MULTILINE,
+)
+
+_HEADING_LEVEL = {"livro": 0, "titulo": 1, "capitulo": 2, "secao": 3}
+
+_ORDINAL_MARKS = str.maketrans("", "", "º° \t")
+
+
+def _clean_label(label: str) -> str:
+    return " ".join(label.split())[:120]
+
+
+def _article_number(raw: str) -> str:
+    """'5º' -> '5', '1.000' -> '1.000', '5º-A' -> '5-A', '1o' -> '1'"""
+    number, _, suffix = raw.translate(_ORDINAL_MARKS).partition("-")
+    number = number.rstrip("o")
+    return f"{number}-{suffix}" if suffix else number
+
+
+class _Unit:
+    """Trecho indivisível na primeira passada: um artigo (com os cabeçalhos que o precedem)"""
+
+    __slots__ = ("start", "end", "path", "artigo")
+
+    def __init__(self, start: int, end: int, path: Dict[str, str], artigo: Optional[str] = None):
+        self.start = start
+        self.end = end
+        self.path = path  # Compartilhado entre os artigos do mesmo capítulo; não alterar
+        self.artigo = artigo
+
+
+class LegalTextSplitter:
+    """Divide documentos jurídicos em uma única passada, sem cortar artigos
+
+    Os artigos inteiros são agrupados até chunk_size, sem misturar capítulos
+    diferentes. Um artigo maior que chunk_size é dividido nos parágrafos e
+    incisos, e cada pedaço recebe o prefixo do artigo para não perder o
+    contexto. Textos sem artigos (doutrina, jurisprudência) são agrupados por
+    parágrafos. Título, capítulo, artigo e parágrafo vão para os metadados.
+
+    As páginas de um mesmo arquivo são concatenadas antes da divisão, para
+    que um artigo que atravessa a quebra de página não seja cortado; cada
+    chunk recebe os metadados da página onde começa.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int = 0):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = min(chunk_overlap, chunk_size // 2)
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        chunks: List[Document] = []
+        for group in self._group_by_source(documents):
+            chunks.extend(self._split_group(group))
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk.page_content for chunk in self._split_group([Document(page_content=text)])]
+
+    def _group_by_source(self, documents: List[Document]) -> Iterator[List[Document]]:
+        group: List[Document] = []
+        for doc in documents:
+            if group and doc.metadata.get("source") != group[-1].metadata.get("source"):
+                yield group
+                group = []
+            group.append(doc)
+        if group:
+            yield group
+
+    def _split_group(self, pages: List[Document]) -> List[Document]:
+        # Concatenar as páginas guardando onde cada uma começa
+        texts, page_starts, offset = [], [], 0
+        for page in pages:
+            page_starts.append(offset)
+            texts.append(page.page_content)
+            offset += len(page.page_content) + 1
+        text = "\n".join(texts)
+
+        law_match = _LAW_PATTERN.search(text, 0, 5000)
+        if law_match:
+            lei = _clean_label(law_match.group(1))
+        else:
+            source = pages[0].metadata.get("source")
+            lei = Path(source).stem if source else None
+
+        chunks = []
+        for start, end, structure, prefix in self._pack(text, self._units(text)):
+            content = prefix + text[start:end].strip()
+            if not content.strip():
+                continue
+
+            page_index = bisect.bisect_right(page_starts, start) - 1
+            metadata = dict(pages[page_index].metadata)
+            if lei:
+                metadata["lei"] = lei
+            metadata.update(structure)
+            chunks.append(Document(page_content=content, metadata=metadata))
+        return chunks
+
+    def _units(self, text: str) -> List[_Unit]:
+        """Primeira (e única) varredura: corta o texto no início de cada artigo"""
+        path: Dict[str, str] = {}
+        units = [_Unit(0, len(text), path)]
+        heading_start: Optional[int] = None
+
+        # O texto recebe um "\n" à frente para que a primeira linha também case
+        for match in _STRUCTURE_PATTERN.finditer("\n" + text):
+            kind = match.lastgroup
+            position = match.start()  # Já descontado o "\n" inicial
+
+            if kind == "artigo":
+                start = heading_start if heading_start is not None else position
+                heading_start = None
+                units[-1].end = start
+                units.append(_Unit(start, len(text), path, _article_number(match.group(kind))))
+                continue
+
+            # Cabeçalhos ficam com o artigo seguinte, e não no fim do anterior
+            if heading_start is None:
+                heading_start = position
+            # Um novo título zera capítulo e seção, e assim por diante
+            path = {key: value for key, value in path.items() if _HEADING_LEVEL[key] < _HEADING_LEVEL[kind]}
+            path[kind] = _clean_label(match.group(kind))
+
+        if heading_start is not None:
+            # Cabeçalhos no fim do texto, sem artigo depois
+            units[-1].end = heading_start
+            units.append(_Unit(heading_start, len(text), path))
+
+        return [unit for unit in units if unit.end > unit.start]
+
+    def _pack(self, text: str, units: List[_Unit]) -> Iterator[Tuple[int, int, Dict[str, str], str]]:
+        """Agrupa unidades inteiras até chunk_size; retorna (início, fim, estrutura, prefixo)"""
+        current: List[_Unit] = []
+        size = 0
+
+        def flush():
+            first, last = current[0], current[-1]
+            structure = dict(first.path)
+            if first.artigo:
+                structure["artigo"] = first.artigo
+            if last.artigo and last.artigo != first.artigo:
+                structure["artigo_final"] = last.artigo
+            return first.start, last.end, structure, ""
+
+        for unit in units:
+            length = unit.end - unit.start
+            # Trechos sem artigo e artigos maiores que chunk_size são divididos à parte
+            standalone = unit.artigo is None or length > self.chunk_size
+
+            if current and (standalone or size + length > self.chunk_size or unit.path != current[0].path):
+                yield flush()
+                current, size = [], 0
+
+            if standalone:
+                yield from self._split_unit(text, unit)
+                continue
+
+            current.append(unit)
+            size += length
+
+        if current:
+            yield flush()
+
+    def _split_unit(self, text: str, unit: _Unit) -> Iterator[Tuple[int, int, Dict[str, str], str]]:
+        """Artigo maior que chunk_size: cortar nos parágrafos/incisos, com o prefixo do artigo"""
+        if unit.artigo is None:
+            yield from self._split_plain(text, unit)
+            return
+
+        cuts = [unit.start]
+        labels = {}
+        for match in _SUBDIVISION_PATTERN.finditer(text, unit.start, unit.end):
+            position = match.start() + 1  # Início da linha, depois do "\n"
+            cuts.append(position)
+            if match.group("paragrafo"):
+                labels[position] = _clean_label(match.group("paragrafo"))
+        cuts.append(unit.end)
+        prefix = f"Art. {unit.artigo} (continuação)\n"
+
+        piece_start = unit.start
+        paragrafo = None
+        current_paragrafo = None
+        for i in range(1, len(cuts)):
+            cut = cuts[i]
+            if cuts[i - 1] in labels:
+                current_paragrafo = labels[cuts[i - 1]]
+            if cut - piece_start > self.chunk_size and cuts[i - 1] > piece_start:
+                yield from self._emit_piece(text, unit, piece_start, cuts[i - 1], paragrafo, prefix)
+                piece_start = cuts[i - 1]
+                paragrafo = current_paragrafo
+        yield from self._emit_piece(text, unit, piece_start, unit.end, paragrafo, prefix)
+
+    def _emit_piece(self, text: str, unit: _Unit, start: int, end: int, paragrafo: Optional[str], prefix: str):
+        structure = dict(unit.path)
+        structure["artigo"] = unit.artigo
+        if paragrafo:
+            structure["paragrafo"] = paragrafo
+        first = start == unit.start
+        for piece_start, piece_end in self._hard_split(text, start, end, self.chunk_size - len(prefix)):
+            yield piece_start, piece_end, structure, "" if first and piece_start == unit.start else prefix
+
+    def _split_plain(self, text: str, unit: _Unit) -> Iterator[Tuple[int, int, Dict[str, str], str]]:
+        """Trecho sem artigos: agrupar parágrafos (linhas em branco) até chunk_size"""
+        structure = dict(unit.path)
+        piece_start = unit.start
+        last_break = None
+        position = unit.start
+
+        while True:
+            found = text.find("\n\n", position, unit.end)
+            boundary = unit.end if found == -1 else found + 2
+            if boundary - piece_start > self.chunk_size and last_break is not None:
+                for start, end in self._hard_split(text, piece_start, last_break, self.chunk_size):
+                    yield start, end, structure, ""
+                piece_start = last_break
+            last_break = boundary
+            if found == -1:
+                break
+            position = boundary
+
+        for start, end in self._hard_split(text, piece_start, unit.end, self.chunk_size):
+            yield start, end, structure, ""
+
+    def _hard_split(self, text: str, start: int, end: int, limit: int) -> Iterator[Tuple[int, int]]:
+        """Último recurso: cortar em espaço perto do limite, com sobreposição"""
+        limit = max(limit, 1)
+        while end - start > limit:
+            cut = text.rfind(" ", start + limit // 2, start + limit)
+            if cut == -1:
+                cut = start + limit
+            yield start, cut
+            start = max(cut - self.chunk_overlap, start + 1) if self.chunk_overlap else cut
+        if end > start:
+            yield start, end
@@ -0,0 +1,126 @@
+"""
+Índice lexical (BM25) dos chunks, em SQLite FTS5
+"""
+import logging
+import re
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Palavras funcionais do português (já sem acentos); "lei", "art" etc. ficam
+STOPWORDS = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era essa esse
+esta este eu foi for ha isso isto ja la lhe mais mas me mesmo meu minha muito na nao nas nem no nos
+nossa nosso num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu seus
+so sua suas tambem te tem todo toda todos todas tu um uma umas uns voce
+""".split())
+
+_WORD_PATTERN = re.compile(r"\w+")
+# Separador de milhar em números de leis e artigos: 8.112 -> 8112
+_THOUSANDS_PATTERN = re.compile(r"(?<=\d)\.(?=\d{3}\b)")
+
+# Limite de parâmetros por consulta SQLite
+_SQL_BATCH = 500
+
+
+def tokenize(text: str) -> List[str]:
+    """Termos normalizados: minúsculas, sem acentos, sem stopwords
+
+    "Lei nº 8.112/90, art. 5º, § 2º" -> lei, 8112, 90, art, 5, paragrafo, 2
+    """
+    text = _THOUSANDS_PATTERN.sub("", text.casefold())
+    text = text.replace("§", " paragrafo ").replace("º", " ").replace("°", " ").replace("ª", " ")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [word for word in _WORD_PATTERN.findall(text) if word not in STOPWORDS and word != "n"]
+
+
+class LexicalIndex:
+    """Índice invertido dos chunks com ranking BM25 (SQLite FTS5)
+
+    Guarda apenas os termos de cada chunk; o texto e os metadados continuam
+    no Chroma, recuperados por ID. Mantido pela ingestão junto com cada
+    upsert/remoção no Chroma, no mesmo diretório da coleção.
+    """
+
+    name = "lexical"
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or Config.CHROMA_DIR / "lexical.sqlite3"
+        self.existed = self.path.exists()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Compartilhado pelas threads de busca do retriever e pela thread de gravação da ingestão
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks (rowid INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chunk_terms USING fts5("
+            "terms, tokenize='unicode61 remove_diacritics 2');"
+        )
+        self._conn.commit()
+
+    def upsert(self, chunks: Iterable[Document]):
+        """Indexa (ou reindexa) chunks pelo ID"""
+        rows = [(chunk.id, " ".join(tokenize(chunk.page_content))) for chunk in chunks]
+        with self._lock, self._conn:
+            self._delete([chunk_id for chunk_id, _ in rows])
+            for chunk_id, terms in rows:
+                rowid = self._conn.execute("INSERT INTO chunks (chunk_id) VALUES (?)", (chunk_id,)).lastrowid
+                self._conn.execute("INSERT INTO chunk_terms (rowid, terms) VALUES (?, ?)", (rowid, terms))
+
+    def delete(self, chunk_ids: Iterable[str]):
+        """Remove chunks pelo ID"""
+        with self._lock, self._conn:
+            self._delete(list(chunk_ids))
+
+    def _delete(self, chunk_ids: List[str]):
+        for start in range(0, len(chunk_ids), _SQL_BATCH):
+            batch = chunk_ids[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(
+                f"DELETE FROM chunk_terms WHERE rowid IN (SELECT rowid FROM chunks WHERE chunk_id IN ({placeholders}))",
+                batch
+            )
+            self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+
+    def clear(self):
+        """Remove todos os chunks do índice"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunk_terms")
+            self._conn.execute("DELETE FROM chunks")
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Chunks que contêm termos da consulta, do mais relevante para o menos: (id, score BM25)"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        # Qualquer termo casa; o BM25 favorece os chunks com mais termos e termos mais raros
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunks.chunk_id, bm25(chunk_terms) FROM chunk_terms "
+                "JOIN chunks ON chunks.rowid = chunk_terms.rowid "
+                "WHERE chunk_terms MATCH ? ORDER BY bm25(chunk_terms) LIMIT ?",
+                (match, k)
+            ).fetchall()
+        # bm25() do FTS5 é negativo (menor = melhor)
+        return [(chunk_id, -score) for chunk_id, score in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self):
+        """Fecha a conexão SQLite"""
+        self._conn.close()
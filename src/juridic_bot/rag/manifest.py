@@ -0,0 +1,112 @@
+"""
+Manifesto de arquivos indexados para ingestão incremental
+"""
+import hashlib
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ManifestEntry:
+    """Estado de um arquivo no momento em que foi indexado"""
+
+    path: str  # Relativo a DOCUMENTS_DIR
+    size: int
+    mtime_ns: int
+    content_hash: str
+    file_key: str
+    chunk_count: int = 0
+    indexed_at: float = 0.0
+
+    @property
+    def chunk_ids(self) -> List[str]:
+        return [chunk_id(self.file_key, i) for i in range(self.chunk_count)]
+
+
+def file_content_hash(file_path: Path) -> str:
+    """sha256 do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_key(relative_path: str, content_hash: str, fingerprint: str) -> str:
+    """Identificador estável de uma versão de um arquivo com uma configuração de ingestão"""
+    return hashlib.sha1(f"{relative_path}:{content_hash}:{fingerprint}".encode("utf-8")).hexdigest()[:24]
+
+
+def chunk_id(key: str, index: int) -> str:
+    """ID determinístico de um chunk (versão do arquivo + índice)"""
+    return f"{key}:{index}"
+
+
+class FileManifest:
+    """Tabela SQLite com tamanho, mtime e hash de cada arquivo indexado"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or Config.CHROMA_DIR / "manifest.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.existed = self.path.exists()
+        # Usado pela thread de gravação da ingestão, um acesso por vez
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "content_hash TEXT NOT NULL, file_key TEXT NOT NULL, chunk_count INTEGER NOT NULL, "
+            "indexed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    def get_all(self) -> Dict[str, ManifestEntry]:
+        """Todas as entradas, indexadas pelo caminho relativo"""
+        rows = self._conn.execute(
+            "SELECT path, size, mtime_ns, content_hash, file_key, chunk_count, indexed_at FROM files"
+        ).fetchall()
+        return {row[0]: ManifestEntry(*row) for row in rows}
+
+    def upsert(self, entries: Iterable[ManifestEntry]):
+        """Grava ou atualiza entradas"""
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash, file_key, chunk_count, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (e.path, e.size, e.mtime_ns, e.content_hash, e.file_key, e.chunk_count, e.indexed_at or now)
+                for e in entries
+            ]
+        )
+        self._conn.commit()
+
+    def remove(self, paths: Iterable[str]):
+        """Remove entradas de arquivos apagados"""
+        self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in paths])
+        self._conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Valor de configuração gravado junto ao manifesto"""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        """Grava um valor de configuração"""
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        """Fecha a conexão SQLite"""
+        self._conn.close()
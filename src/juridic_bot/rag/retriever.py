@@ -1,33 +1,210 @@
 """
 Sistema de recuperação de documentos
 """
+import asyncio
 import logging
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from langchain_chroma import Chroma
 from langchain.schema import Document
 
 from ..config import Config
+from ..metrics import metrics
+from .cache import EmbeddingCache, LRUCache, normalize_query
+from .context import ContextBuilder
 from .embeddings import EmbeddingService
+from .filters import filter_supported, matches_filter
+from .generations import IndexGeneration, current_dir
+from .hnsw import apply_search_ef, collection_metadata, needs_rebuild
+from .lexical import LexicalIndex
+from .statutes import LawReference, StatuteIndex
+from .vector_index import NumpyVectorStore
 
 logger = logging.getLogger(__name__)
 
 
+class RetrieverClosedError(Exception):
+    """Busca depois de aclose: a geração do índice foi fechada sem substituta"""
+
+
+# Backends de busca vetorial (VECTOR_BACKEND)
+VectorStore = Union[Chroma, NumpyVectorStore]
+
+
+def select_by_score(
+    results: List[Tuple[Document, float]],
+    k: int,
+    min_score: float,
+    gap_ratio: Optional[float] = None,
+    min_k: Optional[int] = None
+) -> List[Tuple[Document, float]]:
+    """Resultados (ordenados por relevância) acima do limiar, até a primeira queda brusca
+
+    Descarta os abaixo de min_score e encerra a lista quando a relevância cai
+    mais que gap_ratio (relativo) de um resultado para o seguinte, mantendo
+    sempre os min_k primeiros que passaram no limiar. No máximo k resultados.
+    """
+    gap_ratio = Config.SCORE_GAP_RATIO if gap_ratio is None else gap_ratio
+    min_k = Config.ADAPTIVE_K_MIN if min_k is None else min_k
+
+    selected = []
+    for doc, score in results:
+        if score < min_score or len(selected) == k:
+            break
+        if gap_ratio > 0 and len(selected) >= min_k:
+            previous = selected[-1][1]
+            if previous > 0 and (previous - score) / previous > gap_ratio:
+                break
+        selected.append((doc, score))
+    return selected
+
+
+def relevance_search_by_vector(
+    vectorstore: VectorStore,
+    embedding: List[float],
+    k: int,
+    filter: Optional[Dict[str, Any]] = None
+) -> List[Tuple[Document, float]]:
+    """Busca por vetor com a relevância de cada chunk (maior = mais próximo)
+
+    Apesar do nome, similarity_search_by_vector_with_relevance_scores devolve
+    a distância (Chroma e NumpyVectorStore); ela é convertida pela mesma
+    função de similarity_search_with_relevance_scores, para que limiar, corte
+    por queda, MMR e cache de respostas recebam o mesmo escore da busca síncrona.
+    """
+    relevance = vectorstore._select_relevance_score_fn()
+    return [
+        (doc, relevance(distance))
+        for doc, distance in vectorstore.similarity_search_by_vector_with_relevance_scores(
+            embedding, k=k, filter=filter
+        )
+    ]
+
+
 class RAGRetriever:
     """Sistema de recuperação de documentos"""
 
     def __init__(self):
         self.embedding_service = EmbeddingService()
-        self.vectorstore = self.load_vectorstore()
+        # Pool limitado para o trabalho síncrono do Chroma fora do event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.RETRIEVER_MAX_WORKERS,
+            thread_name_prefix="chroma-search"
+        )
 
-    def load_vectorstore(self) -> Chroma:
-        """Carrega o vectorstore existente"""
+        # Caches: pergunta -> embedding e (pergunta, k, filtros, geração) -> ids
+        self.embedding_cache = EmbeddingCache(
+            maxsize=Config.QUERY_EMBEDDING_CACHE_SIZE,
+            ttl=Config.QUERY_EMBEDDING_CACHE_TTL,
+            path=Config.CACHE_DIR / "query_embeddings.sqlite3" if Config.QUERY_EMBEDDING_CACHE_PERSIST else None
+        )
+        self.retrieval_cache = LRUCache(
+            maxsize=Config.RETRIEVAL_CACHE_SIZE,
+            ttl=Config.RETRIEVAL_CACHE_TTL,
+            name="retrieval"
+        )
+        # Incrementado a cada recarga do índice; invalida o cache de resultados
+        self.generation = 0
+
+        # Geração do índice em uso (ver generations); trocada inteira por reload
+        self._index = self._open_generation()
+        self._reload_lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._reloading: Optional[asyncio.Task] = None
+
+    @property
+    def vectorstore(self) -> Optional[VectorStore]:
+        return self._index.vectorstore
+
+    @vectorstore.setter
+    def vectorstore(self, vectorstore: Optional[VectorStore]):
+        self._index.vectorstore = vectorstore
+
+    @property
+    def lexical(self) -> Optional[LexicalIndex]:
+        return self._index.lexical
+
+    @lexical.setter
+    def lexical(self, index: Optional[LexicalIndex]):
+        self._index.lexical = index
+
+    @property
+    def statutes(self) -> Optional[StatuteIndex]:
+        return self._index.statutes
+
+    @statutes.setter
+    def statutes(self, index: Optional[StatuteIndex]):
+        self._index.statutes = index
+
+    def _open_generation(self) -> IndexGeneration:
+        """Abre o vectorstore e os índices auxiliares da geração ativa"""
+        path = current_dir()
+        return IndexGeneration(
+            path,
+            vectorstore=self.load_vectorstore(path),
+            lexical=self._load_side_index(LexicalIndex, Config.LEXICAL_SEARCH_ENABLED, path),
+            statutes=self._load_side_index(StatuteIndex, Config.STATUTE_INDEX_ENABLED, path)
+        )
+
+    @contextmanager
+    def _acquire(self) -> Iterator[IndexGeneration]:
+        """Geração atual, segura até o fim da busca mesmo que um reload a substitua
+
+        Levanta RetrieverClosedError depois de aclose.
+        """
+        while True:
+            index = self._index
+            if index.acquire():
+                break
+            # reload publica a geração nova antes de fechar a anterior: se a
+            # fechada ainda é a atual, não há substituta (aclose)
+            if self._index is index:
+                raise RetrieverClosedError("Retriever encerrado")
         try:
-            logger.info(f"Tentando carregar vectorstore de: {Config.CHROMA_DIR}")
+            yield index
+        finally:
+            index.release()
+
+    def load_vectorstore(self, path: Optional[Path] = None) -> Optional[VectorStore]:
+        """Carrega o vectorstore existente (da geração ativa, por padrão)
+
+        Com VECTOR_BACKEND=numpy, abre a matriz exportada pela ingestão
+        (NumpyVectorStore); sem ela, usa o Chroma, com o HNSW_SEARCH_EF de
+        Config (M e construction_ef só mudam na reindexação).
+        """
+        path = path or current_dir()
+        if Config.VECTOR_BACKEND == "numpy":
+            if NumpyVectorStore.exists(path):
+                try:
+                    vectorstore = NumpyVectorStore.load(path, self.embedding_service.get_langchain_embeddings())
+                    logger.info(
+                        f"Índice NumPy carregado com {vectorstore.count()} vetores ({vectorstore.dtype})"
+                    )
+                    return vectorstore
+                except Exception as e:
+                    logger.error(f"Erro ao carregar índice NumPy: {e}")
+            logger.warning(f"Índice NumPy indisponível em {path}; usando o Chroma até a próxima reindexação")
+        try:
+            logger.info(f"Tentando carregar vectorstore de: {path}")
             vectorstore = Chroma(
-                persist_directory=str(Config.CHROMA_DIR),
-                embedding_function=self.embedding_service.get_langchain_embeddings()
+                persist_directory=str(path),
+                embedding_function=self.embedding_service.get_langchain_embeddings(),
+                collection_metadata=collection_metadata()
             )
 
+            # O Chroma lê o search_ef ao carregar o índice: gravar antes da primeira busca
+            try:
+                apply_search_ef(vectorstore._collection)
+                if needs_rebuild(vectorstore._collection):
+                    logger.warning("M/construction_ef da coleção diferem de HNSW_M/HNSW_CONSTRUCTION_EF; reindexe")
+            except Exception as e:
+                logger.warning(f"Não foi possível aplicar os parâmetros HNSW: {e}")
+
             # Testar se tem documentos
             try:
                 count = vectorstore._collection.count()
@@ -42,52 +219,396 @@ class RAGRetriever:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None
 
-    def search(self, query: str, k: int = None) -> List[Document]:
-        """Busca documentos similares"""
-        if not self.vectorstore:
-            logger.error("Vectorstore não está disponível")
-            return []
+    def _load_side_index(self, index_class, enabled: bool, directory: Optional[Path] = None):
+        """Abre um índice auxiliar criado pela ingestão (lexical, artigos), se existir"""
+        if not enabled:
+            return None
+        path = (directory or current_dir()) / f"{index_class.name}.sqlite3"
+        if not path.exists():
+            logger.info(f"Índice {index_class.name} não encontrado em {path}")
+            return None
+        try:
+            index = index_class(path)
+            logger.info(f"Índice {index_class.name} carregado com {len(index)} chunks")
+            return index
+        except Exception as e:
+            logger.warning(f"Erro ao carregar índice {index_class.name}: {e}")
+            return None
+
+    def search(self, query: str, k: int = None, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Busca documentos similares (filtros where aplicados pelo Chroma)"""
+        return [doc for doc, _ in self.search_with_scores(query, k, filters)]
 
+    def search_with_scores(
+        self,
+        query: str,
+        k: int = None,
+        filters: Optional[Dict[str, Any]] = None,
+        min_score: Optional[float] = None
+    ) -> List[Tuple[Document, float]]:
+        """Busca documentos similares com a relevância (0 a 1) de cada um
+
+        No máximo k resultados, cortados por select_by_score: trechos abaixo
+        de min_score (padrão MIN_RELEVANCE_SCORE) ficam de fora. Lista vazia
+        significa que não há contexto relevante para a pergunta.
+        """
         k = k or Config.TOP_K
+        min_score = Config.MIN_RELEVANCE_SCORE if min_score is None else min_score
 
-        try:
-            # Busca com score
-            results_with_scores = self.vectorstore.similarity_search_with_score(query, k=k)
+        with self._acquire() as index:
+            if not index.vectorstore:
+                logger.error("Vectorstore não está disponível")
+                return []
 
-            # Log dos resultados
-            for doc, score in results_with_scores:
-                logger.debug(".4f")
+            try:
+                results_with_scores = index.vectorstore.similarity_search_with_relevance_scores(
+                    query, k=k, filter=filters
+                )
+                self._log_scores(results_with_scores)
+                return select_by_score(results_with_scores, k, min_score)
 
-            # Retornar apenas documentos (sem scores)
-            return [doc for doc, _ in results_with_scores]
+            except Exception as e:
+                logger.error(f"Erro na busca: {e}")
+                return []
 
-        except Exception as e:
-            logger.error(f"Erro na busca: {e}")
+    async def asearch(
+        self,
+        query: str,
+        k: int = None,
+        filters: Optional[Dict[str, Any]] = None,
+        weights: Optional[Tuple[float, float]] = None
+    ) -> List[Document]:
+        """Busca documentos similares sem bloquear o event loop (ver asearch_with_scores)"""
+        return [doc for doc, _ in await self.asearch_with_scores(query, k, filters, weights)]
+
+    async def asearch_with_scores(
+        self,
+        query: str,
+        k: int = None,
+        filters: Optional[Dict[str, Any]] = None,
+        weights: Optional[Tuple[float, float]] = None,
+        min_score: Optional[float] = None
+    ) -> List[Tuple[Document, float]]:
+        """Busca documentos similares sem bloquear o event loop, com o score de cada um
+
+        O embedding da consulta é gerado com o cliente assíncrono e a busca
+        vetorial no Chroma roda no pool de threads do retriever. Perguntas
+        repetidas reaproveitam o embedding e o resultado da busca em cache.
+
+        Com o índice lexical disponível, os resultados do BM25 e da busca
+        vetorial são combinados por Reciprocal Rank Fusion com os pesos
+        (vetorial, lexical). Peso vetorial 0 dispensa o embedding da consulta,
+        a menos que a busca lexical não encontre nada.
+
+        Os candidatos vetoriais passam por select_by_score (limiar de
+        relevância e k adaptativo) antes da fusão; se nenhum passa, a pergunta
+        não tem contexto relevante e o resultado é vazio. O score retornado é
+        a relevância vetorial ou, quando há fusão, o score RRF.
+
+        A busca inteira usa a geração do índice em que começou, mesmo que um
+        reload troque a geração no meio dela.
+        """
+        self._check_generation()
+        k = k or Config.TOP_K
+        min_score = Config.MIN_RELEVANCE_SCORE if min_score is None else min_score
+
+        with self._acquire() as index:
+            if not index.vectorstore:
+                logger.error("Vectorstore não está disponível")
+                return []
+
+            vector_weight, lexical_weight = weights or (Config.VECTOR_WEIGHT, Config.LEXICAL_WEIGHT)
+            if index.lexical is None or not self._lexical_supports(filters):
+                lexical_weight = 0.0
+
+            try:
+                return await self._asearch_index(index, query, k, filters, vector_weight, lexical_weight, min_score)
+            except Exception as e:
+                logger.error(f"Erro na busca: {e}")
+                return []
+
+    async def _asearch_index(
+        self,
+        index: IndexGeneration,
+        query: str,
+        k: int,
+        filters: Optional[Dict[str, Any]],
+        vector_weight: float,
+        lexical_weight: float,
+        min_score: float
+    ) -> List[Tuple[Document, float]]:
+        embedding_key = f"{self.embedding_service.model_key}:{normalize_query(query)}"
+        retrieval_key = (
+            embedding_key, k, self._filters_key(filters), vector_weight, lexical_weight, min_score,
+            self.generation
+        )
+
+        cached = self.retrieval_cache.get(retrieval_key)
+        if cached is not None:
+            documents = await self._run_in_executor(self._fetch_by_ids, index.vectorstore, cached)
+            if documents is not None:
+                return documents
+
+        generation = self.generation
+        candidates = max(k, Config.HYBRID_CANDIDATES)
+
+        lexical_hits = []
+        if lexical_weight > 0:
+            lexical_hits = await self._run_in_executor(index.lexical.search, query, candidates)
+
+        vector_results = []
+        searched_vectors = vector_weight > 0 or not lexical_hits
+        if searched_vectors:
+            embedding = await self.aembed_query(query)
+            vector_results = await self._run_in_executor(
+                partial(
+                    relevance_search_by_vector,
+                    index.vectorstore, embedding, k=candidates if lexical_hits else k, filter=filters
+                )
+            )
+            self._log_scores(vector_results)
+            vector_results = select_by_score(vector_results, len(vector_results), min_score)
+
+        if searched_vectors and not vector_results:
+            # Nada semanticamente próximo: termos em comum no BM25 não bastam
+            results_with_scores = []
+        elif lexical_hits:
+            results_with_scores = await self._run_in_executor(
+                self._fuse, index.vectorstore, vector_results, lexical_hits, k, filters, vector_weight, lexical_weight
+            )
+        else:
+            results_with_scores = vector_results[:k]
+
+        if not results_with_scores:
+            metrics.incr("retrieval.no_context")
+            logger.info("Nenhum trecho relevante para a pergunta")
+
+        # Não guardar resultados de uma geração que foi substituída durante a busca
+        if generation == self.generation:
+            self.retrieval_cache.put(
+                retrieval_key,
+                [(doc.id, score) for doc, score in results_with_scores]
+            )
+
+        return results_with_scores
+
+    def lookup_statute(
+        self,
+        law: LawReference,
+        artigo: Optional[str] = None,
+        paragrafo: Optional[str] = None,
+        k: int = 3
+    ) -> List[Document]:
+        """Chunks de uma referência exata (lei, artigo, parágrafo), sem embedding
+
+        Lista vazia quando o índice de artigos não conhece a referência; nesse
+        caso cabe ao chamador recorrer à busca semântica.
+        """
+        with self._acquire() as index:
+            if index.statutes is None or not index.vectorstore:
+                return []
+
+            ids = index.statutes.lookup(law, artigo, paragrafo, limit=k)
+            metrics.incr(f"statutes.{'hits' if ids else 'misses'}")
+            if not ids:
+                return []
+            by_id = {doc.id: doc for doc in index.vectorstore.get_by_ids(ids)}
+            return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+    async def alookup_statute(
+        self,
+        law: LawReference,
+        artigo: Optional[str] = None,
+        paragrafo: Optional[str] = None,
+        k: int = 3
+    ) -> List[Document]:
+        """lookup_statute no pool de threads do retriever"""
+        return await self._run_in_executor(partial(self.lookup_statute, law, artigo, paragrafo, k))
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embedding da pergunta, reaproveitando o cache quando possível"""
+        embedding_key = f"{self.embedding_service.model_key}:{normalize_query(query)}"
+        embedding = self.embedding_cache.get(embedding_key)
+        if embedding is None:
+            embedding = await self.embedding_service.aembed_query(query)
+            self.embedding_cache.put(embedding_key, embedding)
+        return embedding
+
+    async def _run_in_executor(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    @staticmethod
+    def _fetch_by_ids(
+        vectorstore: VectorStore,
+        ids_with_scores: List[Tuple[str, float]]
+    ) -> Optional[List[Tuple[Document, float]]]:
+        """Recupera documentos de um resultado em cache, na ordem original"""
+        if not ids_with_scores:
             return []
+        ids = [doc_id for doc_id, _ in ids_with_scores]
+        if None in ids:
+            return None
+        by_id = {doc.id: doc for doc in vectorstore.get_by_ids(ids)}
+        if len(by_id) != len(ids):
+            return None
+        return [(by_id[doc_id], score) for doc_id, score in ids_with_scores]
+
+    @staticmethod
+    def _fuse(
+        vectorstore: VectorStore,
+        vector_results: List[Tuple[Document, float]],
+        lexical_hits: List[Tuple[str, float]],
+        k: int,
+        filters: Optional[Dict[str, Any]],
+        vector_weight: float,
+        lexical_weight: float
+    ) -> List[Tuple[Document, float]]:
+        """Reciprocal Rank Fusion: score = soma de peso / (RRF_K + posição) em cada lista"""
+        scores: Dict[str, float] = {}
+        documents: Dict[str, Document] = {}
+
+        for rank, (doc, _) in enumerate(vector_results, 1):
+            documents[doc.id] = doc
+            scores[doc.id] = scores.get(doc.id, 0.0) + vector_weight / (Config.RRF_K + rank)
+        for rank, (doc_id, _) in enumerate(lexical_hits, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + lexical_weight / (Config.RRF_K + rank)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        # Chunks encontrados só pelo BM25: texto e metadados vêm do Chroma
+        missing = [doc_id for doc_id in ranked if doc_id not in documents]
+        if missing:
+            documents.update((doc.id, doc) for doc in vectorstore.get_by_ids(missing))
+
+        results = []
+        for doc_id in ranked:
+            doc = documents.get(doc_id)
+            if doc is None or (filters and not matches_filter(doc.metadata, filters)):
+                continue
+            results.append((doc, scores[doc_id]))
+            if len(results) == k:
+                break
+        return results
+
+    @staticmethod
+    def _log_scores(results_with_scores: List[Tuple[Document, float]]):
+        for doc, score in results_with_scores:
+            logger.debug(f"Relevância {score:.4f}: {doc.metadata.get('source', doc.id)}")
+
+    @staticmethod
+    def _lexical_supports(filters: Optional[Dict[str, Any]]) -> bool:
+        """Os resultados do BM25 só podem ser filtrados com os operadores de matches_filter"""
+        return not filters or filter_supported(filters)
+
+    @staticmethod
+    def _filters_key(filters: Optional[Dict[str, Any]]) -> str:
+        return repr(sorted(filters.items())) if filters else ""
 
-    def format_context(self, documents: List[Document]) -> str:
-        """Formata documentos para contexto do LLM"""
+    def format_context(
+        self,
+        documents: List[Document],
+        scores: Optional[List[float]] = None,
+        budget: Optional[int] = None
+    ) -> str:
+        """Formata documentos para contexto do LLM
+
+        Os trechos passam pelo ContextBuilder: no máximo budget tokens (padrão
+        CONTEXT_TOKEN_BUDGET), sem repetições e com chunks vizinhos unidos.
+        Sem scores, a ordem dos documentos define a relevância.
+        """
         if not documents:
             return ""
 
+        if scores is None:
+            scores = [(len(documents) - i) / len(documents) for i in range(len(documents))]
+        passages = ContextBuilder(budget=budget).build(list(zip(documents, scores)))
+        tokens = sum(passage.tokens for passage in passages)
+        metrics.observe("context.tokens", tokens)
+        logger.debug(f"Contexto: {len(passages)} trechos de {len(documents)} chunks, ~{tokens} tokens")
+
         context_parts = []
-        for i, doc in enumerate(documents, 1):
+        for i, passage in enumerate(passages, 1):
+            doc = passage.documents[0]
             source = doc.metadata.get('source', 'Desconhecido')
             tipo = doc.metadata.get('tipo_documento', 'documento')
-            chunk_info = "[Chunk {}/{}]".format(
-                doc.metadata.get('chunk_index', '?'),
-                doc.metadata.get('total_chunks', '?')
-            )
+            if len(passage.documents) == 1:
+                chunk_info = "[Chunk {}/{}]".format(
+                    doc.metadata.get('chunk_index', '?'),
+                    doc.metadata.get('total_chunks', '?')
+                )
+            else:
+                chunk_info = "[Chunks {}-{}/{}]".format(
+                    doc.metadata.get('chunk_index'),
+                    passage.documents[-1].metadata.get('chunk_index'),
+                    doc.metadata.get('total_chunks', '?')
+                )
+
+            # Trecho idêntico em outros arquivos, indexado uma única vez
+            outras_fontes = "; ".join(dict.fromkeys(
+                source for member in passage.documents
+                for source in (member.metadata.get('outras_fontes') or "").split("; ") if source
+            ))
+            if outras_fontes:
+                chunk_info += " (também em: {})".format(outras_fontes)
 
             context_parts.append(
                 "**Documento {}** - {} ({}) {}\n"
                 "{}\n"
-                "---".format(i, source, tipo, chunk_info, doc.page_content)
+                "---".format(i, source, tipo, chunk_info, passage.text)
             )
 
         return "\n\n".join(context_parts)
 
     def reload(self):
-        """Recarrega o vectorstore (útil após reindexação)"""
-        self.vectorstore = self.load_vectorstore()
-        logger.info("Vectorstore recarregado")
\ No newline at end of file
+        """Recarrega o vectorstore (útil após reindexação)
+
+        A geração ativa é aberta por completo antes da troca, que é uma única
+        atribuição: buscas em andamento terminam na geração anterior, fechada
+        quando a última delas termina.
+        """
+        with self._reload_lock:
+            index = self._open_generation()
+            previous, self._index = self._index, index
+            # Sem gerações, a recarga reabre o mesmo diretório e o cliente do Chroma é compartilhado
+            previous.retire(release_store=previous.path != index.path)
+            self.generation += 1
+            self.retrieval_cache.clear()
+        logger.info(f"Vectorstore recarregado de {index.path} (geração {self.generation})")
+
+    async def areload(self):
+        """reload no pool de threads: as buscas seguem na geração atual enquanto a nova é aberta"""
+        await self._run_in_executor(self.reload)
+
+    def _check_generation(self):
+        """Recarrega em segundo plano se a ingestão publicou outra geração (a cada INDEX_RELOAD_CHECK_INTERVAL)"""
+        now = time.monotonic()
+        interval = Config.INDEX_RELOAD_CHECK_INTERVAL
+        if interval <= 0 or now - self._checked_at < interval or self._reloading is not None:
+            return
+        self._checked_at = now
+        if current_dir() == self._index.path:
+            return
+        logger.info("Nova geração do índice publicada; recarregando")
+        self._reloading = asyncio.create_task(self.areload())
+        self._reloading.add_done_callback(self._reload_done)
+
+    def _reload_done(self, task: asyncio.Task):
+        self._reloading = None
+        if not task.cancelled() and task.exception():
+            logger.error(f"Erro ao recarregar o índice: {task.exception()}")
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Estatísticas dos caches de consulta"""
+        return {
+            "query_embedding": self.embedding_cache.stats(),
+            "retrieval": self.retrieval_cache.stats(),
+        }
+
+    async def aclose(self):
+        """Libera o pool de threads e os clientes HTTP assíncronos"""
+        if self._reloading is not None:
+            self._reloading.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.embedding_cache.close()
+        self._index.retire()
+        await self.embedding_service.aclose()
@@ -0,0 +1,275 @@
+"""
+Índice estruturado de leis e artigos (referências exatas sem busca semântica)
+"""
+import datetime
+import logging
+import re
+import sqlite3
+import threading
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Espécie normativa -> sigla usada no índice
+_KINDS = {
+    "lei complementar": "lc", "lc": "lc",
+    "decreto lei": "decreto-lei", "dl": "decreto-lei",
+    "decreto": "decreto",
+    "emenda constitucional": "ec", "ec": "ec",
+    "medida provisoria": "mp", "mp": "mp",
+    "lei": "lei",
+}
+
+# "Lei nº 8.112, de 11 de dezembro de 1990", "Lei 8112/90", "lei_8112_1990", "LC 101/2000"
+# (aplicado ao texto já sem acentos e em minúsculas)
+_LAW_REFERENCE = re.compile(
+    r"(?<![a-z])(?P<tipo>lei complementar|decreto[- ]lei|decreto|emenda constitucional|medida provisoria"
+    r"|lei|lc|dl|ec|mp)"
+    r"[\W_]*(?:n[o.]*[\W_]*)?"
+    r"(?P<numero>\d{1,3}(?:\.\d{3})+|\d+)(?![\d.]*\d)"
+    r"(?:/(?P<ano2>\d{2})\b|[\W_]+(?:de[\W_]+(?:\d{1,2}o?[\W_]+de[\W_]+[a-z]+[\W_]+de[\W_]+)?)?(?P<ano>\d{4})\b)?"
+)
+
+_CONSTITUTION = re.compile(r"(?<![a-z])(?:constituicao(?: da republica| federal)?|cf(?:/88)?|crfb)(?![a-z])")
+
+# Artigos no início da linha, para chunks sem os metadados do LegalTextSplitter
+_ARTICLE_IN_TEXT = re.compile(r"(?:^|\n)[ \t]*Art\.?[ \t]*(\d+(?:\.\d{3})*)", re.IGNORECASE)
+_ARTICLE_NUMBER = re.compile(r"(\d+)(?:-([a-z]))?")
+
+# Maior intervalo de artigos registrado para um único chunk (artigo .. artigo_final)
+_MAX_ARTICLE_RANGE = 200
+# Limite de parâmetros por consulta SQLite
+_SQL_BATCH = 500
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+@dataclass(frozen=True)
+class LawReference:
+    """Identificação de um ato normativo: espécie, número e ano"""
+
+    tipo: str
+    numero: str
+    ano: Optional[int] = None
+
+
+def _full_year(year: str) -> int:
+    value = int(year)
+    if len(year) == 4:
+        return value
+    # "8.112/90" -> 1990; "13.709/18" -> 2018
+    current = datetime.date.today().year % 100
+    return 2000 + value if value <= current else 1900 + value
+
+
+def parse_law_reference(text: str) -> Optional[LawReference]:
+    """Primeira referência a um ato normativo no texto, ou None
+
+    >>> parse_law_reference("LEI Nº 8.112, DE 11 DE DEZEMBRO DE 1990")
+    LawReference(tipo='lei', numero='8112', ano=1990)
+    """
+    folded = _fold(text)
+    match = _LAW_REFERENCE.search(folded)
+    if match:
+        year = match.group("ano") or match.group("ano2")
+        return LawReference(
+            tipo=_KINDS[match.group("tipo").replace("-", " ")],
+            numero=match.group("numero").replace(".", ""),
+            ano=_full_year(year) if year else None
+        )
+    if _CONSTITUTION.search(folded):
+        return LawReference(tipo="cf", numero="cf", ano=1988)
+    return None
+
+
+def parse_article(text: str) -> Optional[str]:
+    """'Art. 5º' -> '5', 'art 1.000' -> '1000', '5º-A' -> '5-a'"""
+    folded = _fold(text).replace(".", "").replace("o", "").replace(" ", "")
+    match = _ARTICLE_NUMBER.search(folded)
+    if not match:
+        return None
+    number, suffix = match.groups()
+    return f"{int(number)}-{suffix}" if suffix else str(int(number))
+
+
+def parse_paragraph(text: str) -> Optional[str]:
+    """'§ 2º' -> '2', 'Parágrafo único' -> 'unico'"""
+    folded = _fold(text)
+    if "unico" in folded:
+        return "unico"
+    match = re.search(r"\d+", folded)
+    return match.group(0) if match else None
+
+
+def _article_sort_key(article: str) -> int:
+    return int(article.split("-")[0])
+
+
+def chunk_articles(chunk: Document) -> List[str]:
+    """Artigos contidos no chunk: metadados do LegalTextSplitter ou "Art. N" no texto"""
+    first = chunk.metadata.get("artigo")
+    if first:
+        first = parse_article(str(first))
+        last = parse_article(str(chunk.metadata.get("artigo_final") or "")) or first
+        if not first:
+            return []
+        start, end = _article_sort_key(first), _article_sort_key(last)
+        if first == last or end <= start or end - start > _MAX_ARTICLE_RANGE:
+            return list(dict.fromkeys([first, last]))
+        return [first] + [str(number) for number in range(start + 1, end)] + [last]
+
+    articles = (parse_article(raw) for raw in _ARTICLE_IN_TEXT.findall(chunk.page_content))
+    return list(dict.fromkeys(article for article in articles if article))
+
+
+def chunk_law(chunk: Document) -> Optional[LawReference]:
+    """Ato normativo do chunk: metadado "lei" ou nome do arquivo"""
+    candidates = [chunk.metadata.get("lei")]
+    candidates += [
+        Path(str(chunk.metadata[key])).stem for key in ("caminho_relativo", "source") if chunk.metadata.get(key)
+    ]
+    for value in candidates:
+        reference = parse_law_reference(str(value)) if value else None
+        if reference:
+            return reference
+    return None
+
+
+class StatuteIndex:
+    """Tabela (lei, artigo, parágrafo) -> chunk, indexada em SQLite
+
+    Preenchida na ingestão a partir dos metadados do LegalTextSplitter
+    (lei, artigo, artigo_final, paragrafo). Uma consulta como "art. 37 da
+    Lei 8.112/90" é resolvida pelo índice B-tree, sem embedding. Mantido
+    junto com cada upsert/remoção no Chroma, no mesmo diretório da coleção.
+    """
+
+    name = "statutes"
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or Config.CHROMA_DIR / "statutes.sqlite3"
+        self.existed = self.path.exists()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Compartilhado pelas threads de busca do retriever e pela thread de gravação da ingestão
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "tipo TEXT NOT NULL, numero TEXT NOT NULL, ano INTEGER, artigo TEXT, artigo_ordem INTEGER, "
+            "paragrafo TEXT, chunk_ordem INTEGER NOT NULL, chunk_id TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS articles_lookup ON articles (numero, artigo, ano);"
+            "CREATE INDEX IF NOT EXISTS articles_law ON articles (numero, artigo_ordem, chunk_ordem);"
+            "CREATE INDEX IF NOT EXISTS articles_chunk ON articles (chunk_id);"
+        )
+        self._conn.commit()
+
+    def upsert(self, chunks: Iterable[Document]):
+        """Registra (ou atualiza) as referências dos chunks"""
+        chunks = list(chunks)
+        rows = []
+        for chunk in chunks:
+            law = chunk_law(chunk)
+            if not law:
+                continue
+            paragrafo = parse_paragraph(str(chunk.metadata.get("paragrafo") or "")) or None
+            order = chunk.metadata.get("chunk_index", 0)
+            articles = chunk_articles(chunk) or [None]
+            rows.extend(
+                (law.tipo, law.numero, law.ano, article,
+                 _article_sort_key(article) if article else None, paragrafo, order, chunk.id)
+                for article in articles
+            )
+
+        with self._lock, self._conn:
+            self._delete([chunk.id for chunk in chunks])
+            self._conn.executemany(
+                "INSERT INTO articles (tipo, numero, ano, artigo, artigo_ordem, paragrafo, chunk_ordem, chunk_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def delete(self, chunk_ids: Iterable[str]):
+        """Remove as referências dos chunks"""
+        with self._lock, self._conn:
+            self._delete(list(chunk_ids))
+
+    def _delete(self, chunk_ids: List[str]):
+        for start in range(0, len(chunk_ids), _SQL_BATCH):
+            batch = chunk_ids[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(f"DELETE FROM articles WHERE chunk_id IN ({placeholders})", batch)
+
+    def clear(self):
+        """Remove todas as referências"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM articles")
+
+    def lookup(self, law: LawReference, artigo: Optional[str] = None, paragrafo: Optional[str] = None,
+               limit: int = 5) -> List[str]:
+        """IDs dos chunks da lei (e do artigo, se informado), na ordem do texto
+
+        Sem artigo, retorna o início da lei (ementa e primeiros artigos). Com
+        parágrafo, os chunks que começam nele vêm primeiro.
+        """
+        conditions = ["numero = ?"]
+        params: List = [law.numero]
+        if law.ano:
+            conditions.append("ano = ?")
+            params.append(law.ano)
+        if law.tipo != "lei":
+            # "Lei 8.112" pode estar registrada como outra espécie; siglas explícitas restringem
+            conditions.append("tipo = ?")
+            params.append(law.tipo)
+        if artigo:
+            conditions.append("artigo = ?")
+            params.append(artigo)
+
+        # Um chunk com vários artigos tem uma linha por artigo: agrupar e ordenar pela primeira
+        order = "MIN(chunk_ordem)"
+        if paragrafo:
+            order = "MIN(paragrafo IS NOT ?), MIN(chunk_ordem)"
+            params.append(paragrafo)
+        elif not artigo:
+            order = "MIN(artigo_ordem IS NULL), MIN(artigo_ordem), MIN(chunk_ordem)"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT chunk_id FROM articles WHERE {' AND '.join(conditions)} "
+                f"GROUP BY chunk_id ORDER BY {order} LIMIT ?",
+                params
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(DISTINCT chunk_id) FROM articles").fetchone()[0]
+
+    def close(self):
+        """Fecha a conexão SQLite"""
+        self._conn.close()
+
+
+def parse_statute_query(text: str) -> Tuple[Optional[LawReference], Optional[str], Optional[str]]:
+    """(lei, artigo, parágrafo) de uma consulta como "art. 37, § 6º, da CF" """
+    law = parse_law_reference(text)
+    folded = _fold(text)
+    article_match = re.search(r"\bart(?:igo)?s?\.?\s*(\d+(?:\.\d{3})*(?:\s*o)?(?:-[a-z])?)", folded)
+    paragraph_match = re.search(r"(?:§|paragrafo)\s*(\d+|unico)", folded)
+    return (
+        law,
+        parse_article(article_match.group(1)) if article_match else None,
+        parse_paragraph(paragraph_match.group(0)) if paragraph_match else None,
+    )
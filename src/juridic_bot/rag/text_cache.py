@@ -0,0 +1,131 @@
+"""
+Cache em disco do texto extraído dos documentos
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from importlib import metadata
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# Incrementar quando a extração mudar de forma que invalide o texto já salvo
+EXTRACTION_VERSION = 1
+
+# Bibliotecas cuja versão altera o texto extraído
+_LOADER_PACKAGES = ("langchain-community", "pypdf", "docx2txt", "unstructured")
+
+
+def loader_version() -> str:
+    """Versão da extração: constante local mais versões dos loaders instalados"""
+    versions = [str(EXTRACTION_VERSION)]
+    for package in _LOADER_PACKAGES:
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=-")
+    return ";".join(versions)
+
+
+class ExtractedTextCache:
+    """Páginas extraídas (texto e metadados) comprimidas em disco
+
+    A chave é o hash do conteúdo do arquivo, a extensão e a versão dos
+    loaders; mudar o chunking ou o enriquecimento de metadados reaproveita o
+    texto sem abrir o PDF de novo. Cada entrada é um arquivo .json.gz
+    gravado de forma atômica, o que permite uso por vários processos do pool
+    de ingestão. O tamanho total é limitado por prune(), que remove as
+    entradas usadas há mais tempo.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.path = path or Config.TEXT_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else Config.TEXT_CACHE_MAX_MB * 1024 * 1024
+        self.version = loader_version()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def key(self, content_hash: str, suffix: str) -> str:
+        return hashlib.sha256(f"{content_hash}:{suffix.lower()}:{self.version}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json.gz"
+
+    def get(self, content_hash: str, file_path: Path) -> Optional[List[Document]]:
+        """Páginas salvas para o conteúdo do arquivo, ou None"""
+        entry_path = self._entry_path(self.key(content_hash, file_path.suffix))
+        try:
+            with gzip.open(entry_path, "rt", encoding="utf-8") as f:
+                pages = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Entrada corrompida no cache de texto ({entry_path.name}): {e}")
+            entry_path.unlink(missing_ok=True)
+            return None
+
+        # Marcar uso recente para a remoção por LRU
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        documents = []
+        for page in pages:
+            page["metadata"]["source"] = str(file_path)  # O mesmo conteúdo pode estar em outro caminho
+            documents.append(Document(page_content=page["page_content"], metadata=page["metadata"]))
+        return documents
+
+    def put(self, content_hash: str, file_path: Path, documents: List[Document]):
+        """Salva as páginas extraídas de um arquivo"""
+        entry_path = self._entry_path(self.key(content_hash, file_path.suffix))
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        pages = [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents]
+
+        tmp_name = None
+        try:
+            fd, tmp_name = tempfile.mkstemp(dir=entry_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+                f.write(json.dumps(pages, ensure_ascii=False, default=str).encode("utf-8"))
+            os.replace(tmp_name, entry_path)
+        except Exception as e:
+            logger.warning(f"Erro ao salvar no cache de texto: {e}")
+            if tmp_name:
+                Path(tmp_name).unlink(missing_ok=True)
+
+    def _entries(self) -> List[Tuple[Path, os.stat_result]]:
+        return [(path, path.stat()) for path in self.path.glob("*/*.json.gz")]
+
+    def stats(self) -> dict:
+        """Quantidade de entradas e tamanho total"""
+        entries = self._entries()
+        return {
+            "path": str(self.path),
+            "entries": len(entries),
+            "size_bytes": sum(stat.st_size for _, stat in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def prune(self) -> int:
+        """Remove as entradas usadas há mais tempo até caber em max_bytes; retorna quantas"""
+        entries = sorted(self._entries(), key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = 0
+
+        for path, stat in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            removed += 1
+
+        if removed:
+            logger.info(f"{removed} entradas removidas do cache de texto extraído")
+        return removed
@@ -0,0 +1,288 @@
+"""
+Índice vetorial em NumPy: matriz de embeddings num arquivo mapeado na memória
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..config import Config
+from .filters import filter_supported, matches_filter
+
+logger = logging.getLogger(__name__)
+
+# IDs, textos e metadados dos chunks, na ordem das linhas da matriz
+VECTORS_META = "vectors.json"
+DTYPES = ("float32", "float16", "int8")
+# Linhas convertidas para float32 por vez na busca sobre float16 e int8 (blocos que cabem no cache da CPU)
+_BLOCK_ROWS = 1024
+# Linhas de cada filtro guardadas (combinações de área e tipo de documento)
+_FILTER_CACHE_SIZE = 64
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantização escalar simétrica por linha: (matriz int8, escalas em float32)"""
+    scales = (np.abs(vectors).max(axis=1) / 127).astype(np.float32)
+    scales[scales == 0] = 1
+    return np.rint(vectors / scales[:, None]).astype(np.int8), scales
+
+
+def export_vectors(collection, directory: Path, dtype: Optional[str] = None, page_size: Optional[int] = None) -> int:
+    """Exporta os embeddings de uma coleção do Chroma para a matriz do NumpyVectorStore
+
+    As linhas são normalizadas (produto escalar = cosseno). A matriz ganha um
+    nome novo a cada exportação e o vectors.json, que aponta para ela, é
+    trocado por último com os.replace: quem já abriu o índice continua com
+    os arquivos antigos até recarregar. Retorna a quantidade de vetores.
+
+    Em int8 são gravadas duas matrizes: a quantizada, com uma escala por
+    linha (maior valor absoluto / 127), percorrida em toda busca, e a
+    matriz em float32, lida só nas linhas dos candidatos reavaliados.
+    """
+    dtype = dtype or Config.VECTOR_INDEX_DTYPE
+    if dtype not in DTYPES:
+        raise ValueError(f"VECTOR_INDEX_DTYPE inválido: {dtype} (use {', '.join(DTYPES)})")
+    page_size = page_size or Config.INGEST_SCAN_PAGE_SIZE
+    count = collection.count()
+    name = f"vectors-{time.time_ns()}"
+    matrix_path = directory / f"{name}.npy"
+    quantized_path = directory / f"{name}-int8.npy"
+    scales_path = directory / f"{name}-scales.npy"
+    matrix = quantized = scales = None
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+
+    while len(ids) < count:
+        page = collection.get(
+            include=["embeddings", "documents", "metadatas"], limit=page_size, offset=len(ids)
+        )
+        if not len(page["ids"]):
+            break
+        vectors = np.asarray(page["embeddings"], dtype=np.float32)
+        if matrix is None:
+            shape = (count, vectors.shape[1])
+            matrix = np.lib.format.open_memmap(
+                matrix_path, mode="w+", dtype="float32" if dtype == "int8" else dtype, shape=shape
+            )
+            if dtype == "int8":
+                quantized = np.lib.format.open_memmap(quantized_path, mode="w+", dtype=np.int8, shape=shape)
+                scales = np.lib.format.open_memmap(scales_path, mode="w+", dtype=np.float32, shape=(count,))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        rows = slice(len(ids), len(ids) + len(vectors))
+        matrix[rows] = vectors
+        if quantized is not None:
+            quantized[rows], scales[rows] = quantize_int8(vectors)
+        ids.extend(page["ids"])
+        documents.extend(text or "" for text in page["documents"])
+        metadatas.extend(metadata or {} for metadata in page["metadatas"])
+
+    if matrix is None:
+        np.save(matrix_path, np.zeros((0, 0), dtype="float32" if dtype == "int8" else dtype))
+    for array in (matrix, quantized, scales):
+        if array is not None:
+            array.flush()
+    del matrix, quantized, scales
+    if len(ids) != count:
+        raise RuntimeError(f"Coleção mudou durante a exportação ({len(ids)} de {count} vetores)")
+
+    meta = {"matrix": matrix_path.name, "ids": ids, "documents": documents, "metadatas": metadatas}
+    if dtype == "int8" and count:
+        meta.update(quantized=quantized_path.name, scales=scales_path.name)
+    meta_path = directory / VECTORS_META
+    temporary = meta_path.with_name(f"{VECTORS_META}.tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(temporary, meta_path)
+
+    current = {matrix_path, quantized_path, scales_path}
+    for old in directory.glob("vectors-*.npy"):
+        if old not in current:
+            old.unlink(missing_ok=True)
+    logger.info(f"{count} vetores exportados para o índice NumPy ({dtype})")
+    return count
+
+
+class NumpyVectorStore:
+    """Busca vetorial exata sobre a matriz exportada por export_vectors
+
+    A matriz fica num .npy aberto com mmap_mode: o sistema carrega as
+    páginas sob demanda e processos que abrem o mesmo arquivo compartilham a
+    memória. Cada busca é um produto matriz-vetor seguido de argpartition,
+    sem cliente, SQLite nem conversões além dos k resultados; várias
+    consultas podem ser feitas numa única multiplicação de matrizes.
+
+    Implementa as operações do Chroma usadas pelo RAGRetriever (busca com
+    relevância, busca por vetor e get_by_ids) com os mesmos escores: como no
+    langchain_chroma, a busca por texto devolve a relevância (cosseno) e as
+    buscas por vetor devolvem a distância de cosseno (1 - cosseno), que
+    _select_relevance_score_fn converte em relevância. Os filtros where são
+    avaliados por matches_filter uma vez por filtro (as linhas que passam
+    ficam em cache) e a busca filtrada lê só essas linhas da matriz.
+
+    Em float16 a matriz ocupa metade da memória, mas cada busca converte as
+    linhas para float32: a busca em lote compensa a conversão. Em int8
+    (quantized, com scales por linha) a varredura lê um quarto dos bytes e
+    escolhe rescore x k candidatos, reavaliados pelo produto escalar exato
+    nas linhas da matriz em float32; com rescore=0 valem os escores
+    aproximados.
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        embedding_function=None,
+        quantized: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None,
+        rescore: Optional[int] = None
+    ):
+        self.matrix = matrix
+        self.quantized = quantized
+        self.scales = scales
+        self.rescore = rescore if rescore is not None else Config.VECTOR_RESCORE_FACTOR
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.embedding_function = embedding_function
+        self._rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self._filters: Dict[str, np.ndarray] = {}
+        self._filters_lock = threading.Lock()
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        """Se a ingestão já exportou a matriz para o diretório"""
+        return (directory / VECTORS_META).exists()
+
+    @classmethod
+    def load(cls, directory: Path, embedding_function=None, rescore: Optional[int] = None) -> "NumpyVectorStore":
+        """Abre o índice exportado em directory, com as matrizes mapeadas na memória"""
+        with open(directory / VECTORS_META, encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(directory / meta["matrix"], mmap_mode="r")
+        quantized = np.load(directory / meta["quantized"], mmap_mode="r") if "quantized" in meta else None
+        scales = np.load(directory / meta["scales"]) if "scales" in meta else None
+        return cls(
+            matrix, meta["ids"], meta["documents"], meta["metadatas"], embedding_function,
+            quantized=quantized, scales=scales, rescore=rescore
+        )
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dtype(self) -> str:
+        """Tipo da matriz percorrida nas buscas"""
+        return "int8" if self.quantized is not None else str(self.matrix.dtype)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes lidos numa busca sem filtro (a matriz percorrida e as escalas)"""
+        if self.quantized is not None:
+            return self.quantized.nbytes + self.scales.nbytes
+        return self.matrix.nbytes
+
+    def similarity_search_with_relevance_scores(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Chunks mais próximos da pergunta, com a relevância (cosseno)"""
+        embedding = self.embedding_function.embed_query(query)
+        relevance = self._select_relevance_score_fn()
+        return [
+            (doc, relevance(distance))
+            for doc, distance in self.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter)
+        ]
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self, embedding: Sequence[float], k: int = 4, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Chunks mais próximos do vetor, com a distância de cosseno (como o Chroma)"""
+        return self.similarity_search_by_vectors_with_relevance_scores([embedding], k=k, filter=filter)[0]
+
+    def similarity_search_by_vectors_with_relevance_scores(
+        self, embeddings: Sequence[Sequence[float]], k: int = 4, filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Busca em lote: (chunk, distância de cosseno) por vetor, numa única multiplicação de matrizes"""
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if not self.ids:
+            return [[] for _ in queries]
+        rows = self._filter_rows(filter)
+        k = min(k, len(self.ids) if rows is None else len(rows))
+        if k <= 0:
+            return [[] for _ in queries]
+
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        scores = self._scores(queries, rows)
+        rescore = self.quantized is not None and self.rescore > 0
+        candidates = min(k * self.rescore, scores.shape[1]) if rescore else k
+        top = np.argpartition(scores, -candidates, axis=1)[:, -candidates:]
+        results = []
+        for query, row_scores, positions in zip(queries, scores, top):
+            matrix_rows = positions if rows is None else rows[positions]
+            if rescore:
+                # Produto escalar exato só nos candidatos, em ordem de linha (leitura sequencial do mmap)
+                order = np.argsort(matrix_rows)
+                matrix_rows = matrix_rows[order]
+                candidate_scores = np.asarray(self.matrix[matrix_rows], dtype=np.float32) @ query
+            else:
+                candidate_scores = row_scores[positions]
+            ranked = np.argsort(-candidate_scores)[:k]
+            results.append([(self._document(matrix_rows[i]), 1.0 - float(candidate_scores[i])) for i in ranked])
+        return results
+
+    @staticmethod
+    def _select_relevance_score_fn() -> Callable[[float], float]:
+        """Distância de cosseno -> relevância, a mesma função do Chroma com hnsw:space=cosine"""
+        return lambda distance: 1.0 - distance
+
+    def get_by_ids(self, ids: Sequence[str]) -> List[Document]:
+        """Chunks pelos IDs, na ordem pedida (IDs desconhecidos são ignorados)"""
+        return [self._document(self._rows[doc_id]) for doc_id in ids if doc_id in self._rows]
+
+    def _scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Similaridade (consultas x linhas) em float32; rows restringe às linhas de um filtro
+
+        Em int8 o resultado é aproximado: produto com a linha quantizada vezes a escala da linha.
+        """
+        matrix = self.matrix if self.quantized is None else self.quantized
+        if rows is not None:
+            matrix = matrix[rows]
+        if matrix.dtype == np.float32:
+            return np.asarray(queries @ matrix.T)
+        # Sem BLAS para float16 e int8: converter a matriz em blocos, sem cópia inteira em float32
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), _BLOCK_ROWS):
+            block = matrix[start:start + _BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        if self.quantized is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+    def _filter_rows(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Linhas que passam no filtro where (None = todas)"""
+        if not where:
+            return None
+        key = repr(sorted(where.items()))
+        rows = self._filters.get(key)
+        if rows is None:
+            if not filter_supported(where):
+                raise ValueError(f"Filtro não suportado pelo índice NumPy: {where}")
+            rows = np.flatnonzero([matches_filter(metadata, where) for metadata in self.metadatas])
+            with self._filters_lock:
+                if len(self._filters) >= _FILTER_CACHE_SIZE:
+                    self._filters.clear()
+                self._filters[key] = rows
+        return rows
+
+    def _document(self, row: int) -> Document:
+        return Document(id=self.ids[row], page_content=self.documents[row], metadata=dict(self.metadatas[row]))
@@ -0,0 +1,69 @@
+"""
+Testes para o cache semântico de respostas
+"""
+from src.juridic_bot.llm.answer_cache import SemanticAnswerCache
+
+
+def make_cache(**kwargs):
+    params = {"max_distance": 0.05, "max_entries": 10, "ttl": 0}
+    params.update(kwargs)
+    return SemanticAnswerCache(**params)
+
+
+class TestSemanticAnswerCache:
+    """Testes da classe SemanticAnswerCache"""
+
+    def test_hit_for_near_duplicate_question(self):
+        """Testa reaproveitamento para pergunta parafraseada"""
+        cache = make_cache()
+        cache.store("g1", "O que é legalidade?", [1.0, 0.0, 0.0], ["a", "b"], 0, "modelo", "Resposta")
+
+        assert cache.lookup("g1", [0.99, 0.05, 0.0], ["b", "a"], 0, "modelo") == "Resposta"
+        assert cache.stats()["hits"] == 1
+
+    def test_miss_for_distant_question(self):
+        """Testa que perguntas diferentes não reaproveitam resposta"""
+        cache = make_cache()
+        cache.store("g1", "O que é legalidade?", [1.0, 0.0, 0.0], ["a"], 0, "modelo", "Resposta")
+
+        assert cache.lookup("g1", [0.0, 1.0, 0.0], ["a"], 0, "modelo") is None
+
+    def test_miss_when_context_generation_or_model_differ(self):
+        """Testa invalidação por trechos, geração do índice e modelo"""
+        cache = make_cache()
+        cache.store("g1", "Pergunta", [1.0, 0.0], ["a"], 0, "modelo", "Resposta")
+
+        assert cache.lookup("g1", [1.0, 0.0], ["c"], 0, "modelo") is None
+        assert cache.lookup("g1", [1.0, 0.0], ["a"], 1, "modelo") is None
+        assert cache.lookup("g1", [1.0, 0.0], ["a"], 0, "outro") is None
+
+    def test_scopes_are_isolated(self):
+        """Testa isolamento entre servidores"""
+        cache = make_cache()
+        cache.store("g1", "Pergunta", [1.0, 0.0], ["a"], 0, "modelo", "Resposta")
+
+        assert cache.lookup("g2", [1.0, 0.0], ["a"], 0, "modelo") is None
+
+    def test_lru_eviction(self):
+        """Testa descarte da resposta menos usada"""
+        cache = make_cache(max_entries=2)
+        cache.store("g1", "p1", [1.0, 0.0, 0.0], ["a"], 0, "m", "r1")
+        cache.store("g1", "p2", [0.0, 1.0, 0.0], ["a"], 0, "m", "r2")
+        cache.lookup("g1", [1.0, 0.0, 0.0], ["a"], 0, "m")
+        cache.store("g1", "p3", [0.0, 0.0, 1.0], ["a"], 0, "m", "r3")
+
+        assert cache.lookup("g1", [0.0, 1.0, 0.0], ["a"], 0, "m") is None
+        assert cache.lookup("g1", [1.0, 0.0, 0.0], ["a"], 0, "m") == "r1"
+        assert cache.stats()["size"] == 2
+
+    def test_flush_and_inspect(self):
+        """Testa limpeza por escopo e listagem das perguntas"""
+        cache = make_cache()
+        cache.store("g1", "p1", [1.0, 0.0], ["a"], 0, "m", "r1")
+        cache.store("g2", "p2", [1.0, 0.0], ["a"], 0, "m", "r2")
+
+        assert [e["query"] for e in cache.stats("g1")["entries"]] == ["p1"]
+        assert cache.flush("g1") == 1
+        assert cache.stats()["size"] == 1
+        assert cache.flush() == 1
+        assert cache.stats()["size"] == 0
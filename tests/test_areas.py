@@ -0,0 +1,55 @@
+"""
+Testes para a classificação de áreas do direito e os filtros de metadados
+"""
+import pytest
+from src.juridic_bot.rag.areas import AREA_GERAL, classify_area
+from src.juridic_bot.rag.filters import filter_supported, matches_filter, metadata_filter
+
+
+class TestClassifyArea:
+    """Testes do classificador de área por palavras-chave"""
+
+    @pytest.mark.parametrize("query, area", [
+        ("Quais os requisitos do estágio probatório do servidor público na Lei 8.112?", "Administrativo"),
+        ("Qual a pena do crime de peculato?", "Penal"),
+        ("O que é fato gerador do ICMS?", "Tributario"),
+        ("Quem tem direito ao auxílio-doença do INSS?", "Previdenciario"),
+    ])
+    def test_classifies_clear_queries(self, query, area):
+        """Testa perguntas com termos característicos de uma área"""
+        assert classify_area(query) == area
+
+    def test_uncertain_query_returns_none(self):
+        """Testa que perguntas genéricas ou empatadas não são classificadas"""
+        assert classify_area("O que é legalidade?") is None
+        assert classify_area("crime de licitação") is None
+
+
+class TestMetadataFilter:
+    """Testes da montagem e avaliação dos filtros where"""
+
+    def test_builds_chroma_where(self):
+        """Testa filtro vazio, simples, combinado e com a área geral"""
+        assert metadata_filter() is None
+        assert metadata_filter(area_direito="Penal") == {"area_direito": "Penal"}
+        assert metadata_filter(area_direito="Penal", tipo_documento="lei") == {
+            "$and": [{"area_direito": "Penal"}, {"tipo_documento": "lei"}]
+        }
+        assert metadata_filter(area_direito="Penal", include_general=True) == {
+            "area_direito": {"$in": ["Penal", AREA_GERAL]}
+        }
+
+    def test_matches_filter(self):
+        """Testa a avaliação local do filtro nos metadados de um chunk"""
+        where = metadata_filter(area_direito="Penal", tipo_documento="lei", include_general=True)
+
+        assert matches_filter({"area_direito": "Penal", "tipo_documento": "lei"}, where)
+        assert matches_filter({"area_direito": AREA_GERAL, "tipo_documento": "lei"}, where)
+        assert not matches_filter({"area_direito": "Civil", "tipo_documento": "lei"}, where)
+        assert not matches_filter({"area_direito": "Penal", "tipo_documento": "sumula"}, where)
+
+    def test_filter_supported(self):
+        """Testa que operadores desconhecidos desativam a avaliação local"""
+        assert filter_supported({"$and": [{"area_direito": "Penal"}, {"ano": {"$in": [1990]}}]})
+        assert not filter_supported({"ano": {"$gte": 1990}})
+        assert not filter_supported({"$and": [{"area_direito": "Penal"}, {"$not": {}}]})
@@ -0,0 +1,84 @@
+"""
+Testes para o micro-batching de embeddings
+"""
+import asyncio
+import pytest
+from src.juridic_bot.metrics import metrics
+from src.juridic_bot.rag.batcher import EmbeddingMicroBatcher
+
+
+def make_embedder():
+    """Cria função de embeddings falsa que registra os lotes recebidos"""
+    batches = []
+
+    async def embed_batch(texts):
+        batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    return embed_batch, batches
+
+
+class TestEmbeddingMicroBatcher:
+    """Testes da classe EmbeddingMicroBatcher"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_call(self):
+        """Testa que perguntas na mesma janela vão em uma chamada"""
+        metrics.reset()
+        embed_batch, batches = make_embedder()
+        batcher = EmbeddingMicroBatcher(embed_batch, window_ms=20, max_batch_size=64)
+
+        results = await asyncio.gather(*(batcher.embed("x" * n) for n in range(1, 6)))
+
+        assert results == [[float(n)] for n in range(1, 6)]
+        assert len(batches) == 1
+        assert metrics.histogram("embedding.query_batch_size")["max"] == 5
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_flushes_immediately(self):
+        """Testa que o lote é enviado ao atingir o tamanho máximo"""
+        embed_batch, batches = make_embedder()
+        batcher = EmbeddingMicroBatcher(embed_batch, window_ms=10_000, max_batch_size=2)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.embed("a"), batcher.embed("bb")),
+            timeout=1
+        )
+
+        assert results == [[1.0], [2.0]]
+        assert batches == [["a", "bb"]]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_texts_sent_once(self):
+        """Testa que textos repetidos na janela são enviados uma vez"""
+        embed_batch, batches = make_embedder()
+        batcher = EmbeddingMicroBatcher(embed_batch, window_ms=5, max_batch_size=64)
+
+        results = await asyncio.gather(batcher.embed("art. 5"), batcher.embed("art. 5"))
+
+        assert results[0] == results[1]
+        assert batches == [["art. 5"]]
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter(self):
+        """Testa que falhas na API chegam a todos os chamadores do lote"""
+        async def failing(texts):
+            raise RuntimeError("embedding error")
+
+        batcher = EmbeddingMicroBatcher(failing, window_ms=5, max_batch_size=64)
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_partial_response_fails_every_waiter(self):
+        """Testa que uma resposta com menos vetores que textos falha o lote em vez de deixá-lo esperando"""
+        async def partial(texts):
+            return [[1.0]]
+
+        batcher = EmbeddingMicroBatcher(partial, window_ms=5, max_batch_size=64)
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True), 1
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
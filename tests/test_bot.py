@@ -1,10 +1,15 @@
 """
 Testes para o bot Discord
 """
+import asyncio
+import time
 import pytest
 from unittest.mock import Mock, patch, AsyncMock, PropertyMock
 import discord
+from langchain.schema import Document
 from src.juridic_bot.bot.bot import JuridicBot
+from src.juridic_bot.bot.scheduler import QueryScheduler
+from src.juridic_bot.llm.client import STREAM_INTERRUPTED_SUFFIX, StreamInterruptedError
 
 
 class TestJuridicBot:
@@ -101,6 +106,7 @@ class TestJuridicBot:
             call_args = message.reply.call_args[0][0]
             assert "assistente jurídico" in call_args.lower()
 
+    @patch('src.juridic_bot.config.Config.STREAM_RESPONSES', False)
     @patch('src.juridic_bot.bot.bot.RAGRetriever')
     @patch('src.juridic_bot.bot.bot.LLMClient')
     @pytest.mark.asyncio
@@ -109,12 +115,12 @@ class TestJuridicBot:
         with patch.object(JuridicBot, 'user', new_callable=PropertyMock) as mock_user:
             # Mock do retriever
             mock_retriever = Mock()
-            mock_retriever.search.return_value = []
+            mock_retriever.asearch_with_scores = AsyncMock(return_value=[])
             mock_rag_retriever.return_value = mock_retriever
 
             # Mock do LLM client
             mock_llm = Mock()
-            mock_llm.generate_conversational.return_value = "Devido processo legal é uma garantia..."
+            mock_llm.agenerate_conversational = AsyncMock(return_value="Devido processo legal é uma garantia...")
             mock_llm_client.return_value = mock_llm
 
             bot = JuridicBot()
@@ -133,10 +139,155 @@ class TestJuridicBot:
             await bot.handle_query(message)
 
             # Verificar se chamou o LLM
-            mock_llm.generate_conversational.assert_called_once()
+            mock_llm.agenerate_conversational.assert_awaited_once()
             # Verificar se respondeu
             message.reply.assert_called_once()
 
+    @patch('src.juridic_bot.config.Config.STREAM_RESPONSES', True)
+    @patch('src.juridic_bot.bot.bot.RAGRetriever')
+    @patch('src.juridic_bot.bot.bot.LLMClient')
+    @pytest.mark.asyncio
+    async def test_handle_query_streams_response(self, mock_llm_client, mock_rag_retriever):
+        """Testa entrega em streaming da resposta"""
+        with patch.object(JuridicBot, 'user', new_callable=PropertyMock) as mock_user:
+            mock_retriever = Mock()
+            mock_retriever.asearch_with_scores = AsyncMock(return_value=[])
+            mock_rag_retriever.return_value = mock_retriever
+
+            async def fake_stream(query, context):
+                for delta in ["Devido ", "processo ", "legal..."]:
+                    yield delta
+
+            mock_llm = Mock()
+            mock_llm.generate_stream = fake_stream
+            mock_llm_client.return_value = mock_llm
+
+            bot = JuridicBot()
+            mock_user.return_value.id = 12345
+
+            sent = Mock()
+            sent.edit = AsyncMock()
+            message = Mock()
+            message.content = f"<@{bot.user.id}> o que é devido processo legal?"
+            message.author = Mock()
+            message.author.id = 67890
+            message.reply = AsyncMock(return_value=sent)
+            message.channel = Mock()
+            message.channel.typing.return_value.__aenter__ = AsyncMock()
+            message.channel.typing.return_value.__aexit__ = AsyncMock()
+
+            await bot.handle_query(message)
+
+            # Primeira mensagem com os primeiros tokens, resto por edição
+            message.reply.assert_called_once_with("Devido ")
+            assert sent.edit.call_args[1]["content"] == "Devido processo legal..."
+
+    @patch('src.juridic_bot.config.Config.STREAM_RESPONSES', False)
+    @patch('src.juridic_bot.bot.bot.RAGRetriever')
+    @patch('src.juridic_bot.bot.bot.LLMClient')
+    @pytest.mark.asyncio
+    async def test_answer_query_uses_semantic_cache(self, mock_llm_client, mock_rag_retriever):
+        """Testa que perguntas equivalentes reaproveitam a resposta"""
+        doc = Document(page_content="Art. 37...", metadata={"source": "cf.pdf"}, id="cf:0")
+
+        mock_retriever = Mock()
+        mock_retriever.asearch_with_scores = AsyncMock(return_value=[(doc, 0.9)])
+        mock_retriever.aembed_query = AsyncMock(return_value=[1.0, 0.0])
+        mock_retriever.format_context.return_value = "contexto"
+        mock_retriever.generation = 0
+        mock_rag_retriever.return_value = mock_retriever
+
+        mock_llm = Mock()
+        mock_llm.model = "modelo"
+        mock_llm.agenerate_conversational = AsyncMock(return_value="Legalidade é...")
+        mock_llm_client.return_value = mock_llm
+
+        bot = JuridicBot()
+        first = await bot.answer_query("o que é legalidade?", k=3, scope="1")
+        second = await bot.answer_query("O que é legalidade", k=3, scope="1")
+        other_guild = await bot.answer_query("o que é legalidade?", k=3, scope="2")
+
+        assert first.answer == second.answer == "Legalidade é..."
+        assert second.cached is True
+        assert other_guild.cached is False
+        assert mock_llm.agenerate_conversational.await_count == 2
+
+    @patch('src.juridic_bot.bot.bot.RAGRetriever')
+    @patch('src.juridic_bot.bot.bot.LLMClient')
+    @pytest.mark.asyncio
+    async def test_interrupted_stream_is_not_cached(self, mock_llm_client, mock_rag_retriever):
+        """Testa que a resposta truncada por erro no streaming não entra no cache de respostas"""
+        doc = Document(page_content="Art. 37...", metadata={"source": "cf.pdf"}, id="cf:0")
+
+        mock_retriever = Mock()
+        mock_retriever.asearch_with_scores = AsyncMock(return_value=[(doc, 0.9)])
+        mock_retriever.aembed_query = AsyncMock(return_value=[1.0, 0.0])
+        mock_retriever.format_context.return_value = "contexto"
+        mock_retriever.generation = 0
+        mock_rag_retriever.return_value = mock_retriever
+
+        async def broken_stream(query, context):
+            yield "Legalidade "
+            raise StreamInterruptedError("Connection reset")
+
+        mock_llm = Mock()
+        mock_llm.model = "modelo"
+        mock_llm.generate_stream = broken_stream
+        mock_llm_client.return_value = mock_llm
+
+        bot = JuridicBot()
+        delivered = []
+        result = await bot.answer_query("o que é legalidade?", k=3, scope="1", on_delta=AsyncMock(
+            side_effect=delivered.append
+        ))
+
+        assert result.answer == "Legalidade " + STREAM_INTERRUPTED_SUFFIX and result.complete is False
+        assert delivered == ["Legalidade ", STREAM_INTERRUPTED_SUFFIX]
+        assert bot.answer_cache.stats("1")["entries"] == []
+
+    @patch('src.juridic_bot.config.Config.STREAM_RESPONSES', False)
+    @patch('src.juridic_bot.bot.bot.RAGRetriever')
+    @patch('src.juridic_bot.bot.bot.LLMClient')
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_queries_are_coalesced(self, mock_llm_client, mock_rag_retriever):
+        """Testa que menções idênticas simultâneas geram uma única resposta do LLM"""
+        with patch.object(JuridicBot, 'user', new_callable=PropertyMock) as mock_user:
+            async def slow_search(query, k=None, filters=None):
+                await asyncio.sleep(0.05)
+                return []
+
+            mock_retriever = Mock()
+            mock_retriever.asearch_with_scores = AsyncMock(side_effect=slow_search)
+            mock_rag_retriever.return_value = mock_retriever
+
+            mock_llm = Mock()
+            mock_llm.agenerate_conversational = AsyncMock(return_value="Resposta compartilhada")
+            mock_llm_client.return_value = mock_llm
+
+            bot = JuridicBot()
+            mock_user.return_value.id = 12345
+
+            messages = []
+            for i in range(3):
+                message = Mock()
+                message.content = f"<@{bot.user.id}> O que é legalidade?"
+                message.guild.id = 1
+                message.author = Mock()
+                message.author.id = i
+                message.reply = AsyncMock()
+                message.channel = Mock()
+                message.channel.send = AsyncMock()
+                message.channel.typing.return_value.__aenter__ = AsyncMock()
+                message.channel.typing.return_value.__aexit__ = AsyncMock()
+                messages.append(message)
+
+            await asyncio.gather(*(bot.handle_query(message) for message in messages))
+
+            mock_retriever.asearch_with_scores.assert_awaited_once()
+            mock_llm.agenerate_conversational.assert_awaited_once()
+            for message in messages:
+                message.reply.assert_called_once_with("Resposta compartilhada")
+
     @patch('src.juridic_bot.bot.bot.RAGRetriever')
     @patch('src.juridic_bot.bot.bot.LLMClient')
     @pytest.mark.asyncio
@@ -145,7 +296,7 @@ class TestJuridicBot:
         with patch.object(JuridicBot, 'user', new_callable=PropertyMock) as mock_user:
             # Mock do retriever que falha
             mock_retriever = Mock()
-            mock_retriever.search.side_effect = Exception("RAG Error")
+            mock_retriever.asearch_with_scores = AsyncMock(side_effect=Exception("RAG Error"))
             mock_rag_retriever.return_value = mock_retriever
 
             bot = JuridicBot()
@@ -168,6 +319,100 @@ class TestJuridicBot:
             call_args = message.reply.call_args[0][0]
             assert any(word in call_args.lower() for word in ["ops", "problema", "erro", "desculpe"])
 
+    @patch('src.juridic_bot.config.Config.STREAM_RESPONSES', False)
+    @patch('src.juridic_bot.bot.bot.RAGRetriever')
+    @patch('src.juridic_bot.bot.bot.LLMClient')
+    @pytest.mark.asyncio
+    async def test_handle_query_runs_concurrently(self, mock_llm_client, mock_rag_retriever):
+        """Testa que consultas simultâneas não se bloqueiam no event loop"""
+        with patch.object(JuridicBot, 'user', new_callable=PropertyMock) as mock_user:
+            async def slow_search(query, k=None, filters=None):
+                await asyncio.sleep(0.2)
+                return []
+
+            mock_retriever = Mock()
+            mock_retriever.asearch_with_scores = AsyncMock(side_effect=slow_search)
+            mock_rag_retriever.return_value = mock_retriever
+
+            mock_llm = Mock()
+            mock_llm.agenerate_conversational = AsyncMock(return_value="Resposta")
+            mock_llm_client.return_value = mock_llm
+
+            bot = JuridicBot()
+            bot.scheduler = QueryScheduler(max_in_flight=10)
+            mock_user.return_value.id = 12345
+
+            messages = []
+            for i in range(5):
+                message = Mock()
+                message.content = f"<@{bot.user.id}> pergunta {i}"
+                message.author = Mock()
+                message.author.id = i
+                message.reply = AsyncMock()
+                message.channel = Mock()
+                message.channel.typing.return_value.__aenter__ = AsyncMock()
+                message.channel.typing.return_value.__aexit__ = AsyncMock()
+                messages.append(message)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(bot.handle_query(message) for message in messages))
+            elapsed = time.perf_counter() - start
+
+            # Tempo total próximo da maior latência, não da soma
+            assert elapsed < 0.5
+            for message in messages:
+                message.reply.assert_called_once()
+
+    @patch('src.juridic_bot.bot.bot.RAGRetriever')
+    @patch('src.juridic_bot.bot.bot.LLMClient')
+    @pytest.mark.asyncio
+    async def test_handle_query_replies_busy_when_queue_full(self, mock_llm_client, mock_rag_retriever):
+        """Testa resposta rápida de fila cheia"""
+        with patch.object(JuridicBot, 'user', new_callable=PropertyMock) as mock_user:
+            bot = JuridicBot()
+            bot.scheduler = QueryScheduler(max_in_flight=1, max_queue_depth=0)
+            bot.scheduler.in_flight = 1  # Simular vaga ocupada
+            mock_user.return_value.id = 12345
+
+            message = Mock()
+            message.content = f"<@{bot.user.id}> pergunta"
+            message.author = Mock()
+            message.author.id = 67890
+            message.reply = AsyncMock()
+
+            with patch.object(bot, 'answer_message', new_callable=AsyncMock) as mock_answer:
+                await bot.handle_query(message)
+                mock_answer.assert_not_called()
+
+            message.reply.assert_called_once()
+            assert "fila" in message.reply.call_args[0][0].lower()
+
+    @patch('src.juridic_bot.bot.bot.RAGRetriever')
+    @patch('src.juridic_bot.bot.bot.LLMClient')
+    @pytest.mark.asyncio
+    async def test_failed_queue_notice_keeps_question(self, mock_llm_client, mock_rag_retriever):
+        """Testa que a falha ao avisar a posição na fila não descarta a pergunta"""
+        with patch.object(JuridicBot, 'user', new_callable=PropertyMock) as mock_user:
+            bot = JuridicBot()
+            bot.scheduler = QueryScheduler(max_in_flight=1, max_queue_depth=5)
+            bot.scheduler.in_flight = 1  # Simular vaga ocupada
+            mock_user.return_value.id = 12345
+
+            message = Mock()
+            message.content = f"<@{bot.user.id}> pergunta"
+            message.guild = None
+            message.author = Mock()
+            message.author.id = 67890
+            message.reply = AsyncMock(side_effect=discord.Forbidden(Mock(status=403), "sem permissão"))
+
+            with patch.object(bot, 'answer_message', new_callable=AsyncMock, return_value="ok") as mock_answer:
+                task = asyncio.create_task(bot.handle_query(message))
+                await asyncio.sleep(0.01)
+                assert bot.scheduler.queued == 1
+                bot.scheduler._release()  # Vaga liberada
+                await task
+                mock_answer.assert_awaited_once_with(message, "pergunta")
+
     @patch('src.juridic_bot.bot.bot.RAGRetriever')
     @patch('src.juridic_bot.bot.bot.LLMClient')
     def test_mention_removal(self, mock_llm_client, mock_rag_retriever):
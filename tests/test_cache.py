@@ -0,0 +1,78 @@
+"""
+Testes para os caches de consulta
+"""
+from unittest.mock import patch
+from src.juridic_bot.rag.cache import EmbeddingCache, LRUCache, normalize_query
+
+
+class TestNormalizeQuery:
+    """Testes da normalização de perguntas"""
+
+    def test_normalizes_case_spacing_and_punctuation(self):
+        """Testa normalização de caixa, espaços e pontuação final"""
+        assert normalize_query("  O que é   Princípio da LEGALIDADE?  ") == "o que é princípio da legalidade"
+
+    def test_keeps_accents(self):
+        """Testa que acentos são preservados (mudam o sentido em português)"""
+        assert normalize_query("Ação") != normalize_query("Acao")
+
+
+class TestLRUCache:
+    """Testes da classe LRUCache"""
+
+    def test_evicts_least_recently_used(self):
+        """Testa descarte do item menos usado"""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_ttl_expiration(self):
+        """Testa expiração por TTL"""
+        cache = LRUCache(maxsize=10, ttl=60)
+        with patch("src.juridic_bot.rag.cache.time.monotonic", return_value=1000):
+            cache.put("a", 1)
+        with patch("src.juridic_bot.rag.cache.time.monotonic", return_value=1030):
+            assert cache.get("a") == 1
+        with patch("src.juridic_bot.rag.cache.time.monotonic", return_value=1100):
+            assert cache.get("a") is None
+
+    def test_hit_miss_counters(self):
+        """Testa contadores de acerto e erro"""
+        cache = LRUCache(maxsize=10)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+
+class TestEmbeddingCache:
+    """Testes da classe EmbeddingCache"""
+
+    def test_persists_across_instances(self, tmp_path):
+        """Testa que embeddings sobrevivem a reinicializações"""
+        path = tmp_path / "query_embeddings.sqlite3"
+        cache = EmbeddingCache(maxsize=10, path=path)
+        cache.put("modelo:art. 5", [0.5, -0.25, 1.0])
+        cache.close()
+
+        reopened = EmbeddingCache(maxsize=10, path=path)
+        assert reopened.get("modelo:art. 5") == [0.5, -0.25, 1.0]
+        assert reopened.stats()["hits"] == 1
+        reopened.close()
+
+    def test_memory_only_without_path(self):
+        """Testa funcionamento apenas em memória"""
+        cache = EmbeddingCache(maxsize=10)
+        assert cache.get("x") is None
+        cache.put("x", [1.0])
+        assert cache.get("x") == [1.0]
@@ -0,0 +1,82 @@
+"""
+Testes para a montagem do contexto com orçamento de tokens
+"""
+from unittest.mock import patch
+from langchain_core.documents import Document
+from src.juridic_bot.rag.context import ContextBuilder, context_budget
+
+
+def chunk(index, text, source="lei.txt", tokens=100):
+    return Document(
+        page_content=text,
+        metadata={"source": source, "file_key": source, "chunk_index": index, "total_chunks": 10, "num_tokens": tokens},
+        id=f"{source}:{index}"
+    )
+
+
+class TestContextBuilder:
+    """Testes da classe ContextBuilder"""
+
+    def test_adjacent_chunks_are_merged_without_overlap(self):
+        """Testa que chunks consecutivos viram um trecho, sem o texto repetido"""
+        overlap = "servidor público estável só perderá o cargo"
+        first = chunk(3, f"Art. 41. São estáveis após três anos de efetivo exercício. O {overlap}")
+        second = chunk(4, f"{overlap} em virtude de sentença judicial transitada em julgado.")
+
+        passages = ContextBuilder(budget=1000).build([(second, 0.8), (first, 0.9)])
+
+        assert len(passages) == 1
+        assert passages[0].documents == [first, second]
+        assert passages[0].text.count(overlap) == 1
+        assert passages[0].text.endswith("transitada em julgado.")
+        assert passages[0].score == 0.9
+
+    def test_repeated_phrase_between_articles_is_kept(self):
+        """Testa que uma frase comum a dois artigos vizinhos, sem sobreposição, não corta o segundo"""
+        first = chunk(3, "Art. 7º O infrator será notificado conforme disposto nesta Lei.")
+        second = chunk(4, "Art. 8º A multa será aplicada conforme disposto nesta Lei. Parágrafo único. O valor...")
+
+        passages = ContextBuilder(budget=1000).build([(first, 0.9), (second, 0.8)])
+
+        assert passages[0].text == f"{first.page_content}\n{second.page_content}"
+
+    def test_continuation_prefix_is_merged(self):
+        """Testa que a sobreposição depois do prefixo de continuação do artigo é removida com ele"""
+        overlap = "ou mediante processo administrativo em que lhe seja assegurada"
+        first = chunk(3, f"Art. 41. São estáveis... O servidor perderá o cargo {overlap}")
+        second = chunk(4, f"Art. 41 (continuação)\n{overlap} ampla defesa.")
+
+        passages = ContextBuilder(budget=1000).build([(first, 0.9), (second, 0.8)])
+
+        assert passages[0].text == f"{first.page_content} ampla defesa."
+
+    def test_near_duplicates_are_dropped(self):
+        """Testa que um trecho repetido de outro arquivo não entra duas vezes"""
+        text = "Art. 5º Todos são iguais perante a lei, sem distinção de qualquer natureza."
+        original = chunk(0, text, source="cf.txt")
+        copy = chunk(7, text + " ", source="vade_mecum.txt")
+        other = chunk(2, "Art. 37. A administração pública obedecerá aos princípios da legalidade.", source="cf.txt")
+
+        passages = ContextBuilder(budget=1000).build([(original, 0.9), (copy, 0.88), (other, 0.7)])
+
+        assert [passage.documents for passage in passages] == [[original], [other]]
+
+    def test_budget_uses_precomputed_tokens(self):
+        """Testa que chunks além do orçamento ficam de fora e os menores ainda cabem"""
+        big = chunk(0, "Súmula Vinculante 13 nepotismo", source="sv.txt", tokens=500)
+        medium = chunk(5, "Lei 8.112 estágio probatório", source="lei.txt", tokens=400)
+        small = chunk(9, "Decreto 9.739 concursos públicos", source="decreto.txt", tokens=50)
+
+        with patch('src.juridic_bot.rag.context.estimate_tokens') as estimate:
+            passages = ContextBuilder(budget=700, mmr_lambda=1.0).build([(big, 0.9), (medium, 0.8), (small, 0.7)])
+
+        estimate.assert_not_called()
+        assert [passage.documents for passage in passages] == [[big], [small]]
+
+    def test_budget_per_model(self):
+        """Testa o orçamento por modelo com fallback para o padrão"""
+        with patch('src.juridic_bot.config.Config.CONTEXT_TOKEN_BUDGETS', "modelo-a=6000, modelo-b=1500"), \
+             patch('src.juridic_bot.config.Config.CONTEXT_TOKEN_BUDGET', 3000):
+            assert context_budget("modelo-b") == 1500
+            assert context_budget("outro") == 3000
+            assert context_budget() == 3000
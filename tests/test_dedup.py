@@ -0,0 +1,107 @@
+"""
+Testes para a detecção de chunks quase duplicados
+"""
+import pytest
+from langchain_core.documents import Document
+from src.juridic_bot.rag.dedup import DedupIndex, MinHasher
+
+TEXTO = (
+    "Art. 5º Todos são iguais perante a lei, sem distinção de qualquer natureza, garantindo-se aos "
+    "brasileiros e aos estrangeiros residentes no País a inviolabilidade do direito à vida, à liberdade, "
+    "à igualdade, à segurança e à propriedade, nos termos seguintes: I - homens e mulheres são iguais "
+    "em direitos e obrigações, nos termos desta Constituição; II - ninguém será obrigado a fazer ou "
+    "deixar de fazer alguma coisa senão em virtude de lei; III - ninguém será submetido a tortura nem "
+    "a tratamento desumano ou degradante;"
+)
+
+OUTRO_TEXTO = (
+    "Art. 37. A administração pública direta e indireta de qualquer dos Poderes da União, dos Estados, "
+    "do Distrito Federal e dos Municípios obedecerá aos princípios de legalidade, impessoalidade, "
+    "moralidade, publicidade e eficiência e, também, ao seguinte: I - os cargos, empregos e funções "
+    "públicas são acessíveis aos brasileiros que preencham os requisitos estabelecidos em lei;"
+)
+
+
+def chunk(chunk_id, text, path):
+    return Document(id=chunk_id, page_content=text, metadata={"caminho_relativo": path})
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DedupIndex(tmp_path / "dedup.sqlite3", threshold=0.85, min_chars=100)
+    yield index
+    index.close()
+
+
+class TestMinHasher:
+    """Testes da classe MinHasher"""
+
+    def test_similarity_estimate(self):
+        """Testa que formatação não altera a assinatura e textos distintos divergem"""
+        hasher = MinHasher()
+        base = hasher.signature(TEXTO)
+
+        reformatado = hasher.signature(TEXTO.upper().replace(" ", "  ").replace("á", "a"))
+        assert (base == reformatado).all()
+        assert (base == hasher.signature(OUTRO_TEXTO)).mean() < 0.2
+
+    def test_short_text_has_no_signature(self):
+        """Testa que textos com menos palavras que o shingle são ignorados"""
+        assert MinHasher().signature("Art. 1º Revoga-se") is None
+
+
+class TestDedupIndex:
+    """Testes da classe DedupIndex"""
+
+    def test_duplicate_from_other_file(self, index):
+        """Testa que a cópia em outro arquivo é descartada e vira fonte do canônico"""
+        canonical, duplicates = index.filter([chunk("a:0", TEXTO, "cf88.pdf"), chunk("a:1", OUTRO_TEXTO, "cf88.pdf")])
+        index.commit()
+        assert [doc.id for doc in canonical] == ["a:0", "a:1"]
+        assert duplicates == []
+
+        canonical, duplicates = index.filter([chunk("b:0", TEXTO.replace("lei", "Lei"), "vade_mecum.pdf")])
+        index.commit()
+        assert canonical == []
+        assert [(doc.id, canonical_id) for doc, canonical_id in duplicates] == [("b:0", "a:0")]
+        assert index.sources(["a:0", "a:1"]) == {"a:0": ["vade_mecum.pdf"], "a:1": []}
+        assert index.stats() == {"canonical": 2, "duplicates": 1}
+
+    def test_same_file_and_short_chunks_are_kept(self, index):
+        """Testa que repetições no mesmo arquivo e chunks curtos não são descartados"""
+        canonical, duplicates = index.filter([
+            chunk("a:0", TEXTO, "cf88.pdf"),
+            chunk("a:1", TEXTO, "cf88.pdf"),
+            chunk("b:0", "Art. 1º Revoga-se.", "outra.pdf"),
+            chunk("c:0", "Art. 1º Revoga-se.", "mais_uma.pdf"),
+        ])
+
+        assert len(canonical) == 4
+        assert duplicates == []
+
+    def test_release_orphans_duplicates(self, index):
+        """Testa que duplicatas cujo canônico saiu são apontadas para reprocessamento"""
+        index.filter([chunk("a:0", TEXTO, "cf88.pdf")])
+        index.filter([chunk("b:0", TEXTO, "vade_mecum.pdf")])
+        index.commit()
+
+        assert index.release(["b:0"]) == {"a:0"}
+        assert index.orphaned_paths() == []
+
+        index.filter([chunk("b:0", TEXTO, "vade_mecum.pdf")])
+        index.release(["a:0"])
+        assert index.orphaned_paths() == ["vade_mecum.pdf"]
+
+        # Reprocessado, o chunk passa a ser o canônico
+        canonical, _ = index.filter([chunk("b:0", TEXTO, "vade_mecum.pdf")])
+        assert [doc.id for doc in canonical] == ["b:0"]
+        assert index.orphaned_paths() == []
+
+    def test_rollback_discards_pending_signatures(self, index):
+        """Testa que assinaturas de um lote não gravado no índice são descartadas"""
+        index.filter([chunk("a:0", TEXTO, "cf88.pdf")])
+        index.rollback()
+
+        canonical, duplicates = index.filter([chunk("b:0", TEXTO, "vade_mecum.pdf")])
+        assert [doc.id for doc in canonical] == ["b:0"]
+        assert duplicates == []
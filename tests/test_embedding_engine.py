@@ -0,0 +1,179 @@
+"""
+Testes para o motor de embeddings da ingestão, contra um servidor local falso
+"""
+import json
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from openai import BadRequestError, OpenAI
+from src.juridic_bot.rag.embedding_engine import AdaptiveLimiter, EmbeddingEngine, EmbeddingError
+
+
+class FakeEmbeddingsServer:
+    """Servidor HTTP que imita /v1/embeddings com falhas programadas"""
+
+    def __init__(self):
+        self.failures = []  # Status a devolver nas próximas requisições, em ordem
+        self.requests = []
+        self.dimensions = []  # Campo dimensions de cada requisição (None = ausente)
+        self.active = 0
+        self.max_active = 0
+        self.delay = 0.0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    server.requests.append(body["input"])
+                    server.dimensions.append(body.get("dimensions"))
+                    status = server.failures.pop(0) if server.failures else 200
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                try:
+                    if server.delay:
+                        threading.Event().wait(server.delay)
+                    if status == 200:
+                        payload = {
+                            "object": "list",
+                            "model": body["model"],
+                            "data": [
+                                {"object": "embedding", "index": i, "embedding": [float(len(text)), 1.0]}
+                                for i, text in enumerate(body["input"])
+                            ],
+                            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+                        }
+                    else:
+                        payload = {"error": {"message": f"erro {status}", "type": "erro", "code": None}}
+                    data = json.dumps(payload).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    if status == 429:
+                        self.send_header("Retry-After", "0.05")
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with server._lock:
+                        server.active -= 1
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = FakeEmbeddingsServer()
+    yield server
+    server.close()
+
+
+def make_engine(server, **kwargs):
+    client = OpenAI(api_key="x", base_url=server.base_url, max_retries=0)
+    options = dict(
+        max_batch_tokens=1000, max_batch_inputs=2, concurrency=4, max_retries=3, retry_rounds=1,
+        base_delay=0.01, max_delay=0.05, count_tokens=len
+    )
+    options.update(kwargs)
+    return EmbeddingEngine(client, "modelo-teste", **options)
+
+
+class TestEmbeddingEngine:
+    """Testes da classe EmbeddingEngine"""
+
+    def test_pack_respects_inputs_and_tokens(self):
+        """Testa o agrupamento por quantidade de textos e por tokens"""
+        engine = EmbeddingEngine(
+            None, "modelo", max_batch_tokens=10, max_batch_inputs=3, concurrency=1,
+            max_retries=0, retry_rounds=0, count_tokens=len
+        )
+
+        batches = engine.pack(["aaaa", "bbbb", "c", "d", "e", "ffffffffffff"])
+
+        assert [batch.texts for batch in batches] == [["aaaa", "bbbb", "c"], ["d", "e"], ["ffffffffffff"]]
+        assert batches[1].positions == [3, 4]
+
+    def test_concurrent_batches_keep_order(self, server):
+        """Testa que lotes em paralelo devolvem os vetores na ordem dos textos"""
+        server.delay = 0.05
+        texts = ["a" * (i + 1) for i in range(10)]
+
+        vectors = make_engine(server).embed(texts)
+
+        assert [vector[0] for vector in vectors] == [float(len(text)) for text in texts]
+        assert len(server.requests) == 5
+        assert server.max_active > 1
+
+    def test_dimensions_are_sent_only_when_set(self, server):
+        """Testa que a dimensão reduzida vai na requisição e que o padrão do modelo não envia o campo"""
+        make_engine(server).embed(["a"])
+        make_engine(server, dimensions=256).embed(["a"])
+
+        assert server.dimensions == [None, 256]
+
+    def test_rate_limit_is_retried_and_throttles(self, server):
+        """Testa que 429 com Retry-After é repetido e reduz a concorrência"""
+        server.failures = [429]
+        engine = make_engine(server, concurrency=4)
+
+        vectors = engine.embed(["a", "bb"])
+
+        assert vectors == [[1.0, 1.0], [2.0, 1.0]]
+        assert len(server.requests) == 2
+        assert engine.limiter.limit == 2
+
+    def test_exhausted_batch_is_deferred_to_next_round(self, server):
+        """Testa que um lote que esgota as tentativas é repetido no fim"""
+        server.failures = [500, 500]
+        engine = make_engine(server, max_retries=1, concurrency=1)
+
+        vectors = engine.embed(["a", "bb", "ccc"])
+
+        assert [vector[0] for vector in vectors] == [1.0, 2.0, 3.0]
+
+    def test_raises_after_all_rounds(self, server):
+        """Testa o erro quando nem as rodadas extras resolvem"""
+        server.failures = [503] * 10
+        engine = make_engine(server, max_retries=1, retry_rounds=1, concurrency=1)
+
+        with pytest.raises(EmbeddingError):
+            engine.embed(["a"])
+
+    def test_client_errors_are_not_retried(self, server):
+        """Testa que erros 4xx (exceto 429) não são repetidos"""
+        server.failures = [400]
+        engine = make_engine(server)
+
+        with pytest.raises(BadRequestError):
+            engine.embed(["a"])
+
+        assert len(server.requests) == 1
+
+
+class TestAdaptiveLimiter:
+    """Testes da classe AdaptiveLimiter"""
+
+    def test_throttle_and_recover(self):
+        """Testa a redução em 429 e a recuperação após sucessos"""
+        limiter = AdaptiveLimiter(4, recover_after=2)
+        limiter.throttle(0)
+        assert limiter.limit == 2
+
+        for _ in range(2):
+            limiter.acquire()
+            limiter.release(success=True)
+        assert limiter.limit == 3
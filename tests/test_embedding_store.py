@@ -0,0 +1,61 @@
+"""
+Testes para o armazenamento de embeddings da ingestão
+"""
+import time
+from unittest.mock import Mock
+from src.juridic_bot.rag.embedding_store import CachedEmbeddings, EmbeddingStore, content_hash
+
+
+class TestEmbeddingStore:
+    """Testes da classe EmbeddingStore"""
+
+    def test_roundtrip_by_model_and_hash(self, tmp_path):
+        """Testa gravação e leitura por (modelo, hash)"""
+        store = EmbeddingStore(tmp_path / "embeddings.sqlite3")
+        store.put_many("modelo-a", {"h1": [0.5, 1.0], "h2": [0.25, -1.0]})
+
+        assert store.get_many("modelo-a", ["h1", "h2", "h3"]) == {"h1": [0.5, 1.0], "h2": [0.25, -1.0]}
+        assert store.get_many("modelo-b", ["h1"]) == {}
+        store.close()
+
+    def test_stats_and_prune(self, tmp_path):
+        """Testa estatísticas e limpeza por modelo e por idade"""
+        store = EmbeddingStore(tmp_path / "embeddings.sqlite3")
+        store.put_many("atual", {"h1": [1.0]})
+        store.put_many("antigo", {"h2": [1.0], "h3": [2.0]})
+
+        stats = store.stats()
+        assert stats["entries"] == 3
+        assert stats["models"]["antigo"]["entries"] == 2
+
+        assert store.prune(keep_model="atual") == 2
+        assert store.prune(older_than_days=1) == 0
+
+        store._conn.execute("UPDATE embeddings SET last_used = ?", (time.time() - 10 * 86400,))
+        assert store.prune(older_than_days=1) == 1
+        assert store.stats()["entries"] == 0
+        store.close()
+
+
+class TestCachedEmbeddings:
+    """Testes da classe CachedEmbeddings"""
+
+    def test_only_misses_reach_the_api(self, tmp_path):
+        """Testa que apenas textos inéditos são enviados à API"""
+        store = EmbeddingStore(tmp_path / "embeddings.sqlite3")
+        store.put_many("modelo", {content_hash("Art. 1º"): [1.0, 0.0]})
+
+        base = Mock()
+        base.embed_documents.side_effect = lambda texts: [[float(len(t)), 1.0] for t in texts]
+        embeddings = CachedEmbeddings(base, store, "modelo")
+
+        vectors = embeddings.embed_documents(["Art. 1º", "Art. 2º", "Art. 1º"])
+
+        base.embed_documents.assert_called_once_with(["Art. 2º"])
+        assert vectors[0] == vectors[2] == [1.0, 0.0]
+        assert vectors[1] == [7.0, 1.0]
+
+        # Segunda execução: nenhuma chamada nova
+        embeddings.embed_documents(["Art. 2º"])
+        assert base.embed_documents.call_count == 1
+        store.close()
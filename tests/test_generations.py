@@ -0,0 +1,152 @@
+"""
+Testes para as gerações do índice (build em cópia e troca atômica)
+"""
+import os
+import sqlite3
+import time
+from contextlib import closing
+import pytest
+from unittest.mock import Mock, patch
+from src.juridic_bot.rag.generations import (
+    CURRENT_FILE,
+    RETIRED_FILE,
+    IndexGeneration,
+    collect_garbage,
+    create_generation,
+    current_dir,
+    current_generation,
+    discard,
+    publish,
+)
+
+
+def write_version(path, version):
+    """Grava a versão num banco SQLite (criado se preciso)"""
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (version TEXT)")
+        conn.execute("DELETE FROM meta")
+        conn.execute("INSERT INTO meta VALUES (?)", (version,))
+
+
+def read_version(path):
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute("SELECT version FROM meta").fetchone()[0]
+
+
+@pytest.fixture
+def chroma_dir(tmp_path):
+    """CHROMA_DIR temporário com um índice no layout antigo"""
+    path = tmp_path / "chroma"
+    path.mkdir()
+    write_version(path / "chroma.sqlite3", "v1")
+    write_version(path / "lexical.sqlite3", "v1")
+    with patch('src.juridic_bot.config.Config.CHROMA_DIR', path):
+        yield path
+
+
+def age(path, seconds):
+    """Recua o horário de substituição de uma geração"""
+    marker = path / RETIRED_FILE
+    marker.write_text(str(float(marker.read_text()) - seconds))
+
+
+class TestLayout:
+    """Testes de criação, publicação e limpeza das gerações"""
+
+    def test_legacy_layout_is_current(self, chroma_dir):
+        """Testa que sem CURRENT o índice ativo é o próprio CHROMA_DIR"""
+        assert current_generation() is None
+        assert current_dir() == chroma_dir
+
+    def test_create_copies_active_index(self, chroma_dir):
+        """Testa que a nova geração começa como cópia do índice ativo, sem alterá-lo"""
+        generation, path = create_generation()
+        write_version(path / "chroma.sqlite3", "v2")
+
+        assert path.parent.name == "generations"
+        assert read_version(path / "lexical.sqlite3") == "v1"
+        assert read_version(chroma_dir / "chroma.sqlite3") == "v1"
+        assert current_dir() == chroma_dir
+
+        publish(generation)
+        assert current_generation() == generation
+        assert current_dir() == path
+        assert (chroma_dir / RETIRED_FILE).exists()
+        assert not (chroma_dir / f"{CURRENT_FILE}.tmp").exists()
+
+        # A próxima geração copia a publicada, sem as outras gerações
+        _, following = create_generation()
+        assert read_version(following / "chroma.sqlite3") == "v2"
+        assert not (following / "generations").exists()
+
+    def test_copy_is_consistent_during_writes(self, chroma_dir):
+        """Testa que a cópia inclui o que está no WAL de uma conexão aberta, sem copiar o WAL"""
+        writer = sqlite3.connect(chroma_dir / "chroma.sqlite3")
+        writer.execute("PRAGMA journal_mode=WAL")
+        writer.execute("PRAGMA wal_autocheckpoint=0")
+        writer.execute("UPDATE meta SET version = 'v1-wal'")
+        writer.commit()
+        assert (chroma_dir / "chroma.sqlite3-wal").exists()
+
+        _, path = create_generation()
+        writer.close()
+
+        assert read_version(path / "chroma.sqlite3") == "v1-wal"
+        assert not (path / "chroma.sqlite3-wal").exists()
+
+    def test_garbage_collection_respects_grace(self, chroma_dir):
+        """Testa que gerações substituídas só são apagadas depois da espera"""
+        first, first_path = create_generation()
+        publish(first)
+        second, second_path = create_generation()
+        publish(second)
+
+        assert collect_garbage(grace=60) == []
+        assert first_path.exists() and (chroma_dir / "chroma.sqlite3").exists()
+
+        age(first_path, 120)
+        age(chroma_dir, 120)
+        assert collect_garbage(grace=60) == [first_path, chroma_dir]
+        assert not first_path.exists()
+        assert sorted(child.name for child in chroma_dir.iterdir()) == [CURRENT_FILE, "generations"]
+        assert second_path.exists()
+
+    def test_interrupted_build_is_collected(self, chroma_dir):
+        """Testa que um build nunca publicado sai depois da espera, pelo mtime"""
+        _, path = create_generation()
+        old = time.time() - 120
+        os.utime(path, (old, old))
+
+        assert collect_garbage(grace=60) == [path]
+        assert current_dir() == chroma_dir
+
+    def test_discard(self, chroma_dir):
+        """Testa que descartar uma geração não publicada não muda o índice ativo"""
+        _, path = create_generation()
+        discard(path)
+        assert not path.exists()
+        assert current_dir() == chroma_dir
+
+
+class TestIndexGeneration:
+    """Testes da contagem de buscas e fechamento das gerações"""
+
+    def test_retired_generation_closes_after_last_search(self, tmp_path):
+        """Testa que a geração substituída só fecha quando a busca em andamento termina"""
+        lexical = Mock()
+        generation = IndexGeneration(tmp_path, vectorstore=Mock(), lexical=lexical)
+
+        assert generation.acquire()
+        generation.retire()
+        lexical.close.assert_not_called()
+
+        generation.release()
+        lexical.close.assert_called_once()
+        assert not generation.acquire()
+
+    def test_idle_generation_closes_on_retire(self, tmp_path):
+        """Testa que sem buscas a geração fecha na hora"""
+        statutes = Mock()
+        generation = IndexGeneration(tmp_path, vectorstore=Mock(), statutes=statutes)
+        generation.retire()
+        statutes.close.assert_called_once()
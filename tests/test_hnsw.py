@@ -0,0 +1,65 @@
+"""
+Testes para os parâmetros HNSW da coleção do Chroma
+"""
+import chromadb
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.juridic_bot.rag.hnsw import (
+    apply_search_ef,
+    collection_metadata,
+    hnsw_settings,
+    needs_rebuild,
+    rebuild_collection,
+)
+
+
+@pytest.fixture
+def client(tmp_path):
+    return chromadb.PersistentClient(path=str(tmp_path))
+
+
+@pytest.fixture
+def collection(client):
+    """Coleção criada com os parâmetros padrão de Config"""
+    collection = client.create_collection("langchain", metadata=collection_metadata())
+    vectors = np.random.default_rng(3).normal(size=(12, 8)).astype(np.float32)
+    collection.add(
+        ids=[f"k:{i}" for i in range(12)],
+        embeddings=vectors,
+        documents=[f"Art. {i}º" for i in range(12)],
+        metadatas=[{"chunk_index": i} if i else None for i in range(12)],
+    )
+    return collection
+
+
+class TestHnswSettings:
+    """Testes de leitura, ajuste e reconstrução dos parâmetros HNSW"""
+
+    def test_created_with_config(self, collection):
+        """Testa que a coleção nasce com M, construction_ef e search_ef de Config"""
+        assert hnsw_settings(collection) == {"HNSW_M": 16, "HNSW_CONSTRUCTION_EF": 100, "HNSW_SEARCH_EF": 100}
+        assert not needs_rebuild(collection)
+
+    def test_search_ef_is_applied_without_rebuild(self, client, collection):
+        """Testa que só o search_ef diferente é gravado na coleção existente"""
+        with patch('src.juridic_bot.config.Config.HNSW_SEARCH_EF', 40):
+            assert not needs_rebuild(collection)
+            assert apply_search_ef(collection)
+            assert not apply_search_ef(client.get_collection("langchain"))
+        assert hnsw_settings(client.get_collection("langchain"))["HNSW_SEARCH_EF"] == 40
+
+    def test_rebuild_copies_chunks_with_new_graph(self, client, collection):
+        """Testa a reconstrução com outro M, sem perder embeddings, textos e metadados"""
+        before = collection.get(include=["embeddings", "documents", "metadatas"])
+        with patch('src.juridic_bot.config.Config.HNSW_M', 8):
+            assert needs_rebuild(collection)
+            rebuilt = rebuild_collection(client, collection, page_size=5)
+            assert not needs_rebuild(rebuilt)
+
+        assert [c.name for c in client.list_collections()] == ["langchain"]
+        after = client.get_collection("langchain").get(include=["embeddings", "documents", "metadatas"])
+        assert after["ids"] == before["ids"]
+        assert after["documents"] == before["documents"] and after["metadatas"] == before["metadatas"]
+        assert np.allclose(after["embeddings"], before["embeddings"], atol=1e-6)
+        assert hnsw_settings(rebuilt)["HNSW_M"] == 8
@@ -0,0 +1,561 @@
+"""
+Testes para a ingestão incremental de documentos
+"""
+import multiprocessing
+import os
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.juridic_bot.config import Config
+from src.juridic_bot.rag.generations import RETIRED_FILE, IndexValidationError, current_dir
+from src.juridic_bot.rag.ingest import DocumentProcessor
+from src.juridic_bot.rag.lexical import LexicalIndex
+from src.juridic_bot.rag.statutes import LawReference, StatuteIndex
+from src.juridic_bot.rag.manifest import FileManifest, ManifestEntry, chunk_id
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Diretórios temporários de documentos e índice"""
+    docs_dir = tmp_path / "documentos"
+    docs_dir.mkdir()
+    with patch('src.juridic_bot.config.Config.DOCUMENTS_DIR', docs_dir), \
+         patch('src.juridic_bot.config.Config.CHROMA_DIR', tmp_path / "chroma"), \
+         patch('src.juridic_bot.config.Config.EMBEDDING_STORE_ENABLED', False), \
+         patch('src.juridic_bot.config.Config.TEXT_CACHE_DIR', tmp_path / "extracted"), \
+         patch('src.juridic_bot.config.Config.create_directories'):
+        yield docs_dir
+
+
+@pytest.fixture
+def processor(workspace):
+    """DocumentProcessor com vectorstore falso"""
+    with patch('src.juridic_bot.rag.ingest.EmbeddingService'):
+        processor = DocumentProcessor()
+    processor.vectorstore = Mock()
+    processor.open_vectorstore = Mock(return_value=processor.vectorstore)
+    return processor
+
+
+def written_ids(vectorstore):
+    return [i for call in vectorstore.add_documents.call_args_list for i in call.kwargs["ids"]]
+
+
+def deleted_ids(vectorstore):
+    return [i for call in vectorstore.delete.call_args_list for i in call.kwargs["ids"]]
+
+
+class TestFileManifest:
+    """Testes da classe FileManifest"""
+
+    def test_roundtrip(self, tmp_path):
+        """Testa gravação, leitura e remoção de entradas"""
+        manifest = FileManifest(tmp_path / "manifest.sqlite3")
+        assert manifest.existed is False
+
+        manifest.upsert([ManifestEntry("lei.txt", 10, 1, "hash", "chave", chunk_count=2)])
+        manifest.set_meta("fingerprint", "abc")
+
+        entry = manifest.get_all()["lei.txt"]
+        assert entry.chunk_ids == [chunk_id("chave", 0), chunk_id("chave", 1)]
+        assert manifest.get_meta("fingerprint") == "abc"
+
+        manifest.remove(["lei.txt"])
+        assert len(manifest) == 0
+        manifest.close()
+
+
+class TestIncrementalIngest:
+    """Testes de DocumentProcessor.update_index"""
+
+    def test_second_run_without_changes_does_nothing(self, processor, workspace):
+        """Testa que uma execução sem alterações não abre o índice"""
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+
+        report = processor.update_index()
+        assert report.added == 1
+        assert report.chunks_written == 1
+
+        processor.open_vectorstore.reset_mock()
+        report = processor.update_index()
+        assert report.added == report.updated == report.removed == 0
+        assert report.unchanged == 1
+        processor.open_vectorstore.assert_not_called()
+
+    def test_progress_and_cancel(self, processor, workspace):
+        """Testa o relatório parcial e que o cancelamento para entre arquivos e é retomado depois"""
+        for name in ("a.txt", "b.txt", "c.txt"):
+            (workspace / name).write_text(f"Art. 1º Texto de {name}.", encoding="utf-8")
+        cancel = threading.Event()
+        seen = []
+
+        def progress(report):
+            seen.append(report.files_done)
+            cancel.set()
+
+        with patch('src.juridic_bot.config.Config.INGEST_WORKERS', 1):
+            report = processor.update_index(progress=progress, cancel=cancel)
+
+        assert report.cancelled
+        assert report.files_planned == 3
+        assert report.files_done == report.added == 1
+        assert seen[:2] == [0, 1]
+
+        report = processor.update_index()
+        assert not report.cancelled
+        assert report.added == 2 and report.unchanged == 1
+
+    def test_touched_file_is_not_reindexed(self, processor, workspace):
+        """Testa que mudar apenas o mtime não reprocessa o arquivo"""
+        path = workspace / "lei.txt"
+        path.write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        processor.update_index()
+
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        processor.open_vectorstore.reset_mock()
+
+        report = processor.update_index()
+        assert report.unchanged == 1
+        processor.open_vectorstore.assert_not_called()
+
+    def test_changed_file_upserts_and_deletes_stale_chunks(self, processor, workspace):
+        """Testa que um arquivo alterado grava os novos chunks e remove os antigos"""
+        path = workspace / "lei.txt"
+        path.write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        processor.update_index()
+        old_ids = written_ids(processor.vectorstore)
+
+        path.write_text("Art. 1º Texto alterado da lei.", encoding="utf-8")
+        processor.vectorstore.reset_mock()
+
+        report = processor.update_index()
+        assert report.updated == 1
+        new_ids = written_ids(processor.vectorstore)
+        assert new_ids != old_ids
+        assert deleted_ids(processor.vectorstore) == old_ids
+
+    def test_deleted_file_removes_chunks(self, processor, workspace):
+        """Testa que arquivos apagados têm seus chunks removidos"""
+        path = workspace / "lei.txt"
+        path.write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        processor.update_index()
+        ids = written_ids(processor.vectorstore)
+
+        path.unlink()
+        report = processor.update_index()
+
+        assert report.removed == 1
+        assert report.chunks_deleted == len(ids)
+        assert deleted_ids(processor.vectorstore) == ids
+        assert report.total_files == 0
+
+    def test_lexical_index_follows_changes(self, processor, workspace):
+        """Testa que o índice lexical acompanha inclusões, alterações e remoções"""
+        lei = workspace / "lei.txt"
+        lei.write_text("Art. 1º Licença para capacitação.", encoding="utf-8")
+        processor.update_index()
+
+        lei.write_text("Art. 1º Aposentadoria compulsória do servidor.", encoding="utf-8")
+        processor.update_index()
+
+        lexical = LexicalIndex()
+        assert lexical.search("capacitação", 5) == []
+        assert len(lexical.search("aposentadoria", 5)) == 1
+
+        lei.unlink()
+        processor.update_index()
+        assert len(lexical) == 0
+        lexical.close()
+
+    def test_statute_index_is_filled(self, processor, workspace):
+        """Testa que lei e artigos extraídos na ingestão apontam para os chunks"""
+        (workspace / "lei_8112.txt").write_text(
+            "LEI Nº 8.112, DE 11 DE DEZEMBRO DE 1990\nArt. 1º Esta Lei institui o regime jurídico.\n"
+            "Art. 2º Servidor é a pessoa legalmente investida em cargo público.",
+            encoding="utf-8"
+        )
+        processor.update_index()
+
+        statutes = StatuteIndex()
+        assert statutes.lookup(LawReference("lei", "8112", 1990), "2") == written_ids(processor.vectorstore)[-1:]
+        statutes.close()
+
+    def test_chunk_ids_are_stable(self, processor, workspace):
+        """Testa que o mesmo conteúdo gera os mesmos IDs de chunk"""
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+
+        manifest = FileManifest()
+        plan = processor.plan_changes(manifest)
+        manifest.close()
+        file_path, entry = plan.changed[0]
+
+        first = [chunk.id for chunk in processor.process_file(file_path, entry)]
+        second = [chunk.id for chunk in processor.process_file(file_path, entry)]
+
+        assert first == second == [chunk_id(entry.file_key, 0)]
+
+    def test_chunks_carry_token_count(self, processor, workspace):
+        """Testa que cada chunk leva num_tokens para o orçamento de contexto"""
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        processor.count_tokens = Mock(return_value=7)
+
+        manifest = FileManifest()
+        plan = processor.plan_changes(manifest)
+        manifest.close()
+        chunks = processor.process_file(*plan.changed[0])
+
+        assert [chunk.metadata["num_tokens"] for chunk in chunks] == [7]
+        processor.count_tokens.assert_called_once_with(chunks[0].page_content)
+
+    def test_chunking_config_change_reindexes(self, processor, workspace):
+        """Testa que mudar o tamanho dos chunks invalida o manifesto"""
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        processor.update_index()
+
+        with patch('src.juridic_bot.config.Config.CHUNK_SIZE', 500):
+            report = processor.update_index()
+
+        assert report.updated == 1
+
+    def test_rechunking_reuses_extracted_text(self, processor, workspace):
+        """Testa que mudar o chunking não extrai o texto do arquivo de novo"""
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        processor.update_index()
+
+        with patch('src.juridic_bot.config.Config.CHUNK_SIZE', 500), \
+             patch.object(DocumentProcessor, 'load_document') as load_document:
+            report = processor.update_index()
+
+        load_document.assert_not_called()
+        assert report.chunks_written == 1
+
+
+class TestDeduplication:
+    """Testes da deduplicação de chunks entre arquivos na ingestão"""
+
+    TEXTO = (
+        "Art. 5º Todos são iguais perante a lei, sem distinção de qualquer natureza, garantindo-se aos "
+        "brasileiros e aos estrangeiros residentes no País a inviolabilidade do direito à vida, à liberdade, "
+        "à igualdade, à segurança e à propriedade, nos termos seguintes."
+    )
+
+    @pytest.fixture
+    def indexed(self, processor):
+        """Vectorstore falso que sabe quais IDs estão gravados"""
+        vectorstore = processor.vectorstore
+        stored = {}
+
+        def add_documents(documents, ids):
+            stored.update((doc_id, dict(doc.metadata)) for doc_id, doc in zip(ids, documents))
+
+        def delete(ids):
+            for doc_id in ids:
+                stored.pop(doc_id, None)
+
+        def update(ids, metadatas):
+            for doc_id, metadata in zip(ids, metadatas):
+                stored[doc_id].update(metadata)
+
+        vectorstore.add_documents.side_effect = add_documents
+        vectorstore.delete.side_effect = delete
+        vectorstore._collection.get.side_effect = lambda ids, include: {"ids": [i for i in ids if i in stored]}
+        vectorstore._collection.update.side_effect = update
+        return stored
+
+    def test_duplicate_is_skipped_and_promoted_when_canonical_removed(self, processor, workspace, indexed):
+        """Testa que a cópia não é gravada e volta ao índice quando o original sai"""
+        (workspace / "cf88.txt").write_text(self.TEXTO, encoding="utf-8")
+        (workspace / "vade_mecum.txt").write_text(self.TEXTO.replace("  ", " ").upper(), encoding="utf-8")
+
+        report = processor.update_index()
+
+        assert report.added == 2
+        assert (report.chunks_written, report.duplicates) == (1, 1)
+        assert report.duplicate_ratio == 0.5
+        [(canonical_id, metadata)] = indexed.items()
+        assert metadata["caminho_relativo"] == "cf88.txt"
+        assert metadata["outras_fontes"] == "vade_mecum.txt"
+
+        (workspace / "cf88.txt").unlink()
+        report = processor.update_index()
+
+        assert (report.removed, report.promoted) == (1, 1)
+        [(promoted_id, metadata)] = indexed.items()
+        assert promoted_id != canonical_id
+        assert metadata["caminho_relativo"] == "vade_mecum.txt"
+        assert "outras_fontes" not in metadata
+
+    def test_disabled(self, processor, workspace, indexed):
+        """Testa que com DEDUP_ENABLED=false todas as cópias são gravadas"""
+        (workspace / "cf88.txt").write_text(self.TEXTO, encoding="utf-8")
+        (workspace / "vade_mecum.txt").write_text(self.TEXTO, encoding="utf-8")
+
+        with patch('src.juridic_bot.config.Config.DEDUP_ENABLED', False):
+            report = processor.update_index()
+
+        assert (report.chunks_written, report.duplicates) == (2, 0)
+
+
+class TestParallelParsing:
+    """Testes de DocumentProcessor.parse_files"""
+
+    def make_tasks(self, processor, workspace, count):
+        for i in range(count):
+            (workspace / f"lei_{i}.txt").write_text(f"Art. {i}º Texto da lei {i}.", encoding="utf-8")
+        manifest = FileManifest()
+        plan = processor.plan_changes(manifest)
+        manifest.close()
+        return plan.changed
+
+    def test_pool_keeps_input_order(self, processor, workspace):
+        """Testa que o pool devolve os resultados na ordem dos arquivos"""
+        tasks = self.make_tasks(processor, workspace, 5)
+
+        with patch('src.juridic_bot.config.Config.INGEST_WORKERS', 2):
+            results = list(processor.parse_files(tasks))
+
+        assert [entry.path for _, entry, _, _ in results] == [entry.path for _, entry in tasks]
+        assert all(error is None for _, _, _, error in results)
+        assert results[3][2][0].page_content == "Art. 3º Texto da lei 3."
+
+    def test_pool_workers_use_parent_config(self, processor, workspace):
+        """Testa que os processos do pool, criados sem fork, recebem o Config deste processo"""
+        tasks = self.make_tasks(processor, workspace, 2)
+
+        with patch('src.juridic_bot.config.Config.INGEST_WORKERS', 2), \
+             patch('src.juridic_bot.rag.ingest.multiprocessing.get_context',
+                   wraps=multiprocessing.get_context) as get_context:
+            results = list(processor.parse_files(tasks))
+
+        assert get_context.call_args[0][0] in ("forkserver", "spawn")
+        assert all(error is None for _, _, _, error in results)
+        # O cache de texto extraído foi gravado no diretório de Config.TEXT_CACHE_DIR do teste
+        assert any(path.is_file() for path in Config.TEXT_CACHE_DIR.rglob("*"))
+
+    def test_slow_file_times_out_without_affecting_others(self, processor, workspace):
+        """Testa que um arquivo lento é abandonado e os demais seguem"""
+        tasks = self.make_tasks(processor, workspace, 2)
+        original = processor.process_file
+
+        def slow_first(file_path, entry):
+            if entry.path == "lei_0.txt":
+                time.sleep(5)
+            return original(file_path, entry)
+
+        processor.process_file = slow_first
+        with patch('src.juridic_bot.config.Config.INGEST_WORKERS', 1), \
+             patch('src.juridic_bot.config.Config.INGEST_FILE_TIMEOUT', 0.2):
+            results = list(processor.parse_files(tasks))
+
+        assert results[0][2] is None
+        assert "tempo limite" in results[0][3]
+        assert results[1][3] is None
+
+    def test_failed_file_is_retried_next_run(self, processor, workspace):
+        """Testa que arquivos com erro não entram no manifesto"""
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+
+        with patch.object(DocumentProcessor, 'process_file', side_effect=ValueError("PDF corrompido")):
+            report = processor.update_index()
+        assert report.failed == 1
+        assert report.total_files == 0
+
+        report = processor.update_index()
+        assert report.added == 1
+
+
+class TestIndexWriter:
+    """Testes da gravação em pipeline"""
+
+    def test_batches_respect_batch_size(self, processor, workspace):
+        """Testa que os chunks de um arquivo são gravados em lotes"""
+        (workspace / "lei.txt").write_text("\n\n".join(f"Art. {i}º " + "x" * 80 for i in range(10)), encoding="utf-8")
+
+        processor.text_splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=0)
+        with patch('src.juridic_bot.config.Config.INGEST_BATCH_SIZE', 3):
+            report = processor.update_index()
+
+        sizes = [len(call.kwargs["ids"]) for call in processor.vectorstore.add_documents.call_args_list]
+        assert report.chunks_written == 10
+        assert sizes == [3, 3, 3, 1]
+
+    def test_manifest_committed_per_file_when_write_fails(self, processor, workspace):
+        """Testa que arquivos já gravados permanecem no manifesto após uma falha"""
+        (workspace / "a.txt").write_text("Art. 1º Primeira lei.", encoding="utf-8")
+        (workspace / "b.txt").write_text("Art. 1º Segunda lei.", encoding="utf-8")
+
+        def fail_on_second(documents, ids):
+            if documents[0].metadata["caminho_relativo"] == "b.txt":
+                raise RuntimeError("API indisponível")
+
+        processor.vectorstore.add_documents.side_effect = fail_on_second
+        with pytest.raises(RuntimeError):
+            processor.update_index()
+
+        manifest = FileManifest()
+        assert list(manifest.get_all()) == ["a.txt"]
+        manifest.close()
+
+        processor.vectorstore.add_documents.side_effect = None
+        report = processor.update_index()
+        assert report.added == 1
+        assert report.unchanged == 1
+
+
+class TestGenerationBuild:
+    """Testes de DocumentProcessor.build_generation"""
+
+    @pytest.fixture(autouse=True)
+    def skip_validation(self, processor):
+        """O vectorstore falso não responde às verificações do Chroma"""
+        processor.validate_index = Mock(return_value=1)
+
+    def test_build_writes_only_to_new_generation(self, processor, workspace):
+        """Testa que o build grava numa geração nova e a publica, sem tocar o índice ativo"""
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+
+        report = processor.build_generation()
+
+        assert report.generation
+        assert current_dir() == processor.index_dir == Config.CHROMA_DIR / "generations" / report.generation
+        assert not (Config.CHROMA_DIR / "manifest.sqlite3").exists()
+        manifest = FileManifest(processor.index_path("manifest"))
+        assert list(manifest.get_all()) == ["lei.txt"]
+        manifest.close()
+        processor.validate_index.assert_called_once()
+
+    def test_no_changes_creates_no_generation(self, processor, workspace):
+        """Testa que sem alterações nenhuma cópia é feita e o índice não é aberto"""
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        first = processor.build_generation().generation
+        processor.open_vectorstore.reset_mock()
+
+        report = processor.build_generation()
+
+        assert report.generation == ""
+        assert report.unchanged == 1
+        assert current_dir().name == first
+        processor.open_vectorstore.assert_not_called()
+
+    def test_change_retires_previous_generation(self, processor, workspace):
+        """Testa que a geração anterior é marcada como substituída e continua no disco até a limpeza"""
+        path = workspace / "lei.txt"
+        path.write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        first = processor.build_generation().generation
+        first_dir = current_dir()
+
+        path.write_text("Art. 1º Texto alterado da lei.", encoding="utf-8")
+        report = processor.build_generation()
+
+        assert report.generation != first
+        assert report.updated == 1
+        assert (first_dir / RETIRED_FILE).exists()
+
+    def test_failed_validation_keeps_active_index(self, processor, workspace):
+        """Testa que uma geração reprovada é apagada e o índice ativo continua o mesmo"""
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        processor.validate_index.side_effect = IndexValidationError("coleção vazia")
+
+        with pytest.raises(IndexValidationError):
+            processor.build_generation()
+
+        assert current_dir() == processor.index_dir == Config.CHROMA_DIR
+        assert list((Config.CHROMA_DIR / "generations").iterdir()) == []
+
+
+class TestValidateIndex:
+    """Testes de DocumentProcessor.validate_index com o Chroma real"""
+
+    def test_checks_count_lexical_and_smoke_query(self, workspace):
+        """Testa as verificações feitas antes de publicar uma geração"""
+        with patch('src.juridic_bot.rag.ingest.EmbeddingService'):
+            processor = DocumentProcessor()
+        manifest = FileManifest(processor.index_path("manifest"))
+        manifest.upsert([ManifestEntry(path="lei.txt", size=1, mtime_ns=1, content_hash="h", file_key="k")])
+        manifest.close()
+
+        vectorstore = processor.open_vectorstore(DeterministicFakeEmbedding(size=16))
+        with pytest.raises(IndexValidationError):
+            processor.validate_index()
+
+        chunks = [Document(id=f"k:{i}", page_content=f"Art. {i}º Texto.") for i in range(3)]
+        vectorstore.add_documents(chunks, ids=[chunk.id for chunk in chunks])
+        assert processor.validate_index() == 3
+
+        with patch('src.juridic_bot.config.Config.VECTOR_BACKEND', "numpy"):
+            with pytest.raises(IndexValidationError):
+                processor.validate_index()
+            processor.export_vectors()
+            assert processor.validate_index() == 3
+
+        lexical = LexicalIndex(processor.index_path("lexical"))
+        lexical.upsert(chunks[:2])
+        lexical.close()
+        with pytest.raises(IndexValidationError):
+            processor.validate_index()
+
+
+class TestIndexSettingsChange:
+    """Testes da troca de embeddings e de parâmetros HNSW, com o Chroma real"""
+
+    def test_embedding_dimension_change_recreates_collection(self, workspace):
+        """Testa que outra dimensão de embeddings esvazia a coleção e recalcula todos os chunks"""
+        with patch('src.juridic_bot.rag.ingest.EmbeddingService'):
+            processor = DocumentProcessor()
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.\n\nArt. 2º Outro texto.", encoding="utf-8")
+        processor.embedding_service.get_ingest_embeddings.return_value = DeterministicFakeEmbedding(size=16)
+        processor.update_index()
+
+        processor.embedding_service.get_ingest_embeddings.return_value = DeterministicFakeEmbedding(size=8)
+        with patch('src.juridic_bot.config.Config.EMBEDDING_DIMENSIONS', 8):
+            report = processor.update_index()
+            assert processor.update_index().files_planned == 0
+
+        assert report.updated == 1
+        collection = processor.open_vectorstore()._collection
+        vectors = collection.get(include=["embeddings"])["embeddings"]
+        assert len(vectors) == report.chunks_written and all(len(vector) == 8 for vector in vectors)
+
+    def test_hnsw_change_rebuilds_without_embedding(self, workspace):
+        """Testa que outro M reconstrói a coleção numa nova geração, sem recalcular embeddings"""
+        with patch('src.juridic_bot.rag.ingest.EmbeddingService'):
+            processor = DocumentProcessor()
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        embeddings = processor.embedding_service.get_ingest_embeddings
+        embeddings.return_value = DeterministicFakeEmbedding(size=8)
+        processor.update_index()
+        assert processor._is_up_to_date()
+
+        with patch('src.juridic_bot.config.Config.HNSW_M', 8), \
+             patch.object(processor, 'validate_index'):
+            assert not processor._is_up_to_date()
+            report = processor.build_generation()
+            assert processor._is_up_to_date()
+
+        assert report.generation and report.files_planned == 0
+        assert embeddings.call_count == 1
+        collection = processor.open_vectorstore()._collection
+        assert collection.configuration["hnsw"]["max_neighbors"] == 8 and collection.count() == 1
+
+    def test_hnsw_change_keeps_active_collection(self, workspace):
+        """Testa que sem gerações o M novo não reconstrói a coleção em uso pelas buscas"""
+        with patch('src.juridic_bot.rag.ingest.EmbeddingService'):
+            processor = DocumentProcessor()
+        (workspace / "lei.txt").write_text("Art. 1º Texto da lei.", encoding="utf-8")
+        processor.embedding_service.get_ingest_embeddings.return_value = DeterministicFakeEmbedding(size=8)
+        processor.update_index()
+
+        with patch('src.juridic_bot.config.Config.HNSW_M', 8), \
+             patch('src.juridic_bot.config.Config.HNSW_SEARCH_EF', 40), \
+             patch('src.juridic_bot.rag.ingest.rebuild_collection') as rebuild:
+            processor.update_index()
+
+        rebuild.assert_not_called()
+        hnsw = processor.open_vectorstore()._collection.configuration["hnsw"]
+        assert hnsw["max_neighbors"] == 16 and hnsw["ef_search"] == 40
+
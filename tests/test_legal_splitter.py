@@ -0,0 +1,83 @@
+"""
+Testes para o divisor de textos jurídicos
+"""
+from langchain_core.documents import Document
+from src.juridic_bot.rag.legal_splitter import LegalTextSplitter
+
+LEI = """LEI Nº 8.112, DE 11 DE DEZEMBRO DE 1990
+Dispõe sobre o regime jurídico dos servidores públicos civis da União.
+
+TÍTULO I
+Capítulo Único
+Das Disposições Preliminares
+Art. 1º Esta Lei institui o Regime Jurídico dos Servidores Públicos Civis da União.
+Art. 2º Para os efeitos desta Lei, servidor é a pessoa legalmente investida em cargo público.
+TÍTULO II
+CAPÍTULO I
+DO PROVIMENTO
+Art. 5º São requisitos básicos para investidura em cargo público:
+I - a nacionalidade brasileira;
+II - o gozo dos direitos políticos;
+§ 1º As atribuições do cargo podem justificar a exigência de outros requisitos estabelecidos em lei.
+§ 2º Às pessoas portadoras de deficiência é assegurado o direito de se inscrever em concurso público.
+Art. 6º O provimento dos cargos públicos far-se-á mediante ato da autoridade competente de cada Poder.
+"""
+
+
+def split(text, chunk_size, pages=None):
+    splitter = LegalTextSplitter(chunk_size=chunk_size)
+    documents = pages or [Document(page_content=text, metadata={"source": "/docs/lei_8112.pdf", "page": 0})]
+    return splitter.split_documents(documents)
+
+
+class TestLegalTextSplitter:
+    """Testes da classe LegalTextSplitter"""
+
+    def test_packs_whole_articles_within_chapter(self):
+        """Testa que artigos inteiros são agrupados sem misturar títulos"""
+        chunks = split(LEI, 1000)
+
+        articles = [(chunk.metadata.get("artigo"), chunk.metadata.get("artigo_final")) for chunk in chunks]
+        assert articles == [(None, None), ("1", "2"), ("5", "6")]
+        assert chunks[1].page_content.startswith("TÍTULO I\nCapítulo Único")
+        assert chunks[2].metadata["titulo"] == "TÍTULO II"
+        assert chunks[2].metadata["capitulo"] == "CAPÍTULO I"
+        assert all(chunk.metadata["lei"] == "LEI Nº 8.112, DE 11 DE DEZEMBRO DE 1990" for chunk in chunks)
+
+    def test_never_cuts_articles_that_fit(self):
+        """Testa que cada chunk começa em um cabeçalho ou artigo"""
+        for chunk in split(LEI, 250)[1:]:
+            assert chunk.page_content.startswith(("TÍTULO", "Art.")), chunk.page_content
+
+    def test_long_article_is_split_at_paragraphs_with_prefix(self):
+        """Testa que um artigo grande é dividido nos parágrafos, com o prefixo do artigo"""
+        chunks = [chunk for chunk in split(LEI, 200) if chunk.metadata.get("artigo") == "5"]
+
+        assert len(chunks) > 1
+        assert chunks[0].page_content.startswith("TÍTULO II")
+        assert chunks[1].page_content.startswith("Art. 5 (continuação)\n§ 1º")
+        assert chunks[1].metadata["paragrafo"] == "§ 1º"
+        assert all(len(chunk.page_content) <= 200 for chunk in chunks)
+
+    def test_article_spanning_pages_is_kept_whole(self):
+        """Testa que um artigo que atravessa a quebra de página não é cortado"""
+        pages = [
+            Document(page_content="Art. 1º O servidor público", metadata={"source": "lei.pdf", "page": 0}),
+            Document(page_content="responde civil e penalmente.\nArt. 2º Outro.", metadata={"source": "lei.pdf", "page": 1}),
+        ]
+
+        chunks = split(None, 60, pages=pages)
+
+        assert chunks[0].page_content == "Art. 1º O servidor público\nresponde civil e penalmente."
+        assert chunks[0].metadata["page"] == 0
+        assert chunks[1].metadata["page"] == 1
+
+    def test_plain_text_is_packed_by_paragraphs(self):
+        """Testa textos sem artigos (doutrina) agrupados por parágrafos"""
+        text = "\n\n".join(f"Parágrafo {i} " + "palavra " * 10 for i in range(10))
+
+        chunks = split(text, 200)
+
+        assert all(len(chunk.page_content) <= 200 for chunk in chunks)
+        assert all(chunk.page_content.startswith("Parágrafo") for chunk in chunks)
+        assert "".join(chunk.page_content for chunk in chunks).count("Parágrafo") == 10
@@ -0,0 +1,54 @@
+"""
+Testes para o índice lexical (BM25)
+"""
+import pytest
+from langchain_core.documents import Document
+from src.juridic_bot.rag.lexical import LexicalIndex, tokenize
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LexicalIndex(tmp_path / "lexical.sqlite3")
+    yield index
+    index.close()
+
+
+class TestTokenize:
+    """Testes da normalização de termos"""
+
+    def test_legal_references(self):
+        """Testa números de lei, ordinais, parágrafos, acentos e stopwords"""
+        assert tokenize("Lei nº 8.112/90, art. 5º, § 2º da Constituição") == [
+            "lei", "8112", "90", "art", "5", "paragrafo", "2", "constituicao"
+        ]
+
+    def test_accents_and_case(self):
+        """Testa que a consulta sem acento casa com o texto acentuado"""
+        assert tokenize("SÚMULA Vinculante") == tokenize("sumula vinculante")
+
+
+class TestLexicalIndex:
+    """Testes da classe LexicalIndex"""
+
+    def test_exact_terms_rank_first(self, index):
+        """Testa que o chunk com os termos exatos (e raros) vem primeiro"""
+        index.upsert([
+            Document(id="cf:37", page_content="Art. 37. A administração pública direta e indireta obedecerá..."),
+            Document(id="cf:5", page_content="Art. 5º Todos são iguais perante a lei..."),
+            Document(id="sv:13", page_content="Súmula Vinculante 13: a nomeação de cônjuge, companheiro ou parente..."),
+        ])
+
+        assert [doc_id for doc_id, _ in index.search("art. 37 CF", 3)][0] == "cf:37"
+        assert [doc_id for doc_id, _ in index.search("sumula vinculante 13", 3)] == ["sv:13"]
+        assert index.search("de que", 3) == []
+
+    def test_upsert_replaces_and_delete_removes(self, index):
+        """Testa a reindexação pelo mesmo ID e a remoção"""
+        index.upsert([Document(id="a:0", page_content="licença para capacitação")])
+        index.upsert([Document(id="a:0", page_content="aposentadoria compulsória")])
+
+        assert index.search("capacitação", 5) == []
+        assert [doc_id for doc_id, _ in index.search("aposentadoria", 5)] == ["a:0"]
+
+        index.delete(["a:0"])
+        assert len(index) == 0
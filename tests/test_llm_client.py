@@ -2,8 +2,8 @@
 Testes para o cliente LLM
 """
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-from src.juridic_bot.llm.client import LLMClient
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
+from src.juridic_bot.llm.client import LLMClient, StreamInterruptedError
 
 
 class TestLLMClient:
@@ -115,6 +115,108 @@ class TestLLMClient:
         assert "acentuação" in result
         assert "ção" in result
 
+    @patch('src.juridic_bot.llm.client.AsyncOpenAI')
+    @patch('src.juridic_bot.llm.client.OpenAI')
+    @pytest.mark.asyncio
+    async def test_agenerate_uses_async_client(self, mock_openai, mock_async_openai):
+        """Testa geração assíncrona via cliente async"""
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Resposta assíncrona"
+        mock_response.usage.total_tokens = 50
+
+        mock_async_client = Mock()
+        mock_async_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_async_openai.return_value = mock_async_client
+
+        client = LLMClient()
+        result = await client.agenerate("Pergunta", "Contexto")
+
+        assert result == "Resposta assíncrona"
+        mock_async_client.chat.completions.create.assert_awaited_once()
+        mock_openai.return_value.chat.completions.create.assert_not_called()
+
+    @patch('src.juridic_bot.llm.client.AsyncOpenAI')
+    @patch('src.juridic_bot.llm.client.OpenAI')
+    @pytest.mark.asyncio
+    async def test_agenerate_error_handling(self, mock_openai, mock_async_openai):
+        """Testa tratamento de erro na geração assíncrona"""
+        mock_async_client = Mock()
+        mock_async_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+        mock_async_openai.return_value = mock_async_client
+
+        client = LLMClient()
+        result = await client.agenerate_conversational("Test query")
+
+        assert "erro ao processar" in result.lower()
+
+    @patch('src.juridic_bot.llm.client.AsyncOpenAI')
+    @patch('src.juridic_bot.llm.client.OpenAI')
+    @pytest.mark.asyncio
+    async def test_generate_stream_yields_deltas(self, mock_openai, mock_async_openai):
+        """Testa geração em streaming"""
+        def make_chunk(content):
+            chunk = Mock()
+            chunk.usage = None
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = content
+            return chunk
+
+        async def fake_stream():
+            for content in ["Habeas ", None, "corpus"]:
+                yield make_chunk(content)
+
+        mock_async_client = Mock()
+        mock_async_client.chat.completions.create = AsyncMock(return_value=fake_stream())
+        mock_async_openai.return_value = mock_async_client
+
+        client = LLMClient()
+        deltas = [delta async for delta in client.generate_stream("O que é habeas corpus?")]
+
+        assert deltas == ["Habeas ", "corpus"]
+        assert mock_async_client.chat.completions.create.call_args[1]["stream"] is True
+
+    @patch('src.juridic_bot.llm.client.AsyncOpenAI')
+    @patch('src.juridic_bot.llm.client.OpenAI')
+    @pytest.mark.asyncio
+    async def test_generate_stream_error_handling(self, mock_openai, mock_async_openai):
+        """Testa erro antes do primeiro trecho no streaming"""
+        mock_async_client = Mock()
+        mock_async_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+        mock_async_openai.return_value = mock_async_client
+
+        client = LLMClient()
+        deltas = [delta async for delta in client.generate_stream("Test query")]
+
+        assert len(deltas) == 1
+        assert "erro ao processar" in deltas[0].lower()
+
+    @patch('src.juridic_bot.llm.client.AsyncOpenAI')
+    @patch('src.juridic_bot.llm.client.OpenAI')
+    @pytest.mark.asyncio
+    async def test_generate_stream_error_after_first_delta(self, mock_openai, mock_async_openai):
+        """Testa que o erro no meio do streaming é levantado em vez de encerrar a resposta truncada"""
+        chunk = Mock()
+        chunk.usage = None
+        chunk.choices = [Mock()]
+        chunk.choices[0].delta.content = "Habeas "
+
+        async def broken_stream():
+            yield chunk
+            raise Exception("Connection reset")
+
+        mock_async_client = Mock()
+        mock_async_client.chat.completions.create = AsyncMock(return_value=broken_stream())
+        mock_async_openai.return_value = mock_async_client
+
+        client = LLMClient()
+        deltas = []
+        with pytest.raises(StreamInterruptedError):
+            async for delta in client.generate_stream("O que é habeas corpus?"):
+                deltas.append(delta)
+
+        assert deltas == ["Habeas "]
+
     def test_build_user_message_with_context(self):
         """Testa construção de mensagem com contexto"""
         with patch('src.juridic_bot.llm.client.OpenAI'):
@@ -1,11 +1,23 @@
 """
 Testes para o sistema RAG Retriever
 """
+import chromadb
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from pathlib import Path
 from langchain.schema import Document
-from src.juridic_bot.rag.retriever import RAGRetriever
+from src.juridic_bot.rag.hnsw import collection_metadata
+from src.juridic_bot.rag.lexical import LexicalIndex
+from src.juridic_bot.rag.retriever import RAGRetriever, RetrieverClosedError, select_by_score
+from src.juridic_bot.rag.statutes import LawReference, StatuteIndex
+from src.juridic_bot.rag.vector_index import NumpyVectorStore, export_vectors
+
+
+def vectorstore_mock():
+    """Mock do Chroma: a busca por vetor devolve distâncias de cosseno, como o original"""
+    vectorstore = Mock()
+    vectorstore._select_relevance_score_fn.return_value = lambda distance: 1.0 - distance
+    return vectorstore
 
 
 class TestRAGRetriever:
@@ -50,7 +62,7 @@ class TestRAGRetriever:
         )
 
         mock_vectorstore = Mock()
-        mock_vectorstore.similarity_search_with_score.return_value = [
+        mock_vectorstore.similarity_search_with_relevance_scores.return_value = [
             (doc1, 0.85), (doc2, 0.78)
         ]
         mock_chroma.return_value = mock_vectorstore
@@ -62,6 +74,336 @@ class TestRAGRetriever:
         assert "garantia fundamental" in results[0].page_content
         assert results[0].metadata["source"] == "cf_art5.pdf"
 
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_asearch_uses_async_embedding(self, mock_chroma, mock_embedding_service):
+        """Testa busca assíncrona com embedding async e Chroma no executor"""
+        doc = Document(page_content="Art. 37 da CF...", metadata={"source": "cf.pdf"})
+
+        mock_vectorstore = vectorstore_mock()
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [(doc, 0.2)]
+        mock_chroma.return_value = mock_vectorstore
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+
+        retriever = RAGRetriever()
+        results = await retriever.asearch("princípio da legalidade", k=1)
+
+        assert results == [doc]
+        mock_embedding_service.return_value.aembed_query.assert_awaited_once_with("princípio da legalidade")
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.assert_called_once_with(
+            [0.1, 0.2], k=1, filter=None
+        )
+        mock_vectorstore.similarity_search_with_relevance_scores.assert_not_called()
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_asearch_with_error(self, mock_chroma, mock_embedding_service):
+        """Testa busca assíncrona com erro no embedding"""
+        mock_chroma.return_value = Mock()
+        mock_embedding_service.return_value.aembed_query = AsyncMock(side_effect=Exception("embedding error"))
+
+        retriever = RAGRetriever()
+        results = await retriever.asearch("test query")
+
+        assert results == []
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_asearch_uses_caches_for_repeated_query(self, mock_chroma, mock_embedding_service):
+        """Testa que perguntas repetidas reaproveitam embedding e resultado"""
+        doc = Document(page_content="Princípio da legalidade...", metadata={"source": "cf.pdf"}, id="abc:0")
+
+        mock_vectorstore = vectorstore_mock()
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [(doc, 0.2)]
+        mock_vectorstore.get_by_ids.return_value = [doc]
+        mock_chroma.return_value = mock_vectorstore
+        mock_embedding_service.return_value.model_key = "text-embedding-3-small"
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+
+        retriever = RAGRetriever()
+        first = await retriever.asearch("O que é princípio da legalidade?", k=3)
+        second = await retriever.asearch("o que é   princípio da legalidade", k=3)
+
+        assert first == second == [doc]
+        mock_embedding_service.return_value.aembed_query.assert_awaited_once()
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.assert_called_once()
+        mock_vectorstore.get_by_ids.assert_called_once_with(["abc:0"])
+        assert retriever.cache_stats()["retrieval"]["hits"] == 1
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_reload_invalidates_retrieval_cache(self, mock_chroma, mock_embedding_service):
+        """Testa que a recarga do índice invalida apenas o cache de resultados"""
+        doc = Document(page_content="Art. 37...", metadata={}, id="abc:1")
+
+        mock_vectorstore = vectorstore_mock()
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [(doc, 0.2)]
+        mock_chroma.return_value = mock_vectorstore
+        mock_embedding_service.return_value.model_key = "text-embedding-3-small"
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+
+        retriever = RAGRetriever()
+        await retriever.asearch("art. 37", k=3)
+        retriever.reload()
+        await retriever.asearch("art. 37", k=3)
+
+        assert retriever.generation == 1
+        assert mock_vectorstore.similarity_search_by_vector_with_relevance_scores.call_count == 2
+        mock_embedding_service.return_value.aembed_query.assert_awaited_once()
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_search_in_flight_finishes_on_previous_generation(self, mock_chroma, mock_embedding_service):
+        """Testa que a busca em andamento durante a recarga usa a geração em que começou"""
+        doc = Document(page_content="Art. 37...", metadata={}, id="abc:1")
+        old_vectorstore, new_vectorstore = vectorstore_mock(), vectorstore_mock()
+        old_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [(doc, 0.2)]
+        mock_chroma.side_effect = [old_vectorstore, new_vectorstore]
+        mock_embedding_service.return_value.model_key = "text-embedding-3-small"
+
+        retriever = RAGRetriever()
+        old_lexical = Mock()
+        retriever.lexical = old_lexical
+
+        async def reload_while_embedding(query):
+            await retriever.areload()
+            # A geração antiga segue aberta até a busca terminar
+            old_lexical.close.assert_not_called()
+            return [0.1, 0.2]
+
+        mock_embedding_service.return_value.aembed_query = reload_while_embedding
+
+        results = await retriever.asearch_with_scores("art. 37", k=3, weights=(1.0, 0.0))
+
+        assert results == [(doc, pytest.approx(0.8))]
+        assert retriever.vectorstore is new_vectorstore
+        new_vectorstore.similarity_search_by_vector_with_relevance_scores.assert_not_called()
+        old_lexical.close.assert_called_once()
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_search_after_aclose_fails(self, mock_chroma, mock_embedding_service):
+        """Testa que a busca depois de aclose falha em vez de esperar por uma geração que não virá"""
+        mock_chroma.return_value = vectorstore_mock()
+        mock_embedding_service.return_value.aclose = AsyncMock()
+
+        retriever = RAGRetriever()
+        await retriever.aclose()
+
+        with pytest.raises(RetrieverClosedError):
+            retriever.search_with_scores("art. 37")
+        with pytest.raises(RetrieverClosedError):
+            await retriever.asearch_with_scores("art. 37")
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_numpy_backend(self, mock_chroma, mock_embedding_service, tmp_path):
+        """Testa que VECTOR_BACKEND=numpy busca na matriz exportada e, sem ela, usa o Chroma"""
+        collection = chromadb.PersistentClient(path=str(tmp_path / "chroma")).create_collection("chunks")
+        collection.add(
+            ids=["a:0", "b:0"], embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+            documents=["Art. 5º ...", "Art. 37 ..."], metadatas=[{"area_direito": "Direito Constitucional"}] * 2
+        )
+        mock_embedding_service.return_value.model_key = "text-embedding-3-small"
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[0.1, 0.9, 0.0])
+
+        with patch('src.juridic_bot.config.Config.VECTOR_BACKEND', "numpy"), \
+             patch('src.juridic_bot.rag.retriever.current_dir', return_value=tmp_path):
+            retriever = RAGRetriever()
+            assert retriever.vectorstore is mock_chroma.return_value
+
+            export_vectors(collection, tmp_path)
+            retriever.reload()
+            assert isinstance(retriever.vectorstore, NumpyVectorStore)
+
+            results = await retriever.asearch_with_scores("art. 37", k=1, weights=(1.0, 0.0))
+
+        assert [(doc.id, doc.page_content) for doc, _ in results] == [("b:0", "Art. 37 ...")]
+        assert results[0][1] == pytest.approx(0.9 / (0.1 ** 2 + 0.9 ** 2) ** 0.5)
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @pytest.mark.asyncio
+    async def test_asearch_scores_with_chroma_collection(self, mock_embedding_service, tmp_path):
+        """Testa a busca assíncrona numa coleção real do Chroma: distância convertida em relevância"""
+        collection = chromadb.PersistentClient(path=str(tmp_path)).create_collection(
+            "langchain", metadata=collection_metadata()
+        )
+        collection.add(
+            ids=["a:0", "b:0", "c:0"], embeddings=[[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.0, 0.0, 1.0]],
+            documents=["Art. 5º ...", "Art. 6º ...", "Art. 37 ..."]
+        )
+        mock_embedding_service.return_value.model_key = "text-embedding-3-small"
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[1.0, 0.0, 0.0])
+
+        with patch('src.juridic_bot.rag.retriever.current_dir', return_value=tmp_path):
+            retriever = RAGRetriever()
+            results = await retriever.asearch_with_scores("art. 5º", k=3, weights=(1.0, 0.0), min_score=0.5)
+
+        # A correspondência exata (distância 0) tem relevância 1 e fica em primeiro; a ortogonal sai pelo limiar
+        assert [doc.id for doc, _ in results] == ["a:0", "b:0"]
+        assert [score for _, score in results] == pytest.approx([1.0, 0.8], abs=1e-5)
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_asearch_lexical_only_skips_embedding(self, mock_chroma, mock_embedding_service, tmp_path):
+        """Testa que peso vetorial 0 resolve a busca só com o BM25, sem embedding"""
+        doc = Document(page_content="Lei nº 8.112, de 11 de dezembro de 1990", metadata={}, id="lei:0")
+        lexical = LexicalIndex(tmp_path / "lexical.sqlite3")
+        lexical.upsert([doc, Document(page_content="Lei nº 9.784, de 29 de janeiro de 1999", id="lei9784:0")])
+
+        mock_vectorstore = Mock()
+        mock_vectorstore.get_by_ids.return_value = [doc]
+        mock_chroma.return_value = mock_vectorstore
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+
+        retriever = RAGRetriever()
+        retriever.lexical = lexical
+        results = await retriever.asearch("Lei 8112/1990", k=1, weights=(0.0, 1.0))
+
+        assert results == [doc]
+        mock_embedding_service.return_value.aembed_query.assert_not_awaited()
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.assert_not_called()
+        lexical.close()
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_asearch_fuses_vector_and_lexical(self, mock_chroma, mock_embedding_service):
+        """Testa a combinação por RRF: quem aparece nas duas listas sobe"""
+        semantic = Document(page_content="Princípios da administração...", metadata={}, id="a")
+        both = Document(page_content="Art. 37. A administração pública...", metadata={}, id="b")
+        exact = Document(page_content="Art. 37, § 6º...", metadata={}, id="c")
+
+        mock_vectorstore = vectorstore_mock()
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [
+            (semantic, 0.1), (both, 0.2)
+        ]
+        mock_vectorstore.get_by_ids.return_value = [exact]
+        mock_chroma.return_value = mock_vectorstore
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+
+        retriever = RAGRetriever()
+        retriever.lexical = Mock()
+        retriever.lexical.search.return_value = [("c", 9.0), ("b", 7.0)]
+        results = await retriever.asearch("art. 37", k=3)
+
+        assert [doc.id for doc in results] == ["b", "a", "c"]
+        mock_vectorstore.get_by_ids.assert_called_once_with(["c"])
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_asearch_lexical_miss_falls_back_to_vector(self, mock_chroma, mock_embedding_service):
+        """Testa que sem resultado lexical a busca vetorial é usada mesmo com peso 0"""
+        doc = Document(page_content="Regime jurídico dos servidores...", metadata={}, id="a")
+
+        mock_vectorstore = vectorstore_mock()
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [(doc, 0.5)]
+        mock_chroma.return_value = mock_vectorstore
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+
+        retriever = RAGRetriever()
+        retriever.lexical = Mock()
+        retriever.lexical.search.return_value = []
+        results = await retriever.asearch("estatuto", k=2, weights=(0.0, 1.0))
+
+        assert results == [doc]
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.assert_called_once_with(
+            [0.1, 0.2], k=2, filter=None
+        )
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_asearch_applies_metadata_filter(self, mock_chroma, mock_embedding_service):
+        """Testa que o filtro vai para o Chroma e também restringe os resultados do BM25"""
+        penal = Document(page_content="Art. 312. Peculato...", metadata={"area_direito": "Penal"}, id="a")
+        civil = Document(page_content="Art. 312. Se o devedor...", metadata={"area_direito": "Civil"}, id="b")
+
+        mock_vectorstore = vectorstore_mock()
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [(penal, 0.1)]
+        mock_vectorstore.get_by_ids.return_value = [civil]
+        mock_chroma.return_value = mock_vectorstore
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+
+        retriever = RAGRetriever()
+        retriever.lexical = Mock()
+        retriever.lexical.search.return_value = [("b", 9.0), ("a", 7.0)]
+        results = await retriever.asearch("art. 312", k=2, filters={"area_direito": "Penal"})
+
+        assert results == [penal]
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.assert_called_once_with(
+            [0.1, 0.2], k=20, filter={"area_direito": "Penal"}
+        )
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_alookup_statute_resolves_without_embedding(self, mock_chroma, mock_embedding_service, tmp_path):
+        """Testa a resolução de lei e artigo pelo índice de artigos"""
+        doc = Document(page_content="Art. 5º São requisitos básicos...", metadata={}, id="lei:3")
+        statutes = StatuteIndex(tmp_path / "statutes.sqlite3")
+        statutes.upsert([Document(
+            id="lei:3", page_content="", metadata={"lei": "LEI Nº 8.112, DE 11 DE DEZEMBRO DE 1990", "artigo": "5"}
+        )])
+
+        mock_vectorstore = Mock()
+        mock_vectorstore.get_by_ids.return_value = [doc]
+        mock_chroma.return_value = mock_vectorstore
+        mock_embedding_service.return_value.aembed_query = AsyncMock()
+
+        retriever = RAGRetriever()
+        retriever.statutes = statutes
+
+        assert await retriever.alookup_statute(LawReference("lei", "8112", 1990), "5") == [doc]
+        assert await retriever.alookup_statute(LawReference("lei", "8112", 1990), "6") == []
+        mock_embedding_service.return_value.aembed_query.assert_not_awaited()
+        statutes.close()
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    @pytest.mark.asyncio
+    async def test_asearch_with_scores_without_relevant_context(self, mock_chroma, mock_embedding_service):
+        """Testa que sem candidato vetorial acima do limiar a busca volta vazia, mesmo com termos no BM25"""
+        doc = Document(page_content="Dispõe sobre o direito de greve...", metadata={}, id="a")
+
+        mock_vectorstore = vectorstore_mock()
+        mock_vectorstore.similarity_search_by_vector_with_relevance_scores.return_value = [(doc, 0.9)]
+        mock_chroma.return_value = mock_vectorstore
+        mock_embedding_service.return_value.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+
+        retriever = RAGRetriever()
+        retriever.lexical = Mock()
+        retriever.lexical.search.return_value = [("a", 3.0)]
+
+        assert await retriever.asearch_with_scores("receita de bolo de direito", k=3, min_score=0.2) == []
+        mock_vectorstore.get_by_ids.assert_not_called()
+
+    @patch('src.juridic_bot.rag.retriever.EmbeddingService')
+    @patch('src.juridic_bot.rag.retriever.Chroma')
+    def test_search_with_scores_cuts_at_score_gap(self, mock_chroma, mock_embedding_service):
+        """Testa que a busca retorna (documento, relevância) e para na queda brusca de relevância"""
+        docs = [Document(page_content=f"Trecho {i}", metadata={}, id=str(i)) for i in range(3)]
+
+        mock_vectorstore = Mock()
+        mock_vectorstore.similarity_search_with_relevance_scores.return_value = [
+            (docs[0], 0.82), (docs[1], 0.78), (docs[2], 0.4)
+        ]
+        mock_chroma.return_value = mock_vectorstore
+
+        retriever = RAGRetriever()
+        results = retriever.search_with_scores("estágio probatório", k=3, min_score=0.2)
+
+        assert results == [(docs[0], 0.82), (docs[1], 0.78)]
+
     @patch('src.juridic_bot.rag.retriever.EmbeddingService')
     @patch('src.juridic_bot.rag.retriever.Chroma')
     def test_search_without_vectorstore(self, mock_chroma, mock_embedding_service):
@@ -78,7 +420,7 @@ class TestRAGRetriever:
     def test_search_with_error(self, mock_chroma, mock_embedding_service):
         """Testa busca com erro durante a operação"""
         mock_vectorstore = Mock()
-        mock_vectorstore.similarity_search_with_score.side_effect = Exception("Search error")
+        mock_vectorstore.similarity_search_with_relevance_scores.side_effect = Exception("Search error")
         mock_chroma.return_value = mock_vectorstore
 
         retriever = RAGRetriever()
@@ -171,4 +513,27 @@ class TestRAGRetriever:
             assert "Documento 1" in context
             assert "Desconhecido" in context  # source padrão
             assert "documento" in context  # tipo_documento padrão
-            assert "[Chunk ?/?]" in context  # chunk info padrão
\ No newline at end of file
+            assert "[Chunk ?/?]" in context  # chunk info padrão
+
+class TestSelectByScore:
+    """Testes do corte por limiar de relevância e k adaptativo"""
+
+    @pytest.fixture
+    def docs(self):
+        return [Document(page_content=f"Trecho {i}", id=str(i)) for i in range(4)]
+
+    def test_threshold_and_k(self, docs):
+        """Testa que trechos abaixo do limiar e além de k ficam de fora"""
+        results = list(zip(docs, [0.9, 0.85, 0.8, 0.1]))
+
+        assert select_by_score(results, k=2, min_score=0.2, gap_ratio=0) == results[:2]
+        assert select_by_score(results, k=4, min_score=0.2, gap_ratio=0) == results[:3]
+        assert select_by_score(results, k=4, min_score=0.95, gap_ratio=0) == []
+
+    def test_score_gap(self, docs):
+        """Testa o corte na primeira queda relativa maior que gap_ratio, respeitando min_k"""
+        results = list(zip(docs, [0.8, 0.5, 0.48, 0.47]))
+
+        assert select_by_score(results, k=4, min_score=0.0, gap_ratio=0.25, min_k=1) == results[:1]
+        assert select_by_score(results, k=4, min_score=0.0, gap_ratio=0.25, min_k=2) == results
+        assert select_by_score(results, k=4, min_score=0.0, gap_ratio=0.5, min_k=1) == results
@@ -0,0 +1,83 @@
+"""
+Testes para a reindexação em segundo plano
+"""
+import sys
+import textwrap
+import pytest
+from src.juridic_bot.bot.reindex import (
+    CANCELLED, DONE, FAILED, ReindexManager, ReindexRunningError, format_duration
+)
+
+# Imita a CLI da ingestão com --progress-json
+FAKE_INGEST = textwrap.dedent("""
+    import json, signal, sys, time
+    cancelled = False
+    def stop(signum, frame):
+        global cancelled
+        cancelled = True
+    signal.signal(signal.SIGTERM, stop)
+    print("log que não é JSON", flush=True)
+    print(json.dumps({"event": "progress", "files_planned": 4, "files_done": 1, "chunks_written": 10}), flush=True)
+    for _ in range(int(sys.argv[1])):
+        if cancelled:
+            print(json.dumps({"event": "cancelled", "files_planned": 4, "files_done": 1, "cancelled": True}))
+            sys.exit(0)
+        time.sleep(0.01)
+    print(json.dumps({"event": "done", "files_planned": 4, "files_done": 4, "chunks_written": 40,
+                      "total_files": 4}))
+""")
+
+
+def manager_for(steps: int, script: str = FAKE_INGEST) -> ReindexManager:
+    manager = ReindexManager()
+    manager.command = [sys.executable, "-c", script, str(steps)]
+    return manager
+
+
+class TestReindexManager:
+    """Testes da classe ReindexManager"""
+
+    @pytest.mark.asyncio
+    async def test_progress_and_result(self):
+        """Testa que o progresso e o resultado final chegam do processo"""
+        manager = manager_for(steps=20)
+        job = await manager.start()
+        await job.wait()
+
+        assert job.state == DONE
+        assert job.report["files_done"] == 4
+        assert job.changed_index
+        assert job.describe().startswith("✅ Índice atualizado")
+        assert not manager.running
+
+    @pytest.mark.asyncio
+    async def test_only_one_job_at_a_time(self):
+        """Testa que uma segunda reindexação é recusada enquanto a primeira roda"""
+        manager = manager_for(steps=500)
+        job = await manager.start()
+
+        with pytest.raises(ReindexRunningError):
+            await manager.start()
+
+        assert manager.cancel()
+        await job.wait()
+        assert job.state == CANCELLED
+        assert "cancelada" in job.describe()
+        assert not manager.cancel()
+
+    @pytest.mark.asyncio
+    async def test_process_without_result_fails(self):
+        """Testa que o processo que termina sem resultado final é reportado como erro"""
+        manager = manager_for(steps=0, script="import sys; sys.exit(3)")
+        job = await manager.start()
+        await job.wait()
+
+        assert job.state == FAILED
+        assert "código 3" in job.describe()
+
+
+def test_format_duration():
+    """Testa a formatação de durações das mensagens"""
+    assert format_duration(42.7) == "42s"
+    assert format_duration(125) == "2min05s"
+    assert format_duration(3 * 3600 + 60 * 7) == "3h07min"
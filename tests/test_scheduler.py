@@ -0,0 +1,154 @@
+"""
+Testes para o agendador de consultas
+"""
+import asyncio
+import pytest
+from src.juridic_bot.bot.scheduler import QueryScheduler, QueueFullError
+from src.juridic_bot.metrics import metrics
+
+
+class TestQueryScheduler:
+    """Testes da classe QueryScheduler"""
+
+    @pytest.mark.asyncio
+    async def test_respects_global_in_flight_cap(self):
+        """Testa que o limite global de consultas simultâneas é respeitado"""
+        scheduler = QueryScheduler(max_in_flight=2, max_queue_depth=10, max_per_user=10)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "ok"
+
+        results = await asyncio.gather(*(scheduler.submit(1, i, job) for i in range(6)))
+
+        assert results == ["ok"] * 6
+        assert peak == 2
+        assert scheduler.in_flight == 0
+        assert scheduler.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_round_robin_between_users(self):
+        """Testa que um usuário com muitas perguntas não atrasa os demais"""
+        scheduler = QueryScheduler(max_in_flight=1, max_queue_depth=10, max_per_user=10)
+        order = []
+        gate = asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+
+        def job(name):
+            async def run():
+                order.append(name)
+            return run
+
+        first = asyncio.create_task(scheduler.submit(1, "ocupado", blocker))
+        await asyncio.sleep(0)
+
+        tasks = [asyncio.create_task(scheduler.submit(1, "spammer", job(f"spam{i}"))) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(scheduler.submit(1, "aluno", job("aluno"))))
+        await asyncio.sleep(0)
+
+        gate.set()
+        await asyncio.gather(first, *tasks)
+
+        assert order.index("aluno") == 1
+        assert order == ["spam0", "aluno", "spam1", "spam2"]
+
+    @pytest.mark.asyncio
+    async def test_position_follows_round_robin(self):
+        """Testa que a posição informada é a vez do usuário no rodízio, não o tamanho da fila"""
+        scheduler = QueryScheduler(max_in_flight=1, max_queue_depth=10, max_per_user=10)
+        gate = asyncio.Event()
+        positions = {}
+
+        async def blocker():
+            await gate.wait()
+
+        def on_queued(name):
+            async def record(position):
+                positions[name] = position
+            return record
+
+        first = asyncio.create_task(scheduler.submit(1, "ocupado", blocker))
+        await asyncio.sleep(0)
+        tasks = [
+            asyncio.create_task(scheduler.submit(1, "spammer", blocker, on_queued=on_queued(f"spam{i}")))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(scheduler.submit(1, "aluno", blocker, on_queued=on_queued("aluno"))))
+        await asyncio.sleep(0)
+
+        assert positions == {"spam0": 1, "spam1": 2, "spam2": 3, "aluno": 2}
+        assert scheduler.queued == 4
+
+        gate.set()
+        await asyncio.gather(first, *tasks)
+
+    @pytest.mark.asyncio
+    async def test_queue_full_raises_and_reports_position(self):
+        """Testa backpressure com fila cheia e posição informada"""
+        scheduler = QueryScheduler(max_in_flight=1, max_queue_depth=1, max_per_user=5)
+        gate = asyncio.Event()
+        positions = []
+
+        async def blocker():
+            await gate.wait()
+
+        async def on_queued(position):
+            positions.append(position)
+
+        first = asyncio.create_task(scheduler.submit(1, 1, blocker))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(scheduler.submit(1, 2, blocker, on_queued=on_queued))
+        await asyncio.sleep(0)
+
+        with pytest.raises(QueueFullError):
+            await scheduler.submit(1, 3, blocker)
+
+        gate.set()
+        await asyncio.gather(first, second)
+        assert positions == [1]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Testa que consultas canceladas saem da fila sem vazar vagas"""
+        scheduler = QueryScheduler(max_in_flight=1, max_queue_depth=5, max_per_user=5)
+        gate = asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+
+        first = asyncio.create_task(scheduler.submit(1, 1, blocker))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(scheduler.submit(1, 2, blocker))
+        await asyncio.sleep(0)
+        assert scheduler.queued == 1
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.queued == 0
+
+        gate.set()
+        await first
+        assert scheduler.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_metric(self):
+        """Testa que o tempo de espera na fila é registrado"""
+        metrics.reset()
+        scheduler = QueryScheduler(max_in_flight=1)
+
+        async def job():
+            return None
+
+        await scheduler.submit(None, 1, job)
+
+        assert metrics.histogram("scheduler.queue_wait_ms")["count"] == 1
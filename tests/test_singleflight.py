@@ -0,0 +1,125 @@
+"""
+Testes para a coalescência de consultas idênticas
+"""
+import asyncio
+import pytest
+from src.juridic_bot.bot.singleflight import SingleFlight, flight_key
+from src.juridic_bot.metrics import metrics
+
+
+class TestSingleFlight:
+    """Testes da classe SingleFlight"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Testa que chamadas simultâneas com a mesma chave executam uma vez"""
+        metrics.reset()
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "resposta"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+        assert calls == 1
+        assert [r for r, _ in results] == ["resposta"] * 5
+        assert [shared for _, shared in results].count(False) == 1
+        assert metrics.counter("singleflight.saved") == 4
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """Testa que chaves diferentes não são coalescidas"""
+        flight = SingleFlight()
+        calls = []
+
+        async def work(name):
+            calls.append(name)
+            await asyncio.sleep(0)
+            return name
+
+        await asyncio.gather(flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b")))
+
+        assert sorted(calls) == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_followers(self):
+        """Testa que erros do líder chegam a quem aguardava"""
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("falhou")
+
+        results = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        """Testa que cancelar o líder não cancela a execução aguardada pelos seguidores"""
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.01)
+            return "resposta"
+
+        leader = asyncio.create_task(flight.do("k", work))
+        await started.wait()
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == ("resposta", True)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_work_is_cancelled_when_nobody_waits(self):
+        """Testa que a execução é cancelada quando o único interessado desiste"""
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_are_not_coalesced(self):
+        """Testa que chamadas após o término executam novamente"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        await flight.do("k", work)
+        result, shared = await flight.do("k", work)
+
+        assert result == 2
+        assert shared is False
+
+    def test_flight_key_normalizes_query(self):
+        """Testa que a chave ignora caixa e espaços extras"""
+        assert flight_key("mention", "O que é  Legalidade?", "1") == flight_key("mention", "o que é legalidade", "1")
+        assert flight_key("mention", "legalidade", "1") != flight_key("pergunta", "legalidade", "1")
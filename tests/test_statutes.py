@@ -0,0 +1,102 @@
+"""
+Testes para o índice de leis e artigos
+"""
+import pytest
+from langchain_core.documents import Document
+from src.juridic_bot.rag.statutes import (
+    LawReference,
+    StatuteIndex,
+    chunk_articles,
+    parse_law_reference,
+    parse_statute_query,
+)
+
+LEI_8112 = "LEI Nº 8.112, DE 11 DE DEZEMBRO DE 1990"
+
+
+def chunk(chunk_id, index, **metadata):
+    return Document(id=chunk_id, page_content="...", metadata={"chunk_index": index, **metadata})
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = StatuteIndex(tmp_path / "statutes.sqlite3")
+    yield index
+    index.close()
+
+
+class TestParsing:
+    """Testes da extração de referências"""
+
+    @pytest.mark.parametrize("text,expected", [
+        (LEI_8112, LawReference("lei", "8112", 1990)),
+        ("Lei 8112/90", LawReference("lei", "8112", 1990)),
+        ("lei_8112_1990", LawReference("lei", "8112", 1990)),
+        ("Lei Complementar nº 101, de 4 de maio de 2000", LawReference("lc", "101", 2000)),
+        ("DECRETO-LEI Nº 2.848, DE 7 DE DEZEMBRO DE 1940", LawReference("decreto-lei", "2848", 1940)),
+        ("CONSTITUIÇÃO DA REPÚBLICA FEDERATIVA DO BRASIL DE 1988", LawReference("cf", "cf", 1988)),
+        ("Lei nº 9.784", LawReference("lei", "9784", None)),
+        ("manual_de_direito_administrativo", None),
+    ])
+    def test_parse_law_reference(self, text, expected):
+        """Testa os formatos usuais de citação de leis"""
+        assert parse_law_reference(text) == expected
+
+    def test_parse_statute_query(self):
+        """Testa lei, artigo e parágrafo em uma consulta livre"""
+        assert parse_statute_query("art. 37, § 6º, da CF") == (LawReference("cf", "cf", 1988), "37", "6")
+        assert parse_statute_query("Art. 5º-A da Lei 8.112/90")[1:] == ("5-a", None)
+
+    def test_chunk_articles_from_metadata_range(self):
+        """Testa que um chunk com vários artigos inteiros registra todos"""
+        assert chunk_articles(chunk("a", 0, artigo="3", artigo_final="6")) == ["3", "4", "5", "6"]
+        assert chunk_articles(Document(page_content="Art. 1º Texto.\nArt. 2º Texto.")) == ["1", "2"]
+
+
+class TestStatuteIndex:
+    """Testes da classe StatuteIndex"""
+
+    def test_lookup_article_and_paragraph(self, index):
+        """Testa a resolução exata de artigo e parágrafo"""
+        index.upsert([
+            chunk("l:0", 0, lei=LEI_8112, artigo="1", artigo_final="4"),
+            chunk("l:1", 1, lei=LEI_8112, artigo="5"),
+            chunk("l:2", 2, lei=LEI_8112, artigo="5", paragrafo="§ 2º"),
+            chunk("cf:0", 0, lei="CONSTITUIÇÃO FEDERAL", artigo="5"),
+        ])
+        lei = LawReference("lei", "8112", 1990)
+
+        assert index.lookup(lei, "3") == ["l:0"]
+        assert index.lookup(lei, "5") == ["l:1", "l:2"]
+        assert index.lookup(lei, "5", "2") == ["l:2", "l:1"]
+        assert index.lookup(LawReference("lei", "8112"), "5", limit=1) == ["l:1"]
+        assert index.lookup(LawReference("cf", "cf", 1988), "5") == ["cf:0"]
+        assert index.lookup(LawReference("lei", "8112", 1991), "5") == []
+
+    def test_lookup_law_returns_beginning(self, index):
+        """Testa que sem artigo a consulta devolve o início da lei"""
+        index.upsert([
+            chunk("l:1", 1, lei=LEI_8112, artigo="1"),
+            chunk("l:0", 0, lei=LEI_8112),
+            chunk("l:2", 2, lei=LEI_8112, artigo="2"),
+        ])
+
+        assert index.lookup(LawReference("lei", "8112"), limit=2) == ["l:1", "l:2"]
+
+    def test_lookup_limit_counts_chunks(self, index):
+        """Testa que o limite vale por chunk, não por linha: um chunk com vários artigos conta uma vez"""
+        index.upsert([
+            chunk("l:0", 0, lei=LEI_8112, artigo="1", artigo_final="4"),
+            chunk("l:1", 1, lei=LEI_8112, artigo="5"),
+            chunk("l:2", 2, lei=LEI_8112, artigo="6"),
+        ])
+
+        assert index.lookup(LawReference("lei", "8112"), limit=2) == ["l:0", "l:1"]
+
+    def test_delete(self, index):
+        """Testa a remoção das referências de um chunk"""
+        index.upsert([chunk("l:0", 0, caminho_relativo="leis/lei_9784_1999.pdf", artigo="1")])
+        assert index.lookup(LawReference("lei", "9784", 1999), "1") == ["l:0"]
+
+        index.delete(["l:0"])
+        assert len(index) == 0
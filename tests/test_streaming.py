@@ -0,0 +1,114 @@
+"""
+Testes para a entrega de respostas em streaming
+"""
+import discord
+import pytest
+from unittest.mock import AsyncMock, Mock
+from src.juridic_bot.bot.streaming import StreamingResponder, split_for_discord
+
+
+def make_sender():
+    """Cria função de envio que registra as mensagens criadas"""
+    sent = []
+
+    async def send(content):
+        message = Mock()
+        message.content = content
+
+        async def edit(content):
+            message.content = content
+        message.edit = AsyncMock(side_effect=edit)
+        sent.append(message)
+        return message
+
+    return send, sent
+
+
+class TestStreamingResponder:
+    """Testes da classe StreamingResponder"""
+
+    @pytest.mark.asyncio
+    async def test_first_message_sent_on_first_visible_token(self):
+        """Testa envio imediato da primeira mensagem"""
+        send, sent = make_sender()
+        responder = StreamingResponder(send, edit_interval=60)
+
+        await responder.feed("  ")
+        assert sent == []
+
+        await responder.feed("Olá")
+        assert len(sent) == 1
+        assert sent[0].content == "  Olá"
+
+    @pytest.mark.asyncio
+    async def test_edits_are_throttled(self):
+        """Testa que edições respeitam o intervalo mínimo"""
+        send, sent = make_sender()
+        responder = StreamingResponder(send, edit_interval=60)
+
+        for delta in ["a", "b", "c", "d"]:
+            await responder.feed(delta)
+
+        # Nenhuma edição dentro do intervalo
+        sent[0].edit.assert_not_called()
+
+        await responder.finish()
+        sent[0].edit.assert_called_once_with(content="abcd")
+
+    @pytest.mark.asyncio
+    async def test_rolls_over_instead_of_truncating(self):
+        """Testa continuação em novas mensagens ao passar do limite"""
+        reply, replies = make_sender()
+        send, followups = make_sender()
+        responder = StreamingResponder(reply, send, max_length=20, edit_interval=0)
+
+        text = "Primeira linha.\nSegunda linha longa.\nTerceira linha."
+        for word in text.split(" "):
+            await responder.feed(word + " ")
+        await responder.finish(suffix="\nFim")
+
+        messages = replies + followups
+        assert len(replies) == 1
+        assert len(followups) >= 2
+        assert all(len(m.content) <= 20 for m in messages)
+        joined = " ".join(m.content for m in messages)
+        for word in ["Primeira", "Segunda", "Terceira", "Fim"]:
+            assert word in joined
+        assert len(responder.messages) == len(messages)
+
+    @pytest.mark.asyncio
+    async def test_failed_edit_keeps_text(self):
+        """Testa que o texto de uma edição que falhou não se perde ao transbordar"""
+        reply, replies = make_sender()
+        send, followups = make_sender()
+        responder = StreamingResponder(reply, send, max_length=20, edit_interval=0)
+
+        await responder.feed("Primeira ")
+        replies[0].edit.side_effect = discord.HTTPException(Mock(status=500), "erro")
+        await responder.feed("linha.\nSegunda linha.")
+        assert followups == []
+
+        await responder.feed(" Fim")
+        await responder.finish()
+
+        contents = [m.content for m in replies + followups]
+        # A primeira mensagem ficou com o texto antigo; o trecho que não entrou nela foi reenviado
+        assert contents == ["Primeira ", "Primeira linha.", "Segunda linha. Fim"]
+        assert len(responder.messages) == 2
+
+    @pytest.mark.asyncio
+    async def test_fallback_when_stream_is_empty(self):
+        """Testa mensagem padrão quando o LLM não produz texto"""
+        send, sent = make_sender()
+        responder = StreamingResponder(send)
+
+        await responder.finish(fallback="Sem resposta")
+
+        assert [m.content for m in sent] == ["Sem resposta"]
+
+    def test_split_prefers_line_breaks(self):
+        """Testa corte preferencial em quebra de linha"""
+        text = "a" * 16 + "\n" + "b" * 10
+        assert split_for_discord(text, 20) == 17
+        assert split_for_discord("c" * 30, 20) == 20
+        assert split_for_discord("curto", 20) == 5
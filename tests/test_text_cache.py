@@ -0,0 +1,59 @@
+"""
+Testes para o cache de texto extraído
+"""
+import os
+from pathlib import Path
+from unittest.mock import patch
+from langchain_core.documents import Document
+from src.juridic_bot.rag.text_cache import ExtractedTextCache
+
+
+class TestExtractedTextCache:
+    """Testes da classe ExtractedTextCache"""
+
+    def test_roundtrip_replaces_source(self, tmp_path):
+        """Testa leitura das páginas salvas com o caminho atual do arquivo"""
+        cache = ExtractedTextCache(tmp_path)
+        pages = [Document(page_content="Art. 1º", metadata={"source": "/antigo/lei.pdf", "page": 0})]
+
+        cache.put("hash", Path("/antigo/lei.pdf"), pages)
+        loaded = cache.get("hash", Path("/novo/lei.pdf"))
+
+        assert loaded[0].page_content == "Art. 1º"
+        assert loaded[0].metadata == {"source": "/novo/lei.pdf", "page": 0}
+        assert cache.get("outro-hash", Path("/novo/lei.pdf")) is None
+        assert cache.get("hash", Path("/novo/lei.txt")) is None
+
+    def test_loader_version_is_part_of_key(self, tmp_path):
+        """Testa que uma nova versão dos loaders invalida as entradas"""
+        cache = ExtractedTextCache(tmp_path)
+        cache.put("hash", Path("lei.pdf"), [Document(page_content="Art. 1º")])
+
+        with patch('src.juridic_bot.rag.text_cache.EXTRACTION_VERSION', 2):
+            assert ExtractedTextCache(tmp_path).get("hash", Path("lei.pdf")) is None
+
+    def test_corrupted_entry_is_discarded(self, tmp_path):
+        """Testa que uma entrada ilegível vira miss e é removida"""
+        cache = ExtractedTextCache(tmp_path)
+        cache.put("hash", Path("lei.pdf"), [Document(page_content="Art. 1º")])
+        entry = cache._entry_path(cache.key("hash", ".pdf"))
+        entry.write_bytes(b"lixo")
+
+        assert cache.get("hash", Path("lei.pdf")) is None
+        assert not entry.exists()
+
+    def test_prune_removes_least_recently_used(self, tmp_path):
+        """Testa a remoção das entradas usadas há mais tempo"""
+        cache = ExtractedTextCache(tmp_path)
+        for i in range(3):
+            cache.put(f"hash{i}", Path("lei.pdf"), [Document(page_content=os.urandom(2000).hex())])
+            entry = cache._entry_path(cache.key(f"hash{i}", ".pdf"))
+            os.utime(entry, (1000 + i, 1000 + i))
+
+        cache.get("hash0", Path("lei.pdf"))  # Uso recente protege a entrada mais antiga
+        oldest = cache._entry_path(cache.key("hash1", ".pdf"))
+        cache.max_bytes = cache.stats()["size_bytes"] - oldest.stat().st_size
+
+        assert cache.prune() == 1
+        assert cache.get("hash1", Path("lei.pdf")) is None
+        assert cache.get("hash0", Path("lei.pdf")) is not None
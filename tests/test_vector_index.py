@@ -0,0 +1,176 @@
+"""
+Testes para o índice vetorial em NumPy
+"""
+import numpy as np
+import pytest
+from unittest.mock import patch
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.juridic_bot.rag.vector_index import NumpyVectorStore, export_vectors, quantize_int8
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(7)
+    matrix = rng.normal(size=(50, 16)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def store(vectors):
+    ids = [f"k:{i}" for i in range(len(vectors))]
+    metadatas = [{"area_direito": "Direito Penal" if i % 2 else "Direito Civil", "chunk_index": i}
+                 for i in range(len(vectors))]
+    return NumpyVectorStore(vectors, ids, [f"Art. {i}º" for i in range(len(vectors))], metadatas)
+
+
+class TestNumpyVectorStore:
+    """Testes da busca exata sobre a matriz"""
+
+    def test_search_matches_brute_force(self, store, vectors):
+        """Testa que os resultados são os k maiores cossenos, em ordem de distância (1 - cosseno)"""
+        query = vectors[3] + 0.1 * vectors[8]
+        expected = np.argsort(-(vectors @ (query / np.linalg.norm(query))))[:5]
+
+        results = store.similarity_search_by_vector_with_relevance_scores(query, k=5)
+
+        assert [doc.id for doc, _ in results] == [f"k:{i}" for i in expected]
+        assert results[0][0].page_content == "Art. 3º"
+        scores = [score for _, score in results]
+        assert scores == sorted(scores)
+        assert scores[0] == pytest.approx(1 - float(vectors[expected[0]] @ query / np.linalg.norm(query)), abs=1e-5)
+
+    def test_batch_equals_single_queries(self, store, vectors):
+        """Testa que a busca em lote devolve o mesmo que uma busca por vez"""
+        batch = store.similarity_search_by_vectors_with_relevance_scores(vectors[:4], k=3)
+        for query, results in zip(vectors[:4], batch):
+            single = store.similarity_search_by_vector_with_relevance_scores(query, k=3)
+            assert [doc.id for doc, _ in results] == [doc.id for doc, _ in single]
+
+    def test_filter(self, store, vectors):
+        """Testa o filtro where e que k é limitado pelos chunks que passam nele"""
+        results = store.similarity_search_by_vector_with_relevance_scores(
+            vectors[3], k=100, filter={"area_direito": {"$in": ["Direito Civil"]}}
+        )
+        assert len(results) == 25
+        assert all(doc.metadata["area_direito"] == "Direito Civil" for doc, _ in results)
+
+        with pytest.raises(ValueError):
+            store.similarity_search_by_vector_with_relevance_scores(vectors[3], filter={"n": {"$gt": 1}})
+
+    def test_float16_matches_float32(self, store, vectors):
+        """Testa que a matriz em float16, convertida em blocos, mantém a ordem dos resultados"""
+        half = NumpyVectorStore(vectors.astype(np.float16), store.ids, store.documents, store.metadatas)
+        with patch('src.juridic_bot.rag.vector_index._BLOCK_ROWS', 7):
+            results = half.similarity_search_by_vector_with_relevance_scores(vectors[10], k=5)
+        expected = store.similarity_search_by_vector_with_relevance_scores(vectors[10], k=5)
+        assert [doc.id for doc, _ in results] == [doc.id for doc, _ in expected]
+
+    def test_int8_rescoring_matches_float32(self, store, vectors):
+        """Testa que a matriz int8 com reavaliação devolve os resultados e escores exatos"""
+        quantized, scales = quantize_int8(vectors)
+        query = vectors[10] + 0.3 * vectors[11]
+        expected = store.similarity_search_by_vector_with_relevance_scores(query, k=5)
+
+        compact = NumpyVectorStore(
+            vectors, store.ids, store.documents, store.metadatas, quantized=quantized, scales=scales, rescore=3
+        )
+        with patch('src.juridic_bot.rag.vector_index._BLOCK_ROWS', 7):
+            results = compact.similarity_search_by_vector_with_relevance_scores(query, k=5)
+        assert [doc.id for doc, _ in results] == [doc.id for doc, _ in expected]
+        assert [score for _, score in results] == pytest.approx([score for _, score in expected], abs=1e-6)
+        assert compact.dtype == "int8" and compact.nbytes == quantized.nbytes + scales.nbytes
+
+        compact.rescore = 0
+        approximate = compact.similarity_search_by_vector_with_relevance_scores(
+            query, k=5, filter={"area_direito": "Direito Civil"}
+        )
+        assert all(doc.metadata["area_direito"] == "Direito Civil" for doc, _ in approximate)
+        assert approximate[0][1] == pytest.approx(
+            1 - float(vectors[10] @ query / np.linalg.norm(query)), abs=1e-2
+        )
+
+    def test_get_by_ids(self, store):
+        """Testa a recuperação por ID na ordem pedida"""
+        assert [doc.id for doc in store.get_by_ids(["k:9", "inexistente", "k:2"])] == ["k:9", "k:2"]
+
+
+class TestExportVectors:
+    """Testes da exportação do Chroma para a matriz mapeada em memória"""
+
+    def test_export_and_load(self, tmp_path):
+        """Testa que a matriz exportada encontra os mesmos chunks e substitui a exportação anterior"""
+        embeddings = DeterministicFakeEmbedding(size=16)
+        vectorstore = Chroma(
+            persist_directory=str(tmp_path), embedding_function=embeddings,
+            collection_metadata={"hnsw:space": "cosine"}
+        )
+        chunks = [Document(id=f"k:{i}", page_content=f"Art. {i}º Texto.", metadata={"chunk_index": i})
+                  for i in range(7)]
+        vectorstore.add_documents(chunks, ids=[chunk.id for chunk in chunks])
+
+        assert export_vectors(vectorstore._collection, tmp_path, page_size=3) == 7
+        first_matrix = set(tmp_path.glob("vectors-*.npy"))
+        assert export_vectors(vectorstore._collection, tmp_path, dtype="float16") == 7
+        assert len(set(tmp_path.glob("vectors-*.npy")) - first_matrix) == 1 == len(list(tmp_path.glob("*.npy")))
+
+        store = NumpyVectorStore.load(tmp_path, embeddings)
+        assert store.count() == 7
+        assert isinstance(store.matrix, np.memmap) and store.matrix.dtype == np.float16
+
+        expected = vectorstore.similarity_search_with_relevance_scores("Art. 4º Texto.", k=3)
+        results = store.similarity_search_with_relevance_scores("Art. 4º Texto.", k=3)
+        assert [doc.id for doc, _ in results] == [doc.id for doc, _ in expected]
+        assert results[0][0].metadata == {"chunk_index": 4}
+        assert results[0][1] == pytest.approx(expected[0][1], abs=1e-2)
+
+    def test_export_int8(self, tmp_path):
+        """Testa a exportação quantizada: matriz int8 com escalas e matriz float32 para a reavaliação"""
+        embeddings = DeterministicFakeEmbedding(size=16)
+        vectorstore = Chroma(
+            persist_directory=str(tmp_path), embedding_function=embeddings,
+            collection_metadata={"hnsw:space": "cosine"}
+        )
+        chunks = [Document(id=f"k:{i}", page_content=f"Art. {i}º Texto.") for i in range(7)]
+        vectorstore.add_documents(chunks, ids=[chunk.id for chunk in chunks])
+
+        assert export_vectors(vectorstore._collection, tmp_path, dtype="int8") == 7
+        assert len(list(tmp_path.glob("vectors-*.npy"))) == 3
+        store = NumpyVectorStore.load(tmp_path, embeddings)
+        assert store.dtype == "int8" and store.matrix.dtype == np.float32
+        assert np.abs(store.quantized.astype(np.float32) * store.scales[:, None] - store.matrix).max() < 1e-2
+
+        expected = vectorstore.similarity_search_with_relevance_scores("Art. 4º Texto.", k=3)
+        results = store.similarity_search_with_relevance_scores("Art. 4º Texto.", k=3)
+        assert [doc.id for doc, _ in results] == [doc.id for doc, _ in expected]
+
+        # Voltar para float32 apaga as matrizes da exportação quantizada
+        export_vectors(vectorstore._collection, tmp_path)
+        assert len(list(tmp_path.glob("vectors-*.npy"))) == 1
+        assert NumpyVectorStore.load(tmp_path).quantized is None
+
+    def test_scores_match_chroma(self, tmp_path):
+        """Testa que os dois backends devolvem os mesmos escores para a mesma consulta"""
+        embeddings = DeterministicFakeEmbedding(size=16)
+        vectorstore = Chroma(
+            persist_directory=str(tmp_path), embedding_function=embeddings,
+            collection_metadata={"hnsw:space": "cosine"}
+        )
+        chunks = [Document(id=f"k:{i}", page_content=f"Art. {i}º Texto.") for i in range(7)]
+        vectorstore.add_documents(chunks, ids=[chunk.id for chunk in chunks])
+        export_vectors(vectorstore._collection, tmp_path)
+        store = NumpyVectorStore.load(tmp_path, embeddings)
+        query = embeddings.embed_query("Art. 4º Texto.")
+
+        expected = vectorstore.similarity_search_by_vector_with_relevance_scores(query, k=3)
+        results = store.similarity_search_by_vector_with_relevance_scores(query, k=3)
+        assert [doc.id for doc, _ in results] == [doc.id for doc, _ in expected]
+        assert [score for _, score in results] == pytest.approx([score for _, score in expected], abs=1e-5)
+        assert results[0][1] == pytest.approx(0.0, abs=1e-5)
+
+        relevance = vectorstore._select_relevance_score_fn()
+        assert store._select_relevance_score_fn()(0.25) == relevance(0.25)
+        expected = vectorstore.similarity_search_with_relevance_scores("Art. 4º Texto.", k=3)
+        results = store.similarity_search_with_relevance_scores("Art. 4º Texto.", k=3)
+        assert [score for _, score in results] == pytest.approx([score for _, score in expected], abs=1e-5)